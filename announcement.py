@@ -0,0 +1,203 @@
+"""The announcement file for the announce twitch bot module"""
+from dataclasses import fields
+from datetime import datetime
+from operator import attrgetter, itemgetter
+from typing import Callable, Optional
+import logging
+import string
+from streamer import Streamer
+from twitch_api import TwitchGame, TwitchStream, TwitchStreamInterface
+
+DEFAULT_TEMPLATE = '{roles} {mention} is now live on twitch{playing}: {title} {url}'
+
+STREAM_PLACEHOLDERS = tuple(field.name for field in fields(TwitchStream))
+
+EXTRA_PLACEHOLDERS = ('mention', 'roles', 'url', 'username', 'game', 'playing')
+
+SAMPLES = {int: 0, str: '', bool: False, datetime: datetime(2021, 5, 1)}
+
+WIRE_TYPES = {'id': str, 'user_id': str, 'game_id': str}
+
+PLACEHOLDER_SAMPLES = dict(
+    {
+        field.name: SAMPLES[WIRE_TYPES.get(field.name, field.type)]
+        for field in fields(TwitchStream)
+    },
+    **{name: '' for name in EXTRA_PLACEHOLDERS}
+)
+
+FORMATTER = string.Formatter()
+
+CONVERSIONS = {None: None, 's': str, 'r': repr, 'a': ascii}
+
+MESSAGE_LIMIT = 2000
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidTemplateException(Exception):
+    """Raised when an announcement template cannot be compiled"""
+
+
+def compile_template(source: str) -> Callable[[TwitchStreamInterface, dict], str]:
+    """
+    Compile an announcement template into a function rendering it
+
+    Templates use str.format syntax. Placeholders are the fields of the twitch stream,
+    e.g. {title} or {viewer_count:,}, and mention, roles (the role mentions), url,
+    username, game (the game name) and playing (" playing <game>" if the game is known).
+    The template is parsed and checked here once, formatting a sample value of each
+    placeholder's type as twitch sends it (the ids are strings), so rendering only
+    fetches each value and formats it.
+
+    Args:
+        source (str): The template
+
+    Returns:
+        Callable: Renders the template from a stream and a dict of the extra placeholders,
+            with surrounding whitespace stripped
+
+    Raises:
+        InvalidTemplateException: If the template is malformed or has unknown placeholders
+    """
+
+    try:
+        parsed = list(FORMATTER.parse(source))
+    except ValueError as error:
+        raise InvalidTemplateException(f'Invalid announcement template: {error}') from error
+
+    segments = []
+    for literal, name, spec, conversion in parsed:
+        if name is None:
+            segments.append((literal, None, False, '', None))
+            continue
+
+        from_stream = name in STREAM_PLACEHOLDERS
+        if not from_stream and name not in EXTRA_PLACEHOLDERS:
+            raise InvalidTemplateException(
+                f'Unknown placeholder "{{{name}}}", use one of '
+                + ', '.join(STREAM_PLACEHOLDERS + EXTRA_PLACEHOLDERS)
+            )
+
+        if '{' in spec or conversion not in CONVERSIONS:
+            raise InvalidTemplateException(f'Unsupported conversion or nesting in "{{{name}}}"')
+
+        convert = CONVERSIONS[conversion]
+        sample = PLACEHOLDER_SAMPLES[name]
+        try:
+            format(convert(sample) if convert else sample, spec)
+        except ValueError as error:
+            raise InvalidTemplateException(f'Invalid format of "{{{name}}}": {error}') from error
+
+        getter = attrgetter(name) if from_stream else itemgetter(name)
+        segments.append((literal, getter, from_stream, spec, convert))
+
+    segments = tuple(segments)
+
+    def render(stream: TwitchStreamInterface, extras: dict) -> str:
+        pieces = []
+        for literal, getter, from_stream, spec, convert in segments:
+            pieces.append(literal)
+            if getter is None:
+                continue
+
+            value = getter(stream) if from_stream else getter(extras)
+            if convert is not None:
+                value = convert(value)
+            pieces.append(format(value, spec))
+
+        return ''.join(pieces).strip()
+
+    return render
+
+
+class AnnouncementRenderer:
+    """
+    Renders the go live announcements of streamers from compiled templates
+
+    Every streamer is announced with the default template of the guild unless they have
+    a template of their own in the whitelist. Each distinct template is compiled once and
+    kept, so announcing a burst of streamers parses nothing. An announcement which fails
+    to render, e.g. a value of an unexpected type, or renders blank is rendered from the
+    built in template. Announcements are cut to the 2000 characters discord accepts.
+    """
+
+    def __init__(self, default: Optional[str] = None):
+        """
+        Initialize the renderer, compiling the default template
+
+        Args:
+            default (str): The default template, the built in one if none
+
+        Raises:
+            InvalidTemplateException: If the default template cannot be compiled
+        """
+
+        self.default = compile_template(default or DEFAULT_TEMPLATE)
+        self.fallback = compile_template(DEFAULT_TEMPLATE)
+        self.compiled = {}
+
+    def get(self, source: Optional[str]) -> Callable[[TwitchStreamInterface, dict], str]:
+        """
+        Get the compiled template, compiling it on first use
+
+        Templates are validated when they are set, one which cannot be compiled, e.g. if
+        edited by hand, falls back to the default.
+
+        Args:
+            source (str): The template, or none for the default
+
+        Returns:
+            Callable: The compiled template
+        """
+
+        if source is None:
+            return self.default
+
+        render = self.compiled.get(source)
+        if render is None:
+            try:
+                render = compile_template(source)
+            except InvalidTemplateException:
+                render = self.default
+            self.compiled[source] = render
+
+        return render
+
+    def render(self, streamer: Streamer, mentions: list, game: Optional[TwitchGame] = None) -> str:
+        """
+        Render the announcement of a streamer who has gone live
+
+        Args:
+            streamer (Streamer): The streamer, with their live stream
+            mentions (list): The mentions of their roles
+            game (TwitchGame): The game they are playing, if known
+
+        Returns:
+            str: The announcement
+        """
+
+        game_name = game.name if game is not None else ''
+        extras = {
+            'mention': f'<@{streamer.id}>',
+            'roles': ' '.join(mentions),
+            'url': f'https://twitch.tv/{streamer.username}',
+            'username': streamer.username,
+            'game': game_name,
+            'playing': f' playing {game_name}' if game_name else ''
+        }
+
+        try:
+            announcement = self.get(streamer.announcement)(streamer.twitch_stream, extras)
+        except (TypeError, ValueError) as error:
+            logger.warning(
+                'Failed to render the announcement of %s, using the built in template: %s',
+                streamer.username,
+                error
+            )
+            announcement = ''
+
+        if not announcement.strip():
+            announcement = self.fallback(streamer.twitch_stream, extras)
+
+        return announcement[:MESSAGE_LIMIT]
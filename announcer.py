@@ -0,0 +1,385 @@
+"""The announcer file of the announce twitch bot module"""
+
+from dataclasses import replace
+from typing import Optional
+import asyncio
+import contextvars
+import logging
+import time
+import discord
+from discord.ext import commands, tasks
+from discord.utils import get
+from announcement import AnnouncementRenderer
+from detector import LinkDetector
+from games import GameCache
+from history import StreamHistory
+from scheduler import PollScheduler, ScheduledTwitchHandler
+from settings import Settings, get_settings
+from streamer import Streamer, StreamerMapper, StreamerRegistry
+from twitch_api import TwitchGame, TwitchHandlerInterface, TwitchUnavailableException
+from whitelist import DatasourceHandlerInterface, NotFoundException
+from workers import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class AnnouncerCog(commands.Cog):
+    """
+    Polls twitch for whitelisted streamers and announces them when they go live
+
+    With POLL_MODE set to workers the polling is done by a pool of worker processes and
+    the cog only consumes the stream events they send.
+    """
+
+    def __init__(
+        self,
+        bot,
+        settings: Settings,
+        datasource: DatasourceHandlerInterface,
+        twitch_handler: TwitchHandlerInterface
+    ):
+        """
+        Initialize the announcer cog
+
+        Args:
+            bot: The discord bot
+            settings (Settings): The settings
+            datasource (DatasourceHandlerInterface): The whitelist
+            twitch_handler (TwitchHandlerInterface): The twitch handler to poll with
+        """
+        self.bot = bot
+        self.settings = settings
+        self.datasource = datasource
+        self.registry = StreamerRegistry(datasource)
+        self.detector = LinkDetector(self.registry)
+        self.scheduler = PollScheduler(
+            settings.poll_interval,
+            settings.poll_max_staleness,
+            settings.poll_backoff
+        )
+        self.mapper = StreamerMapper(
+            datasource,
+            ScheduledTwitchHandler(twitch_handler, self.scheduler)
+        )
+        self.history = StreamHistory(settings.history_bucket_seconds, settings.history_capacity)
+        self.games = GameCache(twitch_handler, settings.game_cache)
+        self.announcements = AnnouncementRenderer(settings.announcement_template)
+        self.live = None
+        self.check_lock = asyncio.Lock()
+        self.pool = None
+        self.consume_task = None
+
+        if settings.poll_mode == 'workers':
+            self.pool = WorkerPool(settings)
+            self.pool.start()
+            self.consume_task = self.bot.loop.create_task(self.consume())
+        else:
+            # The task loop decorator returns a Loop, which pylint cannot see
+            self.poll.change_interval(seconds=settings.poll_interval)  # pylint: disable=no-member
+            self.poll.start()  # pylint: disable=no-member
+
+    def cog_unload(self):
+        """Stop polling when the cog is unloaded"""
+        self.poll.cancel()  # pylint: disable=no-member
+        if self.pool is not None:
+            self.consume_task.cancel()
+            self.pool.stop()
+
+    @tasks.loop(seconds=60)
+    async def poll(self) -> None:
+        """
+        Poll the streamers who are due and announce anyone who has gone live
+
+        Returns:
+            None
+        """
+
+        await self.check()
+
+    @poll.before_loop
+    async def before_poll(self) -> None:
+        """Wait for the bot to connect before polling, warming the game cache from disk"""
+        await self.bot.loop.run_in_executor(None, self.games.load)
+        await self.bot.wait_until_ready()
+
+    async def check(self) -> None:
+        """
+        Check the streamers who are due and announce anyone who has gone live
+
+        Checks never overlap, so a check triggered by a message waits for a running poll.
+        Streamers who are already live when the bot starts are not announced, though their
+        games are cached. Every live stream is sampled into the history and archived once it
+        has ended. The games of everyone who went live are resolved together beforehand, so
+        a burst of go lives costs at most one extra request.
+
+        Returns:
+            None
+        """
+
+        async with self.check_lock:
+            await self.__check()
+
+    async def __check(self) -> None:
+        """
+        Check the streamers who are due, the check lock must be held
+
+        The check is skipped while twitch is unavailable without a last known state.
+
+        Returns:
+            None
+        """
+
+        try:
+            streamers = await self.bot.loop.run_in_executor(None, self.mapper.map)
+        except TwitchUnavailableException:
+            return None
+
+        live = [streamer for streamer in streamers if streamer.twitch_stream is not None]
+        live_ids = {streamer.id for streamer in live}
+        previous = self.live or {}
+
+        went_live = [streamer for streamer in live if streamer.id not in previous]
+        ended = [username for user_id, username in previous.items() if user_id not in live_ids]
+        silent = {streamer.id for streamer in went_live} if self.live is None else set()
+
+        self.live = {streamer.id: streamer.username for streamer in live}
+        await self.__publish(live, ended, went_live, silent)
+
+        return None
+
+    async def consume(self) -> None:
+        """
+        Consume the stream events sent by the poll workers until cancelled, restarting any
+        worker which has died
+
+        A batch which fails to be handled is logged and skipped, so one failed announcement
+        does not stop the streamers being announced afterwards.
+
+        Returns:
+            None
+        """
+
+        await self.bot.loop.run_in_executor(None, self.games.load)
+        await self.bot.wait_until_ready()
+
+        while True:
+            self.pool.supervise()
+            events = await self.bot.loop.run_in_executor(None, self.pool.get_events, 1.0)
+            if not events:
+                continue
+
+            try:
+                await self.handle_events(events)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Failed to handle %d stream events', len(events))
+
+    async def handle_events(self, events: list) -> None:
+        """
+        Handle a batch of stream events sent by the poll workers
+
+        Args:
+            events (list): The stream events
+
+        Returns:
+            None
+        """
+
+        live, ended, went_live, silent = [], [], [], set()
+        self.live = self.live or {}
+
+        for event in events:
+            if event.kind == 'offline':
+                ended.append(event.username)
+                for user_id, username in list(self.live.items()):
+                    if username.lower() == event.username.lower():
+                        del self.live[user_id]
+                continue
+
+            streamer = self.registry.match(event.username)
+            if streamer is None:
+                continue
+
+            streamer = replace(streamer, roles=list(streamer.roles), twitch_stream=event.stream)
+            live.append(streamer)
+            if event.kind == 'live':
+                went_live.append(streamer)
+                if not event.announce:
+                    silent.add(streamer.id)
+
+            self.live[streamer.id] = streamer.username
+
+        await self.__publish(live, ended, went_live, silent)
+
+    async def __publish(self, live: list, ended: list, went_live: list, silent: set) -> None:
+        """
+        Record the live streams into the history and announce the streamers who went live
+
+        Args:
+            live (list): The streamers who are live, with their streams
+            ended (list): The usernames of the streamers whose streams have ended
+            went_live (list): The streamers who have gone live
+            silent (set): The user ids of the streamers who went live not to announce
+
+        Returns:
+            None
+        """
+
+        for streamer in live:
+            self.history.record(streamer.username, streamer.twitch_stream)
+            self.registry.observe(streamer.twitch_stream)
+
+        for username in ended:
+            self.history.end(username)
+
+        games = await self.bot.loop.run_in_executor(
+            None,
+            self.games.get,
+            [streamer.twitch_stream.game_id for streamer in went_live]
+        )
+
+        for streamer in went_live:
+            if streamer.id not in silent:
+                await self.announce(streamer, games.get(str(streamer.twitch_stream.game_id)))
+
+    @commands.Cog.listener()
+    async def on_message(self, message) -> None:
+        """
+        Check streamers linked or named in the listen channel straight away
+
+        Args:
+            message (discord.Message): The message
+
+        Returns:
+            None
+        """
+
+        if message.author.bot or message.channel.id != self.settings.discord_listen_channel:
+            return None
+
+        usernames = [
+            streamer.username for streamer in self.detector.find(message.content)
+            if streamer.id not in (self.live or {})
+        ]
+        if not usernames:
+            return None
+
+        if self.pool is not None:
+            self.pool.force(usernames)
+            return None
+
+        self.scheduler.force(usernames)
+        await self.check()
+
+        return None
+
+    async def announce(self, streamer: Streamer, game: Optional[TwitchGame] = None) -> None:
+        """
+        Announce a streamer who has gone live in the announce channel
+
+        The announcement is rendered from the streamer's own template if they have one,
+        else from ANNOUNCEMENT_TEMPLATE.
+
+        Args:
+            streamer (Streamer): The streamer, with their live stream
+            game (TwitchGame): The game they are playing, if known
+
+        Returns:
+            None
+        """
+
+        channel = self.bot.get_channel(self.settings.discord_announce_channel)
+        if channel is None:
+            return None
+
+        mentions = []
+        for role in streamer.roles:
+            role_tag = get(channel.guild.roles, id=role.id)
+            if role_tag is not None:
+                mentions.append(role_tag.mention)
+
+        await channel.send(self.announcements.render(streamer, mentions, game))
+
+        return None
+
+    @commands.command(name='stream_stats', pass_context=True)
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def stream_stats(self, ctx, user: discord.User, days: int = 30) -> None:
+        """
+        Shows the hours streamed, viewers and top games of a streamer
+
+        The streamer is looked up in the whitelist off the event loop.
+
+        Args:
+            ctx: Represents the :class:`.Context`
+            user (discord.User): The streamer
+            days (int): The number of days to report on
+
+        Returns:
+            None
+        """
+
+        from stats import stream_stats  # pylint: disable=import-outside-toplevel
+
+        try:
+            streamer = await self.bot.loop.run_in_executor(
+                None, contextvars.copy_context().run, self.datasource.find, user.id
+            )
+        except NotFoundException:
+            await ctx.send(f"{user.mention} is not in the streamer list")
+            return None
+
+        stats = stream_stats(self.history, streamer['username'], time.time() - days * 86400)
+        if stats is None:
+            await ctx.send(f"{user.mention} has not streamed in the last {days} days")
+            return None
+
+        games = ', '.join(f"{name} ({hours:.1f}h)" for name, hours in stats.top_games)
+        await ctx.send(
+            f"{user.mention} streamed {stats.hours:.1f} hours in the last {days} days with "
+            f"{stats.average_viewers:.0f} average and {stats.peak_viewers} peak viewers."
+            + (f"\nTop games: {games}" if games else '')
+        )
+
+        return None
+
+    @commands.command(name='leaderboard', pass_context=True)
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def leaderboard(self, ctx, days: int = 30) -> None:
+        """
+        Ranks the streamers by their average viewers
+
+        Args:
+            ctx: Represents the :class:`.Context`
+            days (int): The number of days to report on
+
+        Returns:
+            None
+        """
+
+        from stats import leaderboard  # pylint: disable=import-outside-toplevel
+
+        rankings = leaderboard(self.history, time.time() - days * 86400)
+        if not rankings:
+            await ctx.send(f"Nobody has streamed in the last {days} days")
+            return None
+
+        await ctx.send(f"Leaderboard for the last {days} days:\n" + '\n'.join(
+            f"{position}. {stats.username}: {stats.average_viewers:.0f} average, "
+            f"{stats.peak_viewers} peak viewers over {stats.hours:.1f} hours"
+            for position, stats in enumerate(rankings, start=1)
+        ))
+
+        return None
+
+
+def setup(bot):
+    """Sets up the bot by adding the announcer cog, sharing the commands cog's handlers"""
+    commands_cog = bot.get_cog('CommandsCog')
+    bot.add_cog(AnnouncerCog(
+        bot,
+        get_settings(),
+        commands_cog.datasource.datasource_handler,
+        commands_cog.get_twitch_handler()
+    ))
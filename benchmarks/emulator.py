@@ -0,0 +1,359 @@
+"""A local Helix emulator and fake Discord client for running the bot offline
+
+The emulator serves the oauth, streams and games endpoints the twitch client uses on
+localhost, with configurable latency and rate limiting, from a precomputed schedule of
+streams. The fake Discord objects implement just enough of discord.py for the cogs.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+
+@dataclass
+class Profile:
+    """
+    Describes the simulated streamers and the behaviour of the emulated Helix
+
+    Attributes:
+        go_live_share (float): The share of streamers who go live during the run
+        live_share (float): The share of streamers already live when it starts
+        latency (tuple): The least and most seconds taken to answer a request
+        throttle_rate (float): The share of requests answered with a 429
+        warmup (float): The seconds before anyone goes live
+        min_session (float): The fewest seconds a stream lasts
+        seed (int): The random seed
+    """
+    go_live_share: float = 0.3
+    live_share: float = 0.1
+    latency: tuple = (0.01, 0.05)
+    throttle_rate: float = 0.0
+    warmup: float = 3.0
+    min_session: float = 10.0
+    seed: int = 1
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers a single request to the emulator serving it"""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer a Helix request"""
+        self.server.emulator.handle(self)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer an oauth request"""
+        self.server.emulator.handle(self)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the output clean"""
+
+
+class HelixEmulator:
+    """
+    Serves the Helix endpoints used by the bot from a schedule of simulated streams
+    """
+
+    def __init__(self, streamers: int, duration: float, profile: Optional[Profile] = None):
+        """
+        Initialize the emulator, the schedule is relative to when it is started
+
+        Args:
+            streamers (int): The number of streamers, named streamer0, streamer1 and so on
+            duration (float): The seconds during which streamers go live
+            profile (Profile): The simulated behaviour, defaults to the default profile
+        """
+
+        self.profile = profile or Profile()
+        self.generator = random.Random(self.profile.seed)
+        self.logins = [f'streamer{index}' for index in range(streamers)]
+        self.sessions = {}
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.started = None
+
+        profile = self.profile
+        for login in self.logins:
+            chance = self.generator.random()
+            if chance < profile.live_share:
+                self.sessions[login] = (-3600.0, duration + 3600.0)
+            elif chance < profile.live_share + profile.go_live_share:
+                start = self.generator.uniform(profile.warmup, max(profile.warmup, duration))
+                length = self.generator.uniform(0.5, 2.0) * duration
+                self.sessions[login] = (start, start + max(length, profile.min_session))
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.server.emulator = self
+
+    @property
+    def url(self) -> str:
+        """
+        The base url of the emulator
+
+        Returns:
+            str: The url
+        """
+
+        return f'http://127.0.0.1:{self.server.server_address[1]}/'
+
+    def start(self) -> None:
+        """
+        Start serving in a background thread and point the twitch client at the emulator
+
+        Returns:
+            None
+        """
+
+        # pylint: disable=import-outside-toplevel
+        import twitch.helix.api
+        import twitch.helix.base
+
+        twitch.helix.base.BASE_HELIX_URL = f'{self.url}helix/'
+        twitch.helix.api.BASE_OAUTH_URL = f'{self.url}oauth2/'
+
+        self.started = time.time()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        Stop serving
+
+        Returns:
+            None
+        """
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def go_lives(self) -> dict:
+        """
+        Get when each streamer who goes live during the run does so
+
+        Returns:
+            dict: Unix timestamps keyed by login
+        """
+
+        return {
+            login: self.started + start
+            for login, (start, _) in self.sessions.items() if start >= 0
+        }
+
+    def is_live(self, login: str, now: float) -> bool:
+        """
+        Check if a streamer is live at a time
+
+        Args:
+            login (str): The login
+            now (float): The unix timestamp
+
+        Returns:
+            bool: True if live, else false
+        """
+
+        session = self.sessions.get(login)
+
+        return session is not None and session[0] <= now - self.started < session[1]
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        """
+        Answer a request after the simulated latency, or throttle it
+
+        Args:
+            request (BaseHTTPRequestHandler): The request
+
+        Returns:
+            None
+        """
+
+        time.sleep(self.generator.uniform(*self.profile.latency))
+        url = urlparse(request.path)
+        query = parse_qs(url.query)
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+
+        with self.lock:
+            self.requests[endpoint] += 1
+            throttled = endpoint != 'token' and self.generator.random() < self.profile.throttle_rate
+            if throttled:
+                self.requests['throttled'] += 1
+
+        if throttled:
+            self.respond(request, 429, {'message': 'Too Many Requests'}, remaining=0)
+        elif endpoint == 'token':
+            self.respond(request, 200, {'access_token': 'emulated', 'expires_in': 3600})
+        elif endpoint == 'streams':
+            now = time.time()
+            self.respond(request, 200, {
+                'data': [
+                    self.stream(login) for login in query.get('user_login', [])
+                    if self.is_live(login, now)
+                ],
+                'pagination': {}
+            })
+        elif endpoint == 'games':
+            self.respond(request, 200, {'data': [
+                {'id': game_id, 'name': f'Game {game_id}', 'box_art_url': 'art-{width}x{height}'}
+                for game_id in query.get('id', [])
+            ]})
+        else:
+            self.respond(request, 404, {'message': 'Not Found'})
+
+    def stream(self, login: str) -> dict:
+        """
+        Build the Helix stream of a live streamer
+
+        Args:
+            login (str): The login
+
+        Returns:
+            dict: The stream
+        """
+
+        index = int(login[len('streamer'):])
+        started_at = datetime.fromtimestamp(self.started + self.sessions[login][0], timezone.utc)
+
+        return {
+            'id': str(index),
+            'user_id': str(1000 + index),
+            'user_login': login,
+            'user_name': login,
+            'game_id': str(index % 20 + 1),
+            'game_name': f'Game {index % 20 + 1}',
+            'type': 'live',
+            'title': f'{login} is streaming',
+            'viewer_count': index % 500,
+            'started_at': started_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'language': 'en',
+            'thumbnail_url': 'thumbnail-{width}x{height}',
+            'tag_ids': [],
+            'is_mature': False
+        }
+
+    @staticmethod
+    def respond(request: BaseHTTPRequestHandler, status: int, body: dict, remaining: int = 800):
+        """
+        Send a json response with Helix's rate limit headers
+
+        Args:
+            request (BaseHTTPRequestHandler): The request
+            status (int): The status code
+            body (dict): The body
+            remaining (int): The requests remaining in the rate limit window
+
+        Returns:
+            None
+        """
+
+        payload = json.dumps(body).encode('utf8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        request.send_header('Ratelimit-Remaining', str(remaining))
+        request.send_header('Ratelimit-Reset', str(int(time.time()) + 1))
+        request.end_headers()
+        request.wfile.write(payload)
+
+
+class FakeUser:
+    """A discord user"""
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id  # pylint: disable=invalid-name
+        self.name = name
+        self.bot = False
+        self.avatar_url = f'https://cdn.example/avatars/{user_id}.png'
+
+    @property
+    def mention(self) -> str:
+        """The mention of the user"""
+        return f'<@{self.id}>'
+
+
+class FakeRole:
+    """A discord role"""
+
+    def __init__(self, role_id: int, name: str):
+        self.id = role_id  # pylint: disable=invalid-name
+        self.name = name
+
+    @property
+    def mention(self) -> str:
+        """The mention of the role"""
+        return f'<@&{self.id}>'
+
+
+class FakeGuild:
+    """A discord guild"""
+
+    def __init__(self, roles: list):
+        self.roles = roles
+
+
+class FakeChannel:
+    """A discord text channel recording every message sent with the time it was sent"""
+
+    def __init__(self, channel_id: int, guild: FakeGuild):
+        self.id = channel_id  # pylint: disable=invalid-name
+        self.guild = guild
+        self.messages = []
+
+    async def send(self, content: str = None, embed=None) -> None:
+        """Record a message"""
+        self.messages.append((time.time(), content, embed))
+
+
+class FakeContext:
+    """A command context replying in a channel"""
+
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = FakeUser(0, 'admin')
+
+    async def send(self, content: str = None, embed=None) -> None:
+        """Reply in the channel"""
+        await self.channel.send(content, embed=embed)
+
+
+class FakeBot:
+    """
+    A discord bot with a user cache and a simulated latency fetching users
+    """
+
+    def __init__(self, loop, channels: list, fetch_latency: float = 0.05):
+        self.loop = loop
+        self.channels = {channel.id: channel for channel in channels}
+        self.users = {}
+        self.fetch_latency = fetch_latency
+        self.fetches = 0
+        self.cogs = {}
+
+    def get_channel(self, channel_id: int):
+        """Get a channel from the cache"""
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id: int):
+        """Get a user from the cache"""
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        """Fetch a user, as discord would over http"""
+        self.fetches += 1
+        await asyncio.sleep(self.fetch_latency)
+        return self.users[user_id]
+
+    def get_cog(self, name: str):
+        """Get a cog by name"""
+        return self.cogs.get(name)
+
+    def dispatch(self, event: str, *args) -> None:
+        """Events are not dispatched"""
+
+    async def wait_until_ready(self) -> None:
+        """The fake bot is always ready"""
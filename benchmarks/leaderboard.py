@@ -0,0 +1,99 @@
+"""Times the stream stats leaderboard against the same aggregation done in Python
+
+Every streamer streams a few hours a day over the simulated days, archived in buckets of
+fifteen minutes as the announcer does.
+
+Usage: python benchmarks/leaderboard.py [streamers] [days]
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from history import RingBuffer, StreamHistory
+from stats import leaderboard
+
+BUCKET = 15 * 60
+
+
+def build_history(streamers: int, days: int, seed: int = 1) -> StreamHistory:
+    """
+    Build a history with the archived streams of each simulated streamer
+
+    Args:
+        streamers (int): The number of streamers
+        days (int): The number of days to simulate
+        seed (int): The random seed
+
+    Returns:
+        StreamHistory: The history
+    """
+
+    generator = random.Random(seed)
+    history = StreamHistory(BUCKET, days * 96)
+
+    for index in range(streamers):
+        archive = RingBuffer(StreamHistory.ARCHIVE_COLUMNS, history.archive_capacity)
+        viewers = generator.randint(1, 2000)
+        for day in range(days):
+            start = day * 86400 + generator.randrange(0, 80000, BUCKET)
+            for bucket in range(generator.randint(4, 16)):
+                average = max(1, viewers + generator.randint(-viewers // 4, viewers // 4))
+                archive.append(start + bucket * BUCKET, BUCKET, average, average * 5 // 4, day % 7)
+
+        history.archives[f'streamer{index}'] = archive
+
+    return history
+
+
+def python_leaderboard(history: StreamHistory, limit: int = 10) -> list:
+    """
+    Rank the streamers by average viewers with a Python loop over every bucket
+
+    Args:
+        history (StreamHistory): The history
+        limit (int): The most streamers to return
+
+    Returns:
+        list: Tuples of username and average viewers, best first
+    """
+
+    averages = []
+    for username, archive in history.archives.items():
+        seconds = viewer_seconds = 0
+        for length, average in zip(archive.column('seconds'), archive.column('average_viewers')):
+            seconds += length
+            viewer_seconds += length * average
+
+        averages.append((username, viewer_seconds / seconds))
+
+    return sorted(averages, key=lambda item: -item[1])[:limit]
+
+
+def main(streamers: int = 2000, days: int = 30) -> None:
+    """
+    Print the time taken by each leaderboard
+
+    Args:
+        streamers (int): The number of streamers
+        days (int): The number of days to simulate
+
+    Returns:
+        None
+    """
+
+    history = build_history(streamers, days)
+    buckets = sum(len(archive) for archive in history.archives.values())
+
+    print(f'{streamers} streamers over {days} days, {buckets} buckets')
+    for name, function in (('numpy', leaderboard), ('python', python_leaderboard)):
+        timer = timeit.Timer(lambda function=function: function(history))
+        seconds = min(timer.repeat(number=1, repeat=5))
+        print(f'{name:7} {seconds * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:3]])
@@ -0,0 +1,229 @@
+"""Runs the bot end to end against a local Helix emulator and fake Discord client
+
+The whitelist is filled through CommandsCog, then the announcer polls the emulator for
+the length of the run. Reports the latency from each streamer going live to their
+announcement being sent, the requests made to Helix, the lookups deduplicated and the
+cost of listing streamers. Everything runs on localhost.
+
+Usage: python benchmarks/loadtest.py [streamers] [seconds] [throttle rate] [latency ms]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY)
+
+# pylint: disable=wrong-import-position
+from emulator import (
+    FakeBot,
+    FakeChannel,
+    FakeContext,
+    FakeGuild,
+    FakeRole,
+    FakeUser,
+    HelixEmulator,
+    Profile
+)
+from settings import Settings
+
+ANNOUNCE_CHANNEL = 1
+COMMAND_CHANNEL = 2
+
+
+def create_settings(directory: str, **overrides) -> Settings:
+    """
+    Create settings keeping the whitelist in a temporary directory
+
+    Args:
+        directory (str): The temporary directory
+        **overrides: Settings to override
+
+    Returns:
+        Settings: The settings
+    """
+
+    templates = os.path.join(REPOSITORY, 'templates')
+
+    return Settings(**{
+        'discord_announce_channel': ANNOUNCE_CHANNEL,
+        'streamer_datasource': os.path.join(directory, 'streamers.json'),
+        'template': os.path.join(templates, 'template.json'),
+        'template_streamer': os.path.join(templates, 'streamer.json'),
+        'template_role': os.path.join(templates, 'role.json'),
+        'twitch_app_id': 'emulated',
+        'twitch_app_secret': 'emulated',
+        'journal_compact_threshold': 1000,
+        'poll_interval': 1.0,
+        'poll_max_staleness': 5.0,
+        **overrides
+    })
+
+
+def percentile(values: list, share: float) -> float:
+    """
+    Get a percentile of sorted values
+
+    Args:
+        values (list): The sorted values
+        share (float): The percentile between 0 and 1
+
+    Returns:
+        float: The value
+    """
+
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+async def run(emulator: HelixEmulator, settings: Settings, duration: float) -> dict:
+    """
+    Fill the whitelist, poll for the duration and list the streamers, then the live ones
+
+    Args:
+        emulator (HelixEmulator): The started emulator
+        settings (Settings): The settings
+        duration (float): The seconds to poll for
+
+    Returns:
+        dict: The announcements sent, list_streamers timings and twitch handler counters
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from announcer import AnnouncerCog
+    from commands import CommandsCog
+
+    guild = FakeGuild([FakeRole(100 + index, f'role{index}') for index in range(5)])
+    context = FakeContext(FakeChannel(COMMAND_CHANNEL, guild))
+    channels = [FakeChannel(ANNOUNCE_CHANNEL, guild), context.channel]
+    bot = FakeBot(asyncio.get_running_loop(), channels)
+
+    commands_cog = CommandsCog(bot, settings)
+    bot.cogs['CommandsCog'] = commands_cog
+    for index, login in enumerate(emulator.logins):
+        bot.users[10000 + index] = FakeUser(10000 + index, login)
+        await commands_cog.add_streamer.callback(  # pylint: disable=no-member
+            commands_cog, context, bot.users[10000 + index], login, guild.roles[index % 5]
+        )
+
+    emulator.start()
+    announcer = AnnouncerCog(
+        bot,
+        settings,
+        commands_cog.datasource.datasource_handler,
+        commands_cog.get_twitch_handler()
+    )
+    await asyncio.sleep(duration)
+    announcer.cog_unload()
+
+    list_timings = [await time_list_streamers(commands_cog, context) for _ in range(2)]
+    commands_cog.embeds.clear()
+    list_timings.append(await time_list_streamers(commands_cog, context, 'live'))
+    commands_cog.cog_unload()
+
+    return {
+        'messages': bot.get_channel(ANNOUNCE_CHANNEL).messages,
+        'list_timings': list_timings,
+        'counters': commands_cog.get_twitch_handler().counters
+    }
+
+
+async def time_list_streamers(commands_cog, context: FakeContext, *filters: str) -> tuple:
+    """
+    Time listing the streamers
+
+    Args:
+        commands_cog (CommandsCog): The commands cog
+        context (FakeContext): The command context
+        *filters (str): The filters to list with
+
+    Returns:
+        tuple: The seconds taken and the number of users fetched
+    """
+
+    fetches, started = commands_cog.bot.fetches, time.perf_counter()
+    await commands_cog.list_streamers.callback(  # pylint: disable=no-member
+        commands_cog, context, list(filters)
+    )
+
+    return time.perf_counter() - started, commands_cog.bot.fetches - fetches
+
+
+def report(emulator: HelixEmulator, results: dict) -> None:
+    """
+    Print the latencies, request counts and list_streamers timings
+
+    Args:
+        emulator (HelixEmulator): The emulator
+        results (dict): The results of run
+
+    Returns:
+        None
+    """
+
+    go_lives = emulator.go_lives()
+    announced = {}
+    for sent_at, content, _ in results['messages']:
+        login = content.rsplit('/', 1)[-1]
+        announced.setdefault(login, sent_at)
+
+    latencies = sorted(
+        announced[login] - went_live for login, went_live in go_lives.items() if login in announced
+    )
+    unexpected = [login for login in announced if login not in go_lives]
+
+    print(f'{len(emulator.logins)} streamers, {len(go_lives)} went live, '
+          f'{len(latencies)} announced, {len(go_lives) - len(latencies)} missed, '
+          f'{len(unexpected)} announced wrongly')
+    if latencies:
+        print(
+            f'go live to message latency: p50 {statistics.median(latencies):.2f}s '
+            f'p95 {percentile(latencies, 0.95):.2f}s p99 {percentile(latencies, 0.99):.2f}s '
+            f'max {latencies[-1]:.2f}s'
+        )
+
+    print('helix requests: ' + ', '.join(
+        f'{endpoint} {count}' for endpoint, count in sorted(emulator.requests.items())
+    ))
+    print('twitch lookups: ' + ', '.join(
+        f'{name} {count}' for name, count in sorted(results['counters'].items())
+    ))
+    for name, (seconds, fetches) in zip(('cold', 'warm', 'live cold'), results['list_timings']):
+        print(f'list_streamers {name}: {seconds * 1000:.0f}ms, {fetches} user fetches')
+
+
+def main(streamers: int = 500, seconds: int = 30, throttle: float = 0.0, latency: int = 30):
+    """
+    Run the load test
+
+    Args:
+        streamers (int): The number of streamers
+        seconds (int): The seconds to poll for
+        throttle (float): The share of Helix requests answered with a 429
+        latency (int): The most milliseconds Helix takes to answer
+
+    Returns:
+        None
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = create_settings(directory)
+
+        # Leave time for the last go lives to be picked up by even a dormant poll
+        emulator = HelixEmulator(streamers, seconds - settings.poll_max_staleness - 2, Profile(
+            latency=(latency / 3000, latency / 1000),
+            throttle_rate=throttle,
+            min_session=settings.poll_max_staleness * 2
+        ))
+        try:
+            results = asyncio.run(run(emulator, settings, seconds))
+        finally:
+            emulator.stop()
+
+    report(emulator, results)
+
+
+if __name__ == '__main__':
+    main(*[cast(argument) for cast, argument in zip((int, int, float, int), sys.argv[1:5])])
@@ -0,0 +1,169 @@
+"""Simulates polling a whitelist with a fixed rate and with the adaptive poll scheduler
+
+Streamers follow one of three habits: daily at a fixed hour, twice a week at a fixed hour,
+or a few times a month at random. The simulation reports the number of logins looked up
+against the latency between going live and being detected.
+
+Usage: python benchmarks/polling.py [streamers] [weeks] [poll interval] [max staleness]
+"""
+from datetime import datetime, timezone
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from scheduler import PollScheduler, ScheduledTwitchHandler, WEEK
+from twitch_api import TwitchHandlerInterface, TwitchStream
+
+DAY = 24 * 60 * 60
+
+
+def build_sessions(streamers: int, weeks: int, seed: int = 1) -> dict:
+    """
+    Build the (start, end) stream sessions of each simulated streamer
+
+    Args:
+        streamers (int): The number of streamers
+        weeks (int): The number of weeks to simulate
+        seed (int): The random seed
+
+    Returns:
+        dict: Sorted session lists keyed by username
+    """
+
+    generator = random.Random(seed)
+    sessions = {}
+
+    for index in range(streamers):
+        habit = generator.random()
+        hour = generator.randrange(24) * 3600
+        starts = []
+
+        if habit < 0.1:
+            starts = [day * DAY + hour for day in range(weeks * 7)]
+        elif habit < 0.4:
+            days = generator.sample(range(7), 2)
+            starts = [week * WEEK + day * DAY + hour for week in range(weeks) for day in days]
+        else:
+            starts = [generator.randrange(weeks * WEEK) for _ in range(max(1, weeks // 2))]
+
+        user_sessions = []
+        for start in sorted(starts):
+            start += generator.randrange(-900, 900)
+            if not user_sessions or start > user_sessions[-1][1]:
+                user_sessions.append((start, start + 3 * 3600))
+
+        sessions[f'streamer_{index}'] = user_sessions
+
+    return sessions
+
+
+class SimulatedTwitchHandler(TwitchHandlerInterface):
+    """Answers lookups from the simulated sessions at the simulated time"""
+
+    def __init__(self, sessions: dict, clock):
+        """
+        Initialize the handler
+
+        Args:
+            sessions (dict): Sorted session lists keyed by username
+            clock (Callable): Returns the simulated time
+        """
+
+        self.sessions = sessions
+        self.clock = clock
+
+    def get_stream(self, username: str):
+        """Grabs an individual stream object if passed streamer is live"""
+
+        return self.get_streams([username]).get(username)
+
+    def get_games(self, game_ids: list) -> dict:
+        """Games are not simulated"""
+
+        return {}
+
+    def get_streams(self, usernames: list) -> dict:
+        """Grabs the stream objects of every passed streamer who is live"""
+
+        now = self.clock()
+        streams = {}
+        for username in usernames:
+            for start, end in self.sessions[username]:
+                if start <= now < end:
+                    streams[username] = TwitchStream(
+                        0, 0, username, username, 0, '', 'live', '', 0,
+                        datetime.fromtimestamp(start, timezone.utc), 'en', '', False
+                    )
+                    break
+
+        return streams
+
+
+def simulate(sessions: dict, weeks: int, interval: int, staleness: int) -> tuple:
+    """
+    Poll the simulated streamers with the adaptive scheduler every interval
+
+    Args:
+        sessions (dict): Sorted session lists keyed by username
+        weeks (int): The number of weeks to simulate
+        interval (int): The poll interval in seconds
+        staleness (int): The max staleness of the adaptive scheduler in seconds
+
+    Returns:
+        tuple: The number of ticks, logins looked up and sorted detection latencies
+    """
+
+    now = [0.0]
+    scheduler = PollScheduler(interval, staleness, clock=lambda: now[0])
+    handler = ScheduledTwitchHandler(SimulatedTwitchHandler(sessions, lambda: now[0]), scheduler)
+    usernames = list(sessions)
+
+    detected = {}
+    ticks = 0
+    while now[0] < weeks * WEEK:
+        for username, stream in handler.get_streams(usernames).items():
+            start = stream.started_at.timestamp()
+            detected.setdefault((username, start), now[0] - start)
+
+        ticks += 1
+        now[0] += interval
+
+    return ticks, handler.requested, sorted(detected.values())
+
+
+def main(streamers: int = 200, weeks: int = 4, interval: int = 60, staleness: int = 600) -> None:
+    """
+    Run the simulation and print requests and detection latency for both strategies
+
+    Args:
+        streamers (int): The number of streamers
+        weeks (int): The number of weeks to simulate
+        interval (int): The poll interval in seconds
+        staleness (int): The max staleness of the adaptive scheduler in seconds
+
+    Returns:
+        None
+    """
+
+    sessions = build_sessions(streamers, weeks)
+    ticks, requested, latencies = simulate(sessions, weeks, interval, staleness)
+    go_lives = sum(len(user_sessions) for user_sessions in sessions.values())
+    fixed_requests = ticks * streamers
+
+    print(f'{streamers} streamers over {weeks} weeks, {go_lives} go lives')
+    print(f'fixed:    {fixed_requests} logins looked up, latency at most {interval}s')
+    print(
+        f'adaptive: {requested} logins looked up '
+        f'({100 - requested * 100 / fixed_requests:.1f}% saved), '
+        f'latency median {statistics.median(latencies):.0f}s '
+        f'p95 {latencies[int(len(latencies) * 0.95)]:.0f}s max {latencies[-1]:.0f}s, '
+        f'{go_lives - len(latencies)} missed'
+    )
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:5]])
@@ -0,0 +1,116 @@
+"""Records polling the local Helix emulator, then replays the recording deterministically
+
+The recording is made through the real twitch client against the emulator, or an
+existing recording is passed in. It is then replayed as fast as possible on a virtual
+clock through the poll scheduler, twice, to show the replays detect the same go lives
+with the same lookups however noisy the network was while recording.
+
+Usage: python benchmarks/record_replay.py [streamers] [seconds] [recording]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from emulator import HelixEmulator, Profile
+from replay import RecordingTwitchHandler, ReplayTwitchHandler
+from scheduler import PollScheduler, ScheduledTwitchHandler
+from settings import Settings
+from twitch_api import TwitchHandler
+
+POLL_INTERVAL = 1.0
+POLL_MAX_STALENESS = 5.0
+
+
+def record(path: str, streamers: int, seconds: int) -> list:
+    """
+    Poll every streamer on the emulator each interval, recording the traffic
+
+    Args:
+        path (str): The file to record to
+        streamers (int): The number of streamers
+        seconds (int): The seconds to record for
+
+    Returns:
+        list: The usernames polled
+    """
+
+    emulator = HelixEmulator(streamers, seconds - 2, Profile(min_session=POLL_MAX_STALENESS * 2))
+    emulator.start()
+    try:
+        settings = Settings(twitch_app_id='emulated', twitch_app_secret='emulated')
+        twitch_handler = RecordingTwitchHandler(TwitchHandler(settings), path)
+        started = time.monotonic()
+        while time.monotonic() - started < seconds:
+            twitch_handler.get_streams(emulator.logins)
+            time.sleep(POLL_INTERVAL)
+    finally:
+        emulator.stop()
+
+    return emulator.logins
+
+
+def replay(path: str, usernames: list) -> tuple:
+    """
+    Replay a recording through the poll scheduler on a virtual clock
+
+    Args:
+        path (str): The recording
+        usernames (list): The usernames to poll
+
+    Returns:
+        tuple: The first poll each streamer was found live, the lookups made and the
+            seconds taken
+    """
+
+    now = [0.0]
+    replay_handler = ReplayTwitchHandler(path, speed=0, clock=lambda: now[0])
+    scheduler = PollScheduler(POLL_INTERVAL, POLL_MAX_STALENESS, clock=lambda: now[0])
+    twitch_handler = ScheduledTwitchHandler(replay_handler, scheduler)
+
+    detected, lookups = {}, 0
+    started = time.perf_counter()
+    while now[0] <= replay_handler.duration:
+        lookups += len(scheduler.due(usernames))
+        for username in twitch_handler.get_streams(usernames):
+            detected.setdefault(username, now[0])
+        now[0] += POLL_INTERVAL
+
+    return detected, lookups, time.perf_counter() - started
+
+
+def main(streamers: int = 200, seconds: int = 20, path: str = None) -> None:
+    """
+    Record unless given a recording, then replay it twice
+
+    Args:
+        streamers (int): The number of streamers
+        seconds (int): The seconds to record for
+        path (str): An existing recording to replay
+
+    Returns:
+        None
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        if path is None:
+            path = os.path.join(directory, 'twitch.jsonl')
+            usernames = record(path, streamers, seconds)
+        else:
+            usernames = list(ReplayTwitchHandler(path, speed=0).timelines)
+
+        print(f'recording: {os.path.getsize(path) / 1024:.0f}KiB, {len(usernames)} streamers')
+        results = [replay(path, usernames) for _ in range(2)]
+
+    for index, (detected, lookups, taken) in enumerate(results):
+        print(f'replay {index + 1}: {len(detected)} found live, {lookups} lookups, '
+              f'{taken * 1000:.1f}ms')
+
+    print('replays identical' if results[0][:2] == results[1][:2] else 'replays differ')
+
+
+if __name__ == '__main__':
+    main(*[cast(argument) for cast, argument in zip((int, int, str), sys.argv[1:4])])
@@ -0,0 +1,85 @@
+"""Benchmarks loading and saving a 10k streamer datasource with each serializer
+
+Usage: python benchmarks/serializer.py [streamers] [repeats]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from serializers import JsonSerializer, OrjsonSerializer, orjson
+
+
+def build_contents(streamers: int) -> dict:
+    """
+    Build datasource contents with the given number of streamers, each with two roles
+
+    Args:
+        streamers (int): The number of streamers
+
+    Returns:
+        dict: The datasource contents
+    """
+
+    return {
+        'Streamers': [
+            {
+                'user_id': 100000000000000000 + index,
+                'username': f'streamer_{index}',
+                'roles': [
+                    {'role_id': 200000000000000000 + index, 'name': f'Role {index}'},
+                    {'role_id': 300000000000000000, 'name': 'Everyone Live'}
+                ]
+            }
+            for index in range(streamers)
+        ]
+    }
+
+
+def main(streamers: int = 10000, repeats: int = 20) -> None:
+    """
+    Run the benchmark and print the best time per operation
+
+    Args:
+        streamers (int): The number of streamers in the datasource
+        repeats (int): The number of times each operation is timed
+
+    Returns:
+        None
+    """
+
+    contents = build_contents(streamers)
+    serializers = [('json', JsonSerializer())]
+    if orjson is not None:
+        serializers.append(('orjson', OrjsonSerializer()))
+
+    print(f'{streamers} streamers, best of {repeats}')
+    print(f'{"serializer":<12}{"mode":<10}{"size (KB)":>12}{"save (ms)":>12}{"load (ms)":>12}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'streamers.json')
+
+        for name, serializer in serializers:
+            for pretty in (False, True):
+                def save(serializer=serializer, pretty=pretty):
+                    with open(path, 'wb') as datasource:
+                        datasource.write(serializer.dumps(contents, pretty=pretty))
+
+                def load(serializer=serializer):
+                    with open(path, 'rb') as datasource:
+                        return serializer.loads(datasource.read())
+
+                save_time = min(timeit.repeat(save, number=1, repeat=repeats))
+                load_time = min(timeit.repeat(load, number=1, repeat=repeats))
+                print(
+                    f'{name:<12}{"pretty" if pretty else "compact":<10}'
+                    f'{os.path.getsize(path) / 1024:>12.0f}'
+                    f'{save_time * 1000:>12.2f}{load_time * 1000:>12.2f}'
+                )
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:3]])
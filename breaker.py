@@ -0,0 +1,260 @@
+"""The breaker file for the announce twitch bot module"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Callable, Optional
+import contextvars
+import threading
+import time
+from settings import Settings, get_settings
+from twitch_api import TwitchHandlerInterface, TwitchStreamInterface, TwitchUnavailableException
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreakerTwitchHandler(TwitchHandlerInterface):
+    """
+    A twitch handler which stops waiting on twitch while it is slow or down
+
+    Every call is given up on after TWITCH_TIMEOUT. Once TWITCH_BREAKER_THRESHOLD calls in
+    a row have failed the circuit opens, and streams are answered straight away from the
+    last known state, marked stale, without calling twitch. After TWITCH_BREAKER_RESET
+    seconds a single probe is made on its own thread, half-open, which closes the circuit
+    if it succeeds or keeps it open for another TWITCH_BREAKER_RESET if it fails. Failed
+    calls are answered with the last known state too, so callers only see an error when
+    there is none.
+    """
+
+    def __init__(
+        self,
+        twitch_handler: TwitchHandlerInterface,
+        settings: Optional[Settings] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the handler with the circuit closed
+
+        Args:
+            twitch_handler (TwitchHandlerInterface): The twitch handler to protect
+            settings (Settings): The settings to use, defaults to the shared settings
+            clock (Callable): Returns the current time in seconds
+        """
+
+        settings = settings or get_settings()
+
+        self.twitch_handler = twitch_handler
+        self.threshold = settings.twitch_breaker_threshold
+        self.reset_timeout = settings.twitch_breaker_reset
+        self.timeout = settings.twitch_timeout
+        self.now = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.streams = None
+        self.probe = None
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='twitch')
+
+    def __call(self, method: Callable, argument):
+        """
+        Call the protected handler, giving up after the timeout
+
+        A call given up on keeps running in the background until twitch answers it. The
+        call runs in a copy of the current context so it stays in the caller's trace.
+
+        Args:
+            method (Callable): The method of the protected handler
+            argument: The argument to call it with
+
+        Returns:
+            The response of the call
+
+        Raises:
+            Exception: If the call failed or timed out
+        """
+
+        context = contextvars.copy_context()
+
+        return self.executor.submit(context.run, method, argument).result(timeout=self.timeout)
+
+    def __succeed(self, usernames: list, streams: dict) -> None:
+        """
+        Close the circuit and remember the streams answered as the last known state
+
+        Args:
+            usernames (list): The usernames looked up
+            streams (dict): The live streams keyed by lower case username
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.streams = self.streams or {}
+            for username in usernames:
+                self.streams.pop(username.lower(), None)
+
+            self.streams.update(streams)
+
+    def __fail(self) -> None:
+        """
+        Count a failed call, opening the circuit once there have been too many in a row
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= self.threshold:
+                self.state = OPEN
+                self.opened_at = self.now()
+
+    def __probe(self, usernames: list) -> None:
+        """
+        Call twitch once with the circuit half-open, closing or reopening it
+
+        The probe calls twitch on its own thread rather than in the pool, so it is not
+        queued behind calls still hanging there. The twitch handler's own request timeout
+        bounds how long it waits.
+
+        Args:
+            usernames (list): The usernames to look up
+
+        Returns:
+            None
+        """
+
+        try:
+            streams = self.twitch_handler.get_streams(usernames)
+        except Exception:  # pylint: disable=broad-except
+            with self.lock:
+                self.state = OPEN
+                self.opened_at = self.now()
+            return None
+
+        self.__succeed(usernames, streams)
+
+        return None
+
+    def __allow(self, usernames: list) -> bool:
+        """
+        Check if twitch may be called, starting a background probe when one is due
+
+        Args:
+            usernames (list): The usernames the probe looks up, no probe is made if empty
+
+        Returns:
+            bool: True if the circuit is closed, else false
+        """
+
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+
+            due = self.now() - self.opened_at >= self.reset_timeout
+            if self.state == OPEN and usernames and due:
+                self.state = HALF_OPEN
+                self.probe = threading.Thread(
+                    target=self.__probe, args=(list(usernames),), daemon=True
+                )
+                self.probe.start()
+
+            return False
+
+    def __stale(self, usernames: list) -> dict:
+        """
+        Get the last known streams of the streamers, marked stale
+
+        Args:
+            usernames (list): The usernames
+
+        Returns:
+            dict: The last known live streams keyed by lower case username
+
+        Raises:
+            TwitchUnavailableException: If twitch has never answered
+        """
+
+        with self.lock:
+            if self.streams is None:
+                raise TwitchUnavailableException('Twitch is unavailable')
+
+            return {
+                username.lower(): replace(self.streams[username.lower()], stale=True)
+                for username in usernames if username.lower() in self.streams
+            }
+
+    def get_stream(self, username: str) -> Optional[TwitchStreamInterface]:
+        """
+        Grabs an individual stream object if passed streamer is live
+
+        Args:
+            username (str): The username to check
+
+        Returns:
+            TwitchStreamInterface: If the stream is live, else none
+
+        Raises:
+            TwitchUnavailableException: If twitch is unavailable and has never answered
+        """
+
+        return self.get_streams([username]).get(username.lower())
+
+    def get_streams(self, usernames: list) -> dict:
+        """
+        Grabs the stream objects of every passed streamer who is live
+
+        Args:
+            usernames (list): The usernames to check
+
+        Returns:
+            dict: The live streams keyed by lower case username
+
+        Raises:
+            TwitchUnavailableException: If twitch is unavailable and has never answered
+        """
+
+        if not self.__allow(usernames):
+            return self.__stale(usernames)
+
+        try:
+            streams = self.__call(self.twitch_handler.get_streams, usernames)
+        except Exception:  # pylint: disable=broad-except
+            self.__fail()
+            return self.__stale(usernames)
+
+        self.__succeed(usernames, streams)
+
+        return streams
+
+    def get_games(self, game_ids: list) -> dict:
+        """
+        Grabs the games with the passed ids
+
+        Args:
+            game_ids (list): The game ids to look up
+
+        Returns:
+            dict: The games found keyed by game id as a string
+
+        Raises:
+            TwitchUnavailableException: If twitch is unavailable
+        """
+
+        if not self.__allow([]):
+            raise TwitchUnavailableException('Twitch is unavailable')
+
+        try:
+            games = self.__call(self.twitch_handler.get_games, game_ids)
+        except Exception as error:  # pylint: disable=broad-except
+            self.__fail()
+            raise TwitchUnavailableException('Twitch is unavailable') from error
+
+        with self.lock:
+            self.failures = 0
+
+        return games
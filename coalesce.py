@@ -0,0 +1,140 @@
+"""The coalesce file for the announce twitch bot module"""
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Optional
+import threading
+from twitch_api import TwitchHandlerInterface, TwitchStreamInterface
+
+
+class SingleFlightTwitchHandler(TwitchHandlerInterface):
+    """
+    A twitch handler which shares in-flight lookups between concurrent callers
+
+    A login or game already being looked up for another caller is not requested again,
+    the caller waits for that lookup and shares its result instead. Only the keys nobody
+    is looking up are requested, in one call. The counters hold the calls made, the keys
+    requested and the keys deduplicated, by kind.
+    """
+
+    def __init__(self, twitch_handler: TwitchHandlerInterface):
+        """
+        Initialize the handler
+
+        Args:
+            twitch_handler (TwitchHandlerInterface): The twitch handler to coalesce calls to
+        """
+
+        self.twitch_handler = twitch_handler
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.counters = Counter()
+
+    def __flight(self, kind: str, keys: dict, fetch: Callable[[list], dict]) -> dict:
+        """
+        Look the keys up, joining the lookups already in flight
+
+        Args:
+            kind (str): The kind of key, so logins and game ids never collide
+            keys (dict): The arguments to pass to fetch keyed by the key of their result
+            fetch (Callable): Looks up a list of arguments, returning results by key
+
+        Returns:
+            dict: The results found keyed by key
+
+        Raises:
+            Exception: If the lookup this caller made or joined failed
+        """
+
+        owned, joined = {}, {}
+        with self.lock:
+            for key in keys:
+                flight = self.flights.get((kind, key))
+                if flight is None:
+                    owned[key] = self.flights[(kind, key)] = Future()
+                else:
+                    joined[key] = flight
+
+            self.counters[f'{kind}_deduplicated'] += len(joined)
+            if owned:
+                self.counters[f'{kind}_calls'] += 1
+                self.counters[f'{kind}_requested'] += len(owned)
+
+        if owned:
+            try:
+                found = fetch([keys[key] for key in owned])
+            except Exception as error:
+                for flight in owned.values():
+                    flight.set_exception(error)
+                raise
+            else:
+                for key, flight in owned.items():
+                    flight.set_result(found.get(key))
+            finally:
+                self.__land(kind, owned)
+
+        results = {key: flight.result() for key, flight in {**owned, **joined}.items()}
+
+        return {key: result for key, result in results.items() if result is not None}
+
+    def __land(self, kind: str, flights: dict) -> None:
+        """
+        Remove finished flights so later lookups go to twitch again
+
+        Args:
+            kind (str): The kind of key
+            flights (dict): The flights keyed by key
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            for key in flights:
+                del self.flights[(kind, key)]
+
+    def get_stream(self, username: str) -> Optional[TwitchStreamInterface]:
+        """
+        Grabs an individual stream object if passed streamer is live
+
+        Args:
+            username (str): The username to check
+
+        Returns:
+            TwitchStreamInterface: If the stream is live, else none
+        """
+
+        return self.get_streams([username]).get(username.lower())
+
+    def get_streams(self, usernames: list) -> dict:
+        """
+        Grabs the stream objects of every passed streamer who is live
+
+        Args:
+            usernames (list): The usernames to check
+
+        Returns:
+            dict: The live streams keyed by lower case username
+        """
+
+        return self.__flight(
+            'streams',
+            {username.lower(): username for username in usernames},
+            self.twitch_handler.get_streams
+        )
+
+    def get_games(self, game_ids: list) -> dict:
+        """
+        Grabs the games with the passed ids
+
+        Args:
+            game_ids (list): The game ids to look up
+
+        Returns:
+            dict: The games found keyed by game id as a string
+        """
+
+        return self.__flight(
+            'games',
+            {str(game_id): str(game_id) for game_id in game_ids},
+            self.twitch_handler.get_games
+        )
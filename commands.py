@@ -1,11 +1,48 @@
 """The commands file of the announce twitch bot module"""
 
+from typing import Optional, Union
+import asyncio
+import contextvars
 import discord
 from discord.ext import commands
 from discord.utils import get
-from streamer import StreamerMapper
-from twitch_api import TwitchHandler
-from whitelist import JsonDatasourceHandler, NotFoundException
+from announcement import InvalidTemplateException, compile_template
+from streamer import Streamer, StreamerFilter, StreamerMapper
+from settings import Settings, get_settings
+from lag import LoopLagMonitor
+from offload import create_async_datasource_handler
+from reconcile import WhitelistReconciler
+from replay import create_twitch_handler
+from tracing import get_current_span, get_tracer
+from twitch_api import TwitchHandlerInterface, TwitchUnavailableException
+from watcher import DatasourceWatcher
+from whitelist import NotFoundException
+
+
+class LiveConverter(commands.Converter):
+    """
+    Converts the word live, used to list only the streamers live right now
+    """
+
+    async def convert(self, ctx, argument: str) -> str:
+        """
+        Convert the argument if it is the word live, ignoring case
+
+        Args:
+            ctx: Represents the :class:`.Context`
+            argument (str): The argument
+
+        Returns:
+            str: The word live
+
+        Raises:
+            commands.BadArgument: If the argument is any other text
+        """
+
+        if argument.lower() != 'live':
+            raise commands.BadArgument(f'"{argument}" is not live')
+
+        return 'live'
 
 
 class CommandsCog(commands.Cog):
@@ -13,15 +50,143 @@ class CommandsCog(commands.Cog):
     Commands which enable an admin to maintain the streamer whitelist
     """
 
-    def __init__(self, bot):
+    def __init__(self, bot, settings: Settings):
         """
         Initialize the command cog
 
         Args:
             bot: The discord bot
+            settings (Settings): The settings
         """
         self.bot = bot
-        self.datasource = JsonDatasourceHandler()
+        self.settings = settings
+        self.datasource = create_async_datasource_handler(settings)
+        self.twitch_handler = None
+        self.embeds = {}
+        self.watcher = DatasourceWatcher(self.datasource, settings.datasource_watch_interval)
+        self.watcher.add_listener(lambda: self.bot.dispatch('whitelist_change'))
+        self.watch_task = self.bot.loop.create_task(self.watcher.watch())
+        self.reconciler = WhitelistReconciler(self.datasource, settings.reconcile_delay)
+        self.lag_monitor = LoopLagMonitor(settings.loop_lag_interval, settings.loop_lag_threshold)
+        self.lag_task = self.bot.loop.create_task(self.lag_monitor.watch())
+
+    def cog_unload(self):
+        """Stop watching the datasource and the event loop when the cog is unloaded"""
+        self.watch_task.cancel()
+        self.lag_task.cancel()
+        self.lag_monitor.stop()
+        self.datasource.close()
+
+    async def cog_before_invoke(self, ctx) -> None:
+        """
+        Start the span tracing a command, the root of the spans of everything it calls
+
+        Args:
+            ctx: Represents the :class:`.Context`
+
+        Returns:
+            None
+        """
+
+        ctx.trace = get_tracer().start_span(
+            f'command.{ctx.command.name}', **{'discord.guild': ctx.guild.id if ctx.guild else 0}
+        )
+
+    async def cog_after_invoke(self, ctx) -> None:
+        """
+        End the span tracing a command
+
+        Args:
+            ctx: Represents the :class:`.Context`
+
+        Returns:
+            None
+        """
+
+        span, token = ctx.trace
+        if ctx.command_failed:
+            span.set_error('Command failed')
+        get_tracer().end_span(span, token)
+
+    def get_twitch_handler(self) -> TwitchHandlerInterface:
+        """
+        Get the twitch handler, authenticating with twitch on first use
+
+        Returns:
+            TwitchHandlerInterface: The twitch handler shared by every command
+        """
+
+        if self.twitch_handler is None:
+            self.twitch_handler = create_twitch_handler(self.settings)
+
+        return self.twitch_handler
+
+    def is_whitelist_guild(self, guild: discord.Guild) -> bool:
+        """
+        Check if the whitelist belongs to a guild, so its events may change the whitelist
+
+        The guild is DISCORD_GUILD, or the guild of the listen channel if that is unset.
+        Events of every other guild the bot is in are ignored.
+
+        Args:
+            guild (discord.Guild): The guild an event came from
+
+        Returns:
+            bool: True if the whitelist belongs to the guild, otherwise False
+        """
+
+        guild_id = self.settings.discord_guild
+        if guild_id is None:
+            channel = self.bot.get_channel(self.settings.discord_listen_channel)
+            guild_id = channel.guild.id if channel is not None else None
+
+        return guild is not None and guild.id == guild_id
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member) -> None:
+        """
+        Remove a streamer from the whitelist once they leave the guild
+
+        Args:
+            member (discord.Member): The member who left
+
+        Returns:
+            None
+        """
+
+        if self.is_whitelist_guild(member.guild):
+            self.reconciler.remove_member(member.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        """
+        Remove a deleted role from every streamer in the whitelist
+
+        Args:
+            role (discord.Role): The deleted role
+
+        Returns:
+            None
+        """
+
+        if self.is_whitelist_guild(role.guild):
+            self.reconciler.delete_role(role.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        """
+        Keep the name of a renamed role up to date in the whitelist
+
+        Args:
+            before (discord.Role): The role before the update
+            after (discord.Role): The role after the update
+
+        Returns:
+            None
+        """
+
+        if before.name != after.name and self.is_whitelist_guild(after.guild):
+            self.reconciler.rename_role(after.id, after.name)
 
     @commands.command(name='add_streamer', pass_context=True)
     @commands.has_permissions(administrator=True)
@@ -47,7 +212,7 @@ class CommandsCog(commands.Cog):
         """
 
         try:
-            self.datasource.add_streamer(user.id, username)
+            await self.datasource.add_streamer(user.id, username)
         except ValueError:
             await ctx.send(f"{user.mention} is already in the approved streamer list")
             return None
@@ -59,7 +224,7 @@ class CommandsCog(commands.Cog):
 
         for role in roles:
             try:
-                self.datasource.add_role_to_streamer(user.id, role.id, role.name)
+                await self.datasource.add_role_to_streamer(user.id, role.id, role.name)
             except ValueError:
                 continue
 
@@ -79,7 +244,7 @@ class CommandsCog(commands.Cog):
         """
 
         try:
-            self.datasource.delete_streamer(user.id)
+            await self.datasource.delete_streamer(user.id)
         except NotFoundException:
             await ctx.send(f"{user.mention} cannot be removed as they are not in the streamer list")
             return None
@@ -108,7 +273,7 @@ class CommandsCog(commands.Cog):
 
         for role in roles:
             try:
-                self.datasource.add_role_to_streamer(user.id, role.id, role.name)
+                await self.datasource.add_role_to_streamer(user.id, role.id, role.name)
             except ValueError:
                 continue
 
@@ -134,45 +299,286 @@ class CommandsCog(commands.Cog):
 
         for role in roles:
             try:
-                self.datasource.delete_role_from_streamer(user.id, role.id)
+                await self.datasource.delete_role_from_streamer(user.id, role.id)
             except ValueError:
                 continue
 
+    @commands.command(name='add_role_all', pass_context=True)
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def add_role_all(self, ctx, role: discord.Role, *users: discord.User) -> None:
+        """
+        Add a role to every streamer, or to the streamers passed, in a single write
+
+        Args:
+            ctx: Represents the :class:`.Context`
+            role (discord.Role): The role to add
+            *users (discord.User): The streamers, defaults to every streamer
+
+        Returns:
+            None
+        """
+
+        user_ids = [user.id for user in users] if users else None
+        added = await self.datasource.add_role_to_streamers(role.id, role.name, user_ids)
+        await ctx.send(f"{role.mention} has been added to {len(added)} streamers")
+
+    @commands.command(name='purge_role', pass_context=True)
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def purge_role(self, ctx, role: discord.Role) -> None:
+        """
+        Remove a role from every streamer holding it in a single write
+
+        Args:
+            ctx: Represents the :class:`.Context`
+            role (discord.Role): The role to remove
+
+        Returns:
+            None
+        """
+
+        removed = await self.datasource.delete_role_from_streamers(role.id)
+        await ctx.send(f"{role.mention} has been removed from {len(removed)} streamers")
+
+    @commands.command(name='set_announcement', pass_context=True)
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def set_announcement(
+        self,
+        ctx,
+        user: discord.User,
+        *,
+        template: Optional[str] = None
+    ) -> None:
+        """
+        Set the template a streamer is announced with, or the default again without one
+
+        The template is compiled first so a bad placeholder is reported straight away.
+
+        Args:
+            ctx: Represents the :class:`.Context`
+            user (discord.User): The streamer
+            template (str): The template, e.g. {mention} is live with {title} {url}
+
+        Returns:
+            None
+        """
+
+        if template is not None:
+            try:
+                compile_template(template)
+            except InvalidTemplateException as error:
+                await ctx.send(str(error))
+                return None
+
+        try:
+            await self.datasource.set_announcement(user.id, template)
+        except NotFoundException:
+            await ctx.send(f"{user.mention} is not in the streamer list")
+            return None
+
+        kind = "their own" if template is not None else "the default"
+        await ctx.send(f"{user.mention} will be announced with {kind} template")
+
+        return None
+
+    @commands.command(name='loop_lag', pass_context=True)
+    @commands.has_permissions(administrator=True)
+    @commands.guild_only()
+    async def loop_lag(self, ctx) -> None:
+        """
+        Shows how late the event loop has been running and where it last stalled
+
+        Args:
+            ctx: Represents the :class:`.Context`
+
+        Returns:
+            None
+        """
+
+        percentiles = self.lag_monitor.percentiles()
+        if not percentiles:
+            await ctx.send("The event loop has not been measured yet")
+            return None
+
+        lags = ', '.join(
+            f"{'max' if quantile == 100 else f'p{quantile}'} {lag * 1000:.0f}ms"
+            for quantile, lag in percentiles.items()
+        )
+        stalls = ''.join(
+            f"\n{stall.lag * 1000:.0f}ms in {stall.summary}" for stall in self.lag_monitor.stalls
+        )
+        await ctx.send(
+            f"Event loop lag over the last {len(self.lag_monitor.samples)} heartbeats: {lags}"
+            + (f"\nRecent stalls:{stalls}" if stalls else '')
+        )
+
+        return None
+
     @commands.command(name='list_streamers', pass_context=True)
     @commands.has_permissions(administrator=True)
     @commands.guild_only()
-    async def list_streamers(self, ctx) -> None:
+    async def list_streamers(
+        self,
+        ctx,
+        filters: commands.Greedy[Union[discord.Role, LiveConverter]],
+        *,
+        game: str = ''
+    ) -> None:
         """
-        Produces a list of all the streamers and their associated roles
+        Produces a list of the streamers and their associated roles
+
+        Passing live lists only the streamers live right now and roles list only their
+        holders. The rest of the text after them, e.g. Just Chatting, lists only the
+        streamers playing a game whose name contains it. Live state comes from one batched
+        lookup, so only the matching streamers have their user fetched and embed rendered.
+
+        The whitelist is read once as a snapshot, so the streamers listed are of one
+        version even if it is changed meanwhile.
+
+        The rendered embeds are cached per streamer against their entry in the whitelist
+        and the avatar of the user, so unchanged entries are sent again without fetching
+        the user or resolving their roles, whatever the filter or changes to the other
+        entries. Twitch is looked up off the event loop, and while it is unavailable the
+        streams last known are used. Streamers whose account no longer
+        exists are skipped and removed from the whitelist.
 
         Args:
             ctx: Represents the :class:`.Context`
+            filters (list): The roles and the word live, all streamers if none
+            game (str): The game name to look for, any game if empty
 
         Returns:
             None
         """
 
-        streamer_mapper = StreamerMapper(self.datasource, TwitchHandler())
-        streamers = streamer_mapper.map()
+        streamer_mapper = StreamerMapper(
+            self.datasource.datasource_handler,
+            self.get_twitch_handler(),
+            await self.datasource.get_snapshot()
+        )
+        try:
+            streamers = await self.bot.loop.run_in_executor(
+                None, contextvars.copy_context().run, streamer_mapper.map
+            )
+        except TwitchUnavailableException:
+            await ctx.send("Twitch is unavailable right now, please try again shortly")
+            return None
+
+        embeds = self.get_cached_embeds(streamers)
+        streamer_filter = StreamerFilter.from_arguments(tuple(filters), game)
+        streamers = [streamer for streamer in streamers if streamer_filter.matches(streamer)]
+        get_current_span().set_attribute('streamers.matched', len(streamers))
+        if not streamers:
+            await ctx.send("No streamers match")
+            return None
+
+        semaphore = asyncio.Semaphore(self.settings.discord_concurrency)
+
+        async def fetch_user(user_id: int) -> Optional[discord.User]:
+            async with semaphore:
+                try:
+                    return await self.bot.fetch_user(user_id)
+                except discord.NotFound:
+                    self.reconciler.remove_member(user_id)
+                    return None
+
+        missing = [streamer for streamer in streamers if streamer.id not in embeds]
+        with get_tracer().span('discord.fetch_users', **{'discord.users': len(missing)}):
+            users = await asyncio.gather(*[fetch_user(streamer.id) for streamer in missing])
+
+        for streamer, user in zip(missing, users):
+            if user is not None:
+                embed = self.render_embed(streamer, user, ctx.guild)
+                embeds[streamer.id] = (
+                    self.get_embed_key(streamer), str(user.avatar_url), embed.to_dict()
+                )
+
+        self.embeds = embeds
+
+        with get_tracer().span('discord.send', **{'discord.embeds': len(streamers)}):
+            for streamer in streamers:
+                if streamer.id in embeds:
+                    await ctx.send(embed=discord.Embed.from_dict(embeds[streamer.id][2]))
+
+        return None
+
+    @staticmethod
+    def get_embed_key(streamer: Streamer) -> tuple:
+        """
+        Get what the embed of a streamer is rendered from in the whitelist
+
+        Args:
+            streamer (Streamer): The streamer
+
+        Returns:
+            tuple: The username and the ids and names of the roles
+        """
+
+        return streamer.username, tuple((role.id, role.name) for role in streamer.roles)
+
+    def get_cached_embeds(self, streamers: list) -> dict:
+        """
+        Get the cached embeds still valid for the streamers
+
+        An embed is valid while the streamer's entry in the whitelist is unchanged and the
+        user is either not cached by discord or still has the same avatar. Entries of
+        streamers no longer whitelisted are left out.
+
+        Args:
+            streamers (list): The streamers
+
+        Returns:
+            dict: The cache entries keyed by user id
+        """
 
+        embeds = {}
         for streamer in streamers:
-            user = await self.bot.fetch_user(streamer.id)
-            embed = discord.Embed(
-                title=streamer.username,
-                description=f"You can follow {user.mention} on twitch at"
-                            f" https://twitch.tv/{streamer.username}"
-            )
-            embed.set_thumbnail(url=user.avatar_url)
-            role_list = "Subscribe to the following roles to be alerted when they're next live:\n "
+            cached = self.embeds.get(streamer.id)
+            if cached is None or cached[0] != self.get_embed_key(streamer):
+                continue
 
-            for role in streamer.roles:
-                role_tag = get(ctx.guild.roles, id=role.id)
+            user = self.bot.get_user(streamer.id)
+            if user is None or cached[1] == str(user.avatar_url):
+                embeds[streamer.id] = cached
+
+        return embeds
+
+    @staticmethod
+    def render_embed(streamer: Streamer, user: discord.User, guild: discord.Guild) -> discord.Embed:
+        """
+        Renders the embed listing a streamer and their associated roles
+
+        Roles which no longer exist in the guild are left out.
+
+        Args:
+            streamer (Streamer): The streamer
+            user (discord.User): The discord user of the streamer
+            guild (discord.Guild): The guild to resolve the roles in
+
+        Returns:
+            discord.Embed: The embed
+        """
+
+        embed = discord.Embed(
+            title=streamer.username,
+            description=f"You can follow {user.mention} on twitch at"
+                        f" https://twitch.tv/{streamer.username}"
+        )
+        embed.set_thumbnail(url=user.avatar_url)
+        role_list = "Subscribe to the following roles to be alerted when they're next live:\n "
+
+        for role in streamer.roles:
+            role_tag = get(guild.roles, id=role.id)
+            if role_tag is not None:
                 role_list += f"{role_tag.mention}, "
 
-            embed.add_field(name="Roles", value=role_list)
-            await ctx.send(embed=embed)
+        embed.add_field(name="Roles", value=role_list)
+
+        return embed
 
 
 def setup(bot):
     """Sets up the bot by adding the commands cog"""
-    bot.add_cog(CommandsCog(bot))
+    bot.add_cog(CommandsCog(bot, get_settings()))
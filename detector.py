@@ -0,0 +1,46 @@
+"""The detector file for the announce twitch bot module"""
+import re
+from streamer import StreamerRegistry
+
+# Twitch logins are 1 to 25 word characters, any other word may be a bare username
+MENTION_PATTERN = re.compile(r'twitch\.tv/(?P<link>\w{1,25})|(?P<name>\w+)', re.IGNORECASE)
+
+
+class LinkDetector:
+    """
+    Detects whitelisted streamers mentioned in messages, by twitch link or by username
+
+    A message is split into twitch links and words with one fixed regex, and each is
+    looked up in the registry's login index. The cost grows with the length of the
+    message only, however long the whitelist is, and nothing is rebuilt when the
+    whitelist changes.
+    """
+
+    def __init__(self, registry: StreamerRegistry):
+        """
+        Initialize the detector
+
+        Args:
+            registry (StreamerRegistry): The whitelisted streamers to detect
+        """
+
+        self.registry = registry
+
+    def find(self, text: str) -> list:
+        """
+        Find the whitelisted streamers mentioned in a message
+
+        Args:
+            text (str): The message
+
+        Returns:
+            list: The streamers mentioned, in order of first mention
+        """
+
+        streamers = {}
+        for link, name in MENTION_PATTERN.findall(text):
+            streamer = self.registry.match(link or name)
+            if streamer is not None:
+                streamers.setdefault(streamer.id, streamer)
+
+        return list(streamers.values())
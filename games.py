@@ -0,0 +1,140 @@
+"""The games file for the announce twitch bot module"""
+from typing import Optional
+import os
+import threading
+from twitch_api import TwitchGame, TwitchHandlerInterface, TwitchUnavailableException
+from serializers import SerializerInterface, get_serializer
+
+
+class GameCache:
+    """
+    Caches game metadata by game id so announcements can be enriched cheaply
+
+    Games rarely change, so once looked up they are kept for good and persisted to disk
+    between restarts. Ids which are missing are looked up together, so a burst of go lives
+    costs one request per 100 unknown games. Ids twitch does not know are remembered too
+    so they are not looked up again.
+    """
+
+    def __init__(
+        self,
+        twitch_handler: TwitchHandlerInterface,
+        path: Optional[str] = None,
+        serializer: Optional[SerializerInterface] = None
+    ):
+        """
+        Initialize the game cache
+
+        Args:
+            twitch_handler (TwitchHandlerInterface): The twitch handler to look games up with
+            path (str): The file to persist the games to, none to keep them in memory only
+            serializer (SerializerInterface): The serializer, defaults to the fastest available
+        """
+
+        self.twitch_handler = twitch_handler
+        self.path = path
+        self.serializer = serializer or get_serializer()
+        self.games = {}
+        self.unknown = set()
+        self.lock = threading.Lock()
+
+    def load(self) -> int:
+        """
+        Load the games persisted to disk into the cache
+
+        Returns:
+            int: The number of games loaded
+        """
+
+        if self.path is None or not os.path.exists(self.path):
+            return 0
+
+        with open(self.path, 'rb') as file:
+            games = self.serializer.loads(file.read())
+
+        with self.lock:
+            for game_id, game in games.items():
+                self.games[game_id] = TwitchGame(game_id, game['name'], game['box_art_url'])
+
+        return len(games)
+
+    def save(self) -> None:
+        """
+        Persist the cached games to disk, replacing the file atomically
+
+        Returns:
+            None
+        """
+
+        if self.path is None:
+            return None
+
+        contents = {
+            game_id: {'name': game.name, 'box_art_url': game.box_art_url}
+            for game_id, game in self.games.items()
+        }
+
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(self.serializer.dumps(contents))
+
+        os.replace(temporary, self.path)
+
+        return None
+
+    def get(self, game_ids: list) -> dict:
+        """
+        Get the games with the passed ids, looking up the ones not cached in one go
+
+        While twitch is unavailable only the cached games are returned, the others are
+        looked up again next time.
+
+        Args:
+            game_ids (list): The game ids, empty ids are ignored
+
+        Returns:
+            dict: The games found keyed by game id as a string
+        """
+
+        game_ids = {str(game_id) for game_id in game_ids if game_id}
+
+        with self.lock:
+            missing = sorted(game_ids - self.games.keys() - self.unknown)
+            if missing:
+                try:
+                    found = self.twitch_handler.get_games(missing)
+                except TwitchUnavailableException:
+                    return self.__cached(game_ids)
+
+                self.games.update(found)
+                self.unknown.update(set(missing) - found.keys())
+                if found:
+                    self.save()
+
+            return self.__cached(game_ids)
+
+    def __cached(self, game_ids: set) -> dict:
+        """
+        Get the cached games with the passed ids
+
+        Args:
+            game_ids (set): The game ids as strings
+
+        Returns:
+            dict: The games cached keyed by game id as a string
+        """
+
+        return {game_id: self.games[game_id] for game_id in game_ids if game_id in self.games}
+
+    def get_game(self, game_id) -> Optional[TwitchGame]:
+        """
+        Get a single game
+
+        Args:
+            game_id: The game id
+
+        Returns:
+            TwitchGame: The game, or none if twitch does not know it
+        """
+
+        return self.get([game_id]).get(str(game_id))
@@ -0,0 +1,249 @@
+"""The history file for the announce twitch bot module"""
+from array import array
+from typing import Optional
+import time
+from twitch_api import TwitchStreamInterface
+
+# Samples are kept as unsigned 32 bit integers, timestamps in seconds fit until 2106
+TYPECODE = 'I'
+MAXIMUM = 2 ** 32 - 1
+
+
+class RingBuffer:
+    """
+    A fixed capacity ring buffer of equally long integer columns
+
+    Each column is an array of unsigned 32 bit integers so no Python object is kept per
+    sample. The arrays grow as samples arrive and start overwriting the oldest samples
+    once the capacity has been reached.
+    """
+
+    def __init__(self, columns: tuple, capacity: int):
+        """
+        Initialize the ring buffer
+
+        Args:
+            columns (tuple): The names of the columns
+            capacity (int): The most samples to keep
+        """
+
+        self.capacity = capacity
+        self.data = {column: array(TYPECODE) for column in columns}
+        self.head = 0
+
+    def __len__(self) -> int:
+        """
+        Get the number of samples held
+
+        Returns:
+            int: The number of samples
+        """
+
+        return len(next(iter(self.data.values())))
+
+    def append(self, *values: int) -> None:
+        """
+        Append a sample, overwriting the oldest if the buffer is full
+
+        Args:
+            *values (int): One value per column, clamped into the unsigned 32 bit range
+
+        Returns:
+            None
+        """
+
+        full = len(self) >= self.capacity
+        for column, value in zip(self.data.values(), values):
+            value = min(max(int(value), 0), MAXIMUM)
+            if full:
+                column[self.head] = value
+            else:
+                column.append(value)
+
+        if full:
+            self.head = (self.head + 1) % self.capacity
+
+    def column(self, name: str) -> array:
+        """
+        Get a column in the order the samples were appended
+
+        Args:
+            name (str): The name of the column
+
+        Returns:
+            array: A copy of the column, oldest sample first
+        """
+
+        data = self.data[name]
+
+        return data[self.head:] + data[:self.head]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by the sample data
+
+        Returns:
+            int: The number of bytes
+        """
+
+        return sum(column.buffer_info()[1] * column.itemsize for column in self.data.values())
+
+
+class StreamHistory:
+    """
+    Records viewer counts and games of live streams and keeps a downsampled archive
+
+    While a stream is live every poll is kept as a sample. When it ends the samples are
+    downsampled into buckets of bucket_seconds holding the seconds covered, the average
+    and peak viewer count and the game, which are archived per streamer. The name of each
+    game seen is kept once so the history can be reported on by game.
+    """
+
+    SAMPLE_COLUMNS = ('timestamp', 'viewers', 'game_id')
+    ARCHIVE_COLUMNS = ('timestamp', 'seconds', 'average_viewers', 'peak_viewers', 'game_id')
+
+    def __init__(
+        self,
+        bucket_seconds: int = 900,
+        archive_capacity: int = 2688,
+        sample_capacity: int = 1440
+    ):
+        """
+        Initialize the history
+
+        Args:
+            bucket_seconds (int): The length of the archived buckets
+            archive_capacity (int): The most buckets archived per streamer
+            sample_capacity (int): The most samples kept per live stream
+        """
+
+        self.bucket_seconds = bucket_seconds
+        self.archive_capacity = archive_capacity
+        self.sample_capacity = sample_capacity
+        self.live = {}
+        self.archives = {}
+        self.game_names = {}
+
+    def record(self, username: str, stream: TwitchStreamInterface, at: Optional[float] = None):
+        """
+        Record a sample of a live stream
+
+        Args:
+            username (str): The username of the streamer
+            stream (TwitchStreamInterface): The live stream
+            at (float): When the sample was taken, defaults to now
+
+        Returns:
+            None
+        """
+
+        key = username.lower()
+        if key not in self.live:
+            self.live[key] = RingBuffer(self.SAMPLE_COLUMNS, self.sample_capacity)
+
+        game_id = int(stream.game_id or 0)
+        if game_id and game_id not in self.game_names:
+            self.game_names[game_id] = stream.game_name
+
+        self.live[key].append(time.time() if at is None else at, stream.viewer_count or 0, game_id)
+
+    def end(self, username: str, at: Optional[float] = None) -> None:
+        """
+        Downsample the samples of a stream which has ended into the archive
+
+        Args:
+            username (str): The username of the streamer
+            at (float): When the stream was seen to have ended, defaults to now
+
+        Returns:
+            None
+        """
+
+        samples = self.live.pop(username.lower(), None)
+        if samples is None or len(samples) == 0:
+            return None
+
+        key = username.lower()
+        if key not in self.archives:
+            self.archives[key] = RingBuffer(self.ARCHIVE_COLUMNS, self.archive_capacity)
+
+        for bucket in self.__downsample(samples, time.time() if at is None else at):
+            self.archives[key].append(*bucket)
+
+        return None
+
+    def __downsample(self, samples: RingBuffer, ended_at: float) -> list:
+        """
+        Downsample the samples of a stream into buckets
+
+        Args:
+            samples (RingBuffer): The samples of the stream
+            ended_at (float): When the stream was seen to have ended
+
+        Returns:
+            list: The start, seconds, average viewers, peak viewers and game id of each bucket
+        """
+
+        timestamps = samples.column('timestamp')
+        viewers = samples.column('viewers')
+        game_ids = samples.column('game_id')
+        ended_at = max(ended_at, timestamps[-1])
+
+        # Each bucket holds its start, seconds, viewer sum, sample count, peak and game id
+        buckets = []
+        for index, timestamp in enumerate(timestamps):
+            following = timestamps[index + 1] if index + 1 < len(timestamps) else ended_at
+            start = timestamp - timestamp % self.bucket_seconds
+
+            if not buckets or buckets[-1][0] != start:
+                buckets.append([start, 0, 0, 0, 0, 0])
+
+            bucket = buckets[-1]
+            bucket[1] += min(following - timestamp, self.bucket_seconds)
+            bucket[2] += viewers[index]
+            bucket[3] += 1
+            bucket[4] = max(bucket[4], viewers[index])
+            bucket[5] = game_ids[index]
+
+        return [
+            (start, seconds, round(viewer_sum / count), peak, game_id)
+            for start, seconds, viewer_sum, count, peak, game_id in buckets
+        ]
+
+    def archive(self, username: str) -> Optional[RingBuffer]:
+        """
+        Get the archived buckets of a streamer
+
+        Args:
+            username (str): The username of the streamer
+
+        Returns:
+            RingBuffer: The archive, or none if they have never been seen live
+        """
+
+        return self.archives.get(username.lower())
+
+    def samples(self, username: str) -> Optional[RingBuffer]:
+        """
+        Get the samples of the current stream of a streamer
+
+        Args:
+            username (str): The username of the streamer
+
+        Returns:
+            RingBuffer: The samples, or none if they are not live
+        """
+
+        return self.live.get(username.lower())
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by every sample and bucket held
+
+        Returns:
+            int: The number of bytes
+        """
+
+        return sum(buffer.nbytes for buffer in [*self.live.values(), *self.archives.values()])
@@ -0,0 +1,62 @@
+"""The journal file for the announce twitch bot module"""
+import os
+
+
+def load_changes(path: str, serializer) -> list:
+    """
+    Load the changes recorded in a journal, one serialized change per line
+
+    A partially written trailing line (e.g. from a crash mid append) is ignored.
+
+    Args:
+        path (str): The journal
+        serializer: The serializer the changes were written with
+
+    Returns:
+        list: The changes in the order they were made
+    """
+
+    if not os.path.isfile(path):
+        return []
+
+    changes = []
+    with open(path, 'rb') as journal:
+        for line in journal:
+            try:
+                changes.append(serializer.loads(line))
+            except ValueError:
+                break
+
+    return changes
+
+
+def append_change(path: str, line: bytes) -> None:
+    """
+    Append a serialized change to a journal
+
+    A partially written trailing line is cut off first, otherwise the change would be
+    glued onto it and lost along with every change after it when the journal is loaded.
+
+    Args:
+        path (str): The journal
+        line (bytes): The serialized change, ending in a newline
+
+    Returns:
+        None
+    """
+
+    with open(path, 'a+b') as journal:
+        end = journal.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(position - 4096, 0)
+            journal.seek(start)
+            newline = journal.read(position - start).rfind(b'\n')
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+
+        if position != end:
+            journal.truncate(position)
+        journal.write(line)
@@ -0,0 +1,196 @@
+"""The lag file for the announce twitch bot module"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class LoopStall:
+    """
+    Holds a stall of the event loop and the code it was stuck in
+    """
+    lag: float
+    summary: str
+    stack: str
+
+
+def summarize_stack(frames: traceback.StackSummary) -> str:
+    """
+    Summarize a stack sample by the frames of the bot's own code, outermost first
+
+    Args:
+        frames (traceback.StackSummary): The stack sample
+
+    Returns:
+        str: The frames, e.g. commands.py:128 add_streamer -> whitelist.py:300 compact
+    """
+
+    own = [
+        f"{os.path.relpath(frame.filename, ROOT)}:{frame.lineno} {frame.name}"
+        for frame in frames
+        if frame.filename.startswith(ROOT + os.sep)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    if not own and frames:
+        own = [f"{frames[-1].filename}:{frames[-1].lineno} {frames[-1].name}"]
+
+    return ' -> '.join(own)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs and samples the stack of whatever blocks it
+
+    A heartbeat sleeps for the interval and records how much later than that it woke up.
+    A watchdog thread checks the heartbeat meanwhile, and once it is overdue by the
+    threshold it samples the stack of the event loop thread, catching the blocking code
+    in the act. The stall is logged with that sample once the heartbeat runs again.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        capacity: int = 3000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the monitor
+
+        Args:
+            interval (float): The seconds between heartbeats
+            threshold (float): The lag in seconds from which a stall is reported
+            capacity (int): The number of lag samples kept for the percentiles
+            clock (Callable): The monotonic clock
+        """
+
+        self.interval = interval
+        self.threshold = threshold
+        self.now = clock
+        self.samples = deque(maxlen=capacity)
+        self.stalls = deque(maxlen=10)
+        self.beat = None
+        self.sample = None
+        self.thread_id = None
+        self.stopped = threading.Event()
+        self.watchdog = None
+
+    async def watch(self) -> None:
+        """
+        Beat every interval, with the watchdog running, until cancelled
+
+        Returns:
+            None
+        """
+
+        self.thread_id = threading.get_ident()
+        self.beat = self.now()
+        self.stopped.clear()
+        self.watchdog = threading.Thread(
+            target=self.__watch_loop, name='loop-watchdog', daemon=True
+        )
+        self.watchdog.start()
+
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                now = self.now()
+                self.record(now - self.beat - self.interval)
+                self.beat = now
+        finally:
+            self.stopped.set()
+
+    def __watch_loop(self) -> None:
+        """
+        Sample the stack of the event loop thread once per stall until stopped
+
+        Returns:
+            None
+        """
+
+        while not self.stopped.wait(self.threshold / 2):
+            beat = self.beat
+            if self.now() - beat - self.interval < self.threshold:
+                continue
+
+            if self.sample is not None and self.sample[0] == beat:
+                continue
+
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+            if frame is not None:
+                self.sample = (beat, traceback.extract_stack(frame))
+
+    def record(self, lag: float) -> Optional[LoopStall]:
+        """
+        Record the lag of a heartbeat, reporting a stall if it reached the threshold
+
+        Args:
+            lag (float): The seconds the heartbeat ran late
+
+        Returns:
+            LoopStall: The stall, or none if the lag was below the threshold
+        """
+
+        lag = max(lag, 0.0)
+        self.samples.append(lag)
+        if lag < self.threshold:
+            return None
+
+        frames = self.sample[1] if self.sample is not None and self.sample[0] == self.beat else None
+        stall = LoopStall(
+            lag,
+            summarize_stack(frames) if frames else 'not sampled',
+            ''.join(frames.format()) if frames else ''
+        )
+        self.stalls.append(stall)
+        logger.warning(
+            'Event loop blocked for %.0fms in %s\n%s', lag * 1000, stall.summary, stall.stack
+        )
+
+        return stall
+
+    def percentiles(self, quantiles: tuple = (50, 90, 99)) -> dict:
+        """
+        Get percentiles of the lag samples kept
+
+        Args:
+            quantiles (tuple): The percentiles to get
+
+        Returns:
+            dict: The lag in seconds keyed by percentile, with the maximum under 100, or
+                empty if nothing has been sampled yet
+        """
+
+        samples = sorted(self.samples)
+        if not samples:
+            return {}
+
+        result = {
+            quantile: samples[min(len(samples) - 1, int(len(samples) * quantile / 100))]
+            for quantile in quantiles
+        }
+        result[100] = samples[-1]
+
+        return result
+
+    def stop(self) -> None:
+        """
+        Stop the watchdog thread, the heartbeat stops once its task is cancelled
+
+        Returns:
+            None
+        """
+
+        self.stopped.set()
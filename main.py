@@ -1,29 +1,63 @@
 """The main file for the announce twitch bot module"""
 
-import os
-import discord
-from discord.ext import commands
-from dotenv import load_dotenv
+from settings import get_settings
 
 __version_info__ = ('0', '3', '0')
 __version__ = '.'.join(__version_info__)
 
-bot = commands.Bot(command_prefix="!", description='A bot for announcing twitch streamers')
-bot.load_extension('commands')
+
+def create_bot():
+    """
+    Creates the bot and loads its extensions
+
+    discord.py and the extensions are only imported here so that importing this module
+    (e.g. for its version) stays cheap. The members intent is requested, without which
+    discord sends no event when a member leaves.
+
+    Returns:
+        discord.ext.commands.Bot: The bot
+    """
+
+    # pylint: disable=import-outside-toplevel
+    import discord
+    from discord.ext import commands
+
+    intents = discord.Intents.default()
+    intents.members = True  # pylint: disable=assigning-non-slot
+    bot = commands.Bot(
+        command_prefix="!",
+        description='A bot for announcing twitch streamers',
+        intents=intents
+    )
+
+    @bot.event
+    async def on_ready():
+        """
+        Runs on bot on ready event
+
+        Returns:
+            None
+        """
+
+        game = discord.Game("Gevie is currently working on me.")
+        await bot.change_presence(status=discord.Status.idle, activity=game)
+
+    bot.load_extension('commands')
+    bot.load_extension('announcer')
+
+    return bot
 
 
-@bot.event
-async def on_ready():
+def main() -> None:
     """
-    Runs on bot on ready event
+    Runs the bot until it is stopped
 
     Returns:
         None
     """
 
-    game = discord.Game("Gevie is currently working on me.")
-    await bot.change_presence(status=discord.Status.idle, activity=game)
+    create_bot().run(get_settings().discord_token, bot=True, reconnect=True)
 
 
-load_dotenv()
-bot.run(os.getenv('DISCORD_TOKEN'), bot=True, reconnect=True)
+if __name__ == '__main__':
+    main()
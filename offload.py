@@ -0,0 +1,318 @@
+"""The offload file for the announce twitch bot module"""
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+import asyncio
+import contextvars
+from settings import Settings
+from snapshot import WhitelistSnapshot
+from whitelist import DatasourceHandlerInterface, create_datasource_handler
+
+
+class AsyncDatasourceHandlerInterface(ABC):
+    """The async datasource handler interface, for use from the event loop"""
+
+    @abstractmethod
+    async def add_role_to_streamer(self, user_id: int, role_id: int, name: str) -> None:
+        """Adds a role to a streamer in the whitelist"""
+
+    @abstractmethod
+    async def add_role_to_streamers(
+        self, role_id: int, name: str, user_ids: Optional[list] = None
+    ) -> list:
+        """Adds a role to many streamers in the whitelist in a single write"""
+
+    @abstractmethod
+    async def add_streamer(self, user_id: int, username: str) -> None:
+        """Adds a streamer to the whitelist"""
+
+    @abstractmethod
+    async def delete_role_from_streamer(self, user_id: int, role_id: int) -> None:
+        """Deletes a role from a streamer in the whitelist"""
+
+    @abstractmethod
+    async def delete_role_from_streamers(self, role_id: int) -> list:
+        """Deletes a role from every streamer in the whitelist in a single write"""
+
+    @abstractmethod
+    async def delete_streamer(self, user_id: int) -> None:
+        """Deletes a streamer from the whitelist"""
+
+    @abstractmethod
+    async def exists(self, user_id: int) -> bool:
+        """Check if a streamer exists in the whitelist"""
+
+    @abstractmethod
+    async def find(self, user_id: int) -> dict:
+        """Find a streamer in the whitelist via user id"""
+
+    @abstractmethod
+    async def get_role_members(self, role_id: int) -> set:
+        """Get the user ids of the streamers holding a role"""
+
+    @abstractmethod
+    async def get_snapshot(self) -> WhitelistSnapshot:
+        """Get the current version of the whitelist, which is never modified"""
+
+    @abstractmethod
+    async def reconcile(self, user_ids: list, role_ids: list, role_names: dict) -> int:
+        """Remove departed streamers and deleted roles and rename roles in a single write"""
+
+    @abstractmethod
+    async def refresh(self) -> bool:
+        """Reload the datasource if it has been changed by another process"""
+
+    @abstractmethod
+    async def set_announcement(self, user_id: int, template: Optional[str]) -> None:
+        """Set or clear the announcement template overriding the default for a streamer"""
+
+
+class ExecutorDatasourceHandler(AsyncDatasourceHandlerInterface):
+    """
+    Runs the disk work of a datasource handler on a bounded pool of threads
+
+    Every call is handed to the pool and awaited, so reading and parsing the whitelist or
+    appending to its journal never stalls the event loop, and at most workers calls run
+    at once. The wrapped handler is kept for code which already runs off the loop.
+    """
+
+    def __init__(self, datasource_handler: DatasourceHandlerInterface, workers: int = 2):
+        """
+        Initialize the handler
+
+        Args:
+            datasource_handler (DatasourceHandlerInterface): The handler doing the disk work
+            workers (int): The most calls to run at once
+        """
+
+        self.datasource_handler = datasource_handler
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='datasource')
+
+    async def __run(self, method: Callable, *args):
+        """
+        Run a method of the wrapped handler on the pool
+
+        The method runs in a copy of the current context so it stays in the caller's trace.
+
+        Args:
+            method (Callable): The method
+            *args: The arguments to call it with
+
+        Returns:
+            The result of the method, any exception it raises is raised here
+        """
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+
+        return await loop.run_in_executor(self.executor, partial(context.run, method, *args))
+
+    async def add_role_to_streamer(self, user_id: int, role_id: int, name: str) -> None:
+        """
+        Adds a role to a streamer in the whitelist
+
+        Args:
+            user_id (int): The user id
+            role_id (int): The role id
+            name (str): The role name
+
+        Returns:
+            None
+        """
+
+        return await self.__run(
+            self.datasource_handler.add_role_to_streamer, user_id, role_id, name
+        )
+
+    async def add_role_to_streamers(
+        self, role_id: int, name: str, user_ids: Optional[list] = None
+    ) -> list:
+        """
+        Adds a role to many streamers in the whitelist in a single write
+
+        Args:
+            role_id (int): The role id
+            name (str): The role name
+            user_ids (list): The user ids of the streamers, defaults to every streamer
+
+        Returns:
+            list: The user ids of the streamers the role was added to
+        """
+
+        return await self.__run(
+            self.datasource_handler.add_role_to_streamers, role_id, name, user_ids
+        )
+
+    async def add_streamer(self, user_id: int, username: str) -> None:
+        """
+        Adds a streamer to the whitelist
+
+        Args:
+            user_id (int): The user id
+            username (str): The twitch username
+
+        Returns:
+            None
+        """
+
+        return await self.__run(self.datasource_handler.add_streamer, user_id, username)
+
+    async def delete_role_from_streamer(self, user_id: int, role_id: int) -> None:
+        """
+        Deletes a role from a streamer in the whitelist
+
+        Args:
+            user_id (int): The user id
+            role_id (int): The role id
+
+        Returns:
+            None
+        """
+
+        return await self.__run(self.datasource_handler.delete_role_from_streamer, user_id, role_id)
+
+    async def delete_role_from_streamers(self, role_id: int) -> list:
+        """
+        Deletes a role from every streamer in the whitelist in a single write
+
+        Args:
+            role_id (int): The role id
+
+        Returns:
+            list: The user ids of the streamers the role was removed from
+        """
+
+        return await self.__run(self.datasource_handler.delete_role_from_streamers, role_id)
+
+    async def delete_streamer(self, user_id: int) -> None:
+        """
+        Deletes a streamer from the whitelist
+
+        Args:
+            user_id (int): The user id
+
+        Returns:
+            None
+        """
+
+        return await self.__run(self.datasource_handler.delete_streamer, user_id)
+
+    async def exists(self, user_id: int) -> bool:
+        """
+        Check if a streamer exists in the whitelist
+
+        Args:
+            user_id (int): The user id
+
+        Returns:
+            bool: True if found else false
+        """
+
+        return await self.__run(self.datasource_handler.exists, user_id)
+
+    async def find(self, user_id: int) -> dict:
+        """
+        Find a streamer in the whitelist via user id
+
+        Args:
+            user_id (int): The user id
+
+        Returns:
+            dict: The streamer details with associated role
+        """
+
+        return await self.__run(self.datasource_handler.find, user_id)
+
+    async def get_role_members(self, role_id: int) -> set:
+        """
+        Get the user ids of the streamers holding a role
+
+        Args:
+            role_id (int): The role id
+
+        Returns:
+            set: The user ids
+        """
+
+        return await self.__run(self.datasource_handler.get_role_members, role_id)
+
+    async def get_snapshot(self) -> WhitelistSnapshot:
+        """
+        Get the current version of the whitelist
+
+        Returns:
+            WhitelistSnapshot: The snapshot
+        """
+
+        return await self.__run(self.datasource_handler.get_snapshot)
+
+    async def reconcile(self, user_ids: list, role_ids: list, role_names: dict) -> int:
+        """
+        Remove departed streamers and deleted roles and rename roles in a single write
+
+        Args:
+            user_ids (list): The user ids of the streamers to remove
+            role_ids (list): The ids of the roles to remove from every streamer
+            role_names (dict): The new names of roles keyed by role id
+
+        Returns:
+            int: The number of changes made
+        """
+
+        return await self.__run(
+            self.datasource_handler.reconcile, user_ids, role_ids, role_names
+        )
+
+    async def refresh(self) -> bool:
+        """
+        Reload the datasource if it has been changed by another process
+
+        Returns:
+            bool: True if the datasource had changed and was reloaded, else false
+        """
+
+        return await self.__run(self.datasource_handler.refresh)
+
+    async def set_announcement(self, user_id: int, template: Optional[str]) -> None:
+        """
+        Set or clear the announcement template overriding the default for a streamer
+
+        Args:
+            user_id (int): The user id
+            template (str): The template, or none to use the default again
+
+        Returns:
+            None
+        """
+
+        return await self.__run(self.datasource_handler.set_announcement, user_id, template)
+
+    def close(self) -> None:
+        """
+        Stop the pool once the calls already made have finished
+
+        Returns:
+            None
+        """
+
+        self.executor.shutdown(wait=False)
+
+
+def create_async_datasource_handler(settings: Settings) -> ExecutorDatasourceHandler:
+    """
+    Create the datasource handler for the configured backend, for use from the event loop
+
+    Args:
+        settings (Settings): The settings
+
+    Returns:
+        ExecutorDatasourceHandler: The datasource handler
+
+    Raises:
+        ValueError: If the backend is not supported
+    """
+
+    return ExecutorDatasourceHandler(
+        create_datasource_handler(settings), settings.datasource_workers
+    )
@@ -0,0 +1,136 @@
+"""The reconcile file for the announce twitch bot module"""
+import asyncio
+import logging
+from offload import AsyncDatasourceHandlerInterface
+
+
+logger = logging.getLogger(__name__)
+
+
+class WhitelistReconciler:
+    """
+    Keeps the whitelist in step with the guild as members leave and roles change
+
+    Guild events are collected rather than written one by one. The first event of a burst
+    schedules a flush after the delay, and everything collected by then is reconciled in
+    a single write, so deleting a role held by hundreds of streamers or a wave of members
+    leaving costs one journal entry. Events of a failed write are kept and written with
+    the next flush.
+    """
+
+    def __init__(self, datasource_handler: AsyncDatasourceHandlerInterface, delay: float):
+        """
+        Initialize the reconciler
+
+        Args:
+            datasource_handler (AsyncDatasourceHandlerInterface): The whitelist to reconcile
+            delay (float): The seconds to collect events for before writing them
+        """
+
+        self.datasource_handler = datasource_handler
+        self.delay = delay
+        self.user_ids = set()
+        self.role_ids = set()
+        self.role_names = {}
+        self.flush_task = None
+
+    def remove_member(self, user_id: int) -> None:
+        """
+        Remove a streamer who has left the guild
+
+        Args:
+            user_id (int): The user id
+
+        Returns:
+            None
+        """
+
+        self.user_ids.add(user_id)
+        self.__schedule()
+
+    def delete_role(self, role_id: int) -> None:
+        """
+        Remove a role which has been deleted from every streamer
+
+        Args:
+            role_id (int): The role id
+
+        Returns:
+            None
+        """
+
+        self.role_ids.add(role_id)
+        self.role_names.pop(role_id, None)
+        self.__schedule()
+
+    def rename_role(self, role_id: int, name: str) -> None:
+        """
+        Rename a role which has been renamed on every streamer
+
+        Args:
+            role_id (int): The role id
+            name (str): The new name
+
+        Returns:
+            None
+        """
+
+        self.role_names[role_id] = name
+        self.__schedule()
+
+    def __schedule(self) -> None:
+        """
+        Schedule a flush after the delay unless one is already scheduled
+
+        Returns:
+            None
+        """
+
+        if self.flush_task is None:
+            self.flush_task = asyncio.get_running_loop().create_task(self.__flush_later())
+
+    async def __flush_later(self) -> None:
+        """
+        Flush once the delay has passed, trying again after the delay if the write fails
+
+        Returns:
+            None
+        """
+
+        await asyncio.sleep(self.delay)
+        self.flush_task = None
+        try:
+            await self.flush()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Failed to reconcile the whitelist, trying again')
+            self.__schedule()
+
+    async def flush(self) -> int:
+        """
+        Write every event collected to the whitelist in a single write
+
+        Events collected while writing are kept for the next flush. If the write fails the
+        events it held are put back, behind any collected meanwhile.
+
+        Returns:
+            int: The number of changes made
+        """
+
+        user_ids, role_ids, role_names = self.user_ids, self.role_ids, self.role_names
+        self.user_ids, self.role_ids, self.role_names = set(), set(), {}
+        if not (user_ids or role_ids or role_names):
+            return 0
+
+        try:
+            return await self.datasource_handler.reconcile(
+                sorted(user_ids), sorted(role_ids), role_names
+            )
+        except Exception:
+            self.user_ids |= user_ids
+            self.role_ids |= role_ids
+            self.role_names = {
+                role_id: name
+                for role_id, name in {**role_names, **self.role_names}.items()
+                if role_id not in self.role_ids
+            }
+            raise
@@ -0,0 +1,407 @@
+"""The replay file for the announce twitch bot module"""
+from bisect import bisect_right
+from dataclasses import asdict
+from datetime import datetime
+from typing import Callable, Optional
+import threading
+import time
+from breaker import CircuitBreakerTwitchHandler
+from coalesce import SingleFlightTwitchHandler
+from settings import Settings
+from twitch_api import (
+    TwitchGame,
+    TwitchHandler,
+    TwitchHandlerInterface,
+    TwitchStream,
+    TwitchStreamInterface
+)
+from serializers import SerializerInterface, get_serializer
+
+RECORDING_VERSION = 1
+
+
+def dump_stream(stream: TwitchStream) -> dict:
+    """
+    Convert a stream into a serializable dictionary
+
+    Args:
+        stream (TwitchStream): The stream
+
+    Returns:
+        dict: The stream
+    """
+
+    contents = asdict(stream)
+    if isinstance(stream.started_at, datetime):
+        contents['started_at'] = stream.started_at.isoformat()
+
+    return contents
+
+
+def load_stream(contents: dict) -> TwitchStream:
+    """
+    Convert a dictionary made by dump_stream back into a stream
+
+    Args:
+        contents (dict): The stream
+
+    Returns:
+        TwitchStream: The stream
+    """
+
+    if contents['started_at'] is not None:
+        contents = dict(contents, started_at=datetime.fromisoformat(contents['started_at']))
+
+    return TwitchStream(**contents)
+
+
+class RecordingTwitchHandler(TwitchHandlerInterface):
+    """
+    Passes calls through to a twitch handler, recording each response and its timing
+
+    The recording is one line per call holding the seconds since recording started, the
+    method, its argument, the seconds the call took and the response.
+    """
+
+    def __init__(
+        self,
+        twitch_handler: TwitchHandlerInterface,
+        path: str,
+        serializer: Optional[SerializerInterface] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the handler, starting a new recording
+
+        Args:
+            twitch_handler (TwitchHandlerInterface): The twitch handler to record
+            path (str): The file to record to, overwritten if it exists
+            serializer (SerializerInterface): The serializer, defaults to the fastest available
+            clock (Callable): Returns the current time in seconds
+        """
+
+        self.twitch_handler = twitch_handler
+        self.path = path
+        self.serializer = serializer or get_serializer()
+        self.now = clock
+        self.lock = threading.Lock()
+        self.started = self.now()
+
+        with open(self.path, 'wb') as recording:
+            recording.write(self.serializer.dumps({
+                'version': RECORDING_VERSION,
+                'started': time.time()
+            }) + b'\n')
+
+    def __record(self, method: str, argument, started: float, result: dict) -> None:
+        """
+        Append a call to the recording
+
+        Args:
+            method (str): The name of the method called
+            argument: The argument it was called with
+            started (float): The time the call started
+            result (dict): The serializable response
+
+        Returns:
+            None
+        """
+
+        entry = self.serializer.dumps({
+            'at': round(started - self.started, 6),
+            'method': method,
+            'argument': argument,
+            'seconds': round(self.now() - started, 6),
+            'result': result
+        })
+
+        with self.lock:
+            with open(self.path, 'ab') as recording:
+                recording.write(entry + b'\n')
+
+    def get_stream(self, username: str) -> Optional[TwitchStreamInterface]:
+        """
+        Grabs an individual stream object if passed streamer is live
+
+        Args:
+            username (str): The username to check
+
+        Returns:
+            TwitchStreamInterface: If the stream is live, else none
+        """
+
+        started = self.now()
+        stream = self.twitch_handler.get_stream(username)
+        result = None if stream is None else dump_stream(stream)
+        self.__record('get_stream', username, started, result)
+
+        return stream
+
+    def get_streams(self, usernames: list) -> dict:
+        """
+        Grabs the stream objects of every passed streamer who is live
+
+        Args:
+            usernames (list): The usernames to check
+
+        Returns:
+            dict: The live streams keyed by lower case username
+        """
+
+        started = self.now()
+        streams = self.twitch_handler.get_streams(usernames)
+        self.__record('get_streams', list(usernames), started, {
+            username: dump_stream(stream) for username, stream in streams.items()
+        })
+
+        return streams
+
+    def get_games(self, game_ids: list) -> dict:
+        """
+        Grabs the games with the passed ids
+
+        Args:
+            game_ids (list): The game ids to look up
+
+        Returns:
+            dict: The games found keyed by game id as a string
+        """
+
+        started = self.now()
+        games = self.twitch_handler.get_games(game_ids)
+        self.__record('get_games', [str(game_id) for game_id in game_ids], started, {
+            game_id: asdict(game) for game_id, game in games.items()
+        })
+
+        return games
+
+
+class ReplayTwitchHandler(TwitchHandlerInterface):
+    """
+    Serves the responses of a recording back, without touching the network
+
+    The recording is turned into a timeline per login, so calls are answered with the
+    state each streamer was recorded in at the current point of the replay however they
+    are batched. Each call takes the time recorded for the same method divided by the
+    speed, in the order they were recorded. A speed of 0 answers straight away.
+
+    The point of the replay follows the wall clock times the speed by default. Passing a
+    clock returning the seconds into the recording makes a replay fully deterministic.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 1.0,
+        clock: Optional[Callable[[], float]] = None,
+        serializer: Optional[SerializerInterface] = None
+    ):
+        """
+        Initialize the handler, loading the recording
+
+        Args:
+            path (str): The recording
+            speed (float): How many times faster than recorded to replay
+            clock (Callable): Returns the seconds into the recording, defaults to the wall
+                clock times the speed
+            serializer (SerializerInterface): The serializer, defaults to the fastest available
+
+        Raises:
+            ValueError: If the file is not a recording this version can replay
+        """
+
+        self.speed = speed
+        self.serializer = serializer or get_serializer()
+        self.timelines = {}
+        self.games = {}
+        self.seconds = {}
+        self.calls = {}
+        self.duration = 0.0
+
+        with open(path, 'rb') as recording:
+            header = self.serializer.loads(recording.readline())
+            if header.get('version') != RECORDING_VERSION:
+                raise ValueError(f'Unsupported recording version "{header.get("version")}"')
+
+            for line in recording:
+                self.__load_entry(self.serializer.loads(line))
+
+        self.timestamps = {}
+        for username, timeline in self.timelines.items():
+            timeline.sort(key=lambda state: state[0])
+            self.timestamps[username] = [state[0] for state in timeline]
+
+        self.started = time.monotonic()
+        self.now = clock or self.elapsed
+        self.lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        """
+        Get the seconds into the recording by the wall clock times the speed
+
+        Returns:
+            float: The seconds
+        """
+
+        return (time.monotonic() - self.started) * (self.speed or 1.0)
+
+    def __load_entry(self, entry: dict) -> None:
+        """
+        Add a recorded call to the timelines, games and timings
+
+        Args:
+            entry (dict): The recorded call
+
+        Returns:
+            None
+        """
+
+        method = entry['method']
+        self.seconds.setdefault(method, []).append(entry['seconds'])
+        self.duration = max(self.duration, entry['at'] + entry['seconds'])
+        at = entry['at'] + entry['seconds']
+
+        if method == 'get_games':
+            for game_id, game in entry['result'].items():
+                self.games[game_id] = TwitchGame(**game)
+            return None
+
+        if method == 'get_stream':
+            results = {entry['argument'].lower(): entry['result']}
+        else:
+            results = {username.lower(): None for username in entry['argument']}
+            results.update(entry['result'])
+
+        for username, stream in results.items():
+            self.timelines.setdefault(username, []).append(
+                (at, None if stream is None else load_stream(stream))
+            )
+
+        return None
+
+    def __wait(self, method: str) -> None:
+        """
+        Take as long as the next recorded call of the method took, divided by the speed
+
+        Args:
+            method (str): The name of the method
+
+        Returns:
+            None
+        """
+
+        timings = self.seconds.get(method)
+        if not self.speed or not timings:
+            return None
+
+        with self.lock:
+            call = self.calls.get(method, 0)
+            self.calls[method] = call + 1
+
+        time.sleep(timings[call % len(timings)] / self.speed)
+
+        return None
+
+    def __state(self, username: str, now: float) -> Optional[TwitchStreamInterface]:
+        """
+        Get the stream a streamer was last recorded with at a point of the replay
+
+        Args:
+            username (str): The username
+            now (float): The seconds into the recording
+
+        Returns:
+            TwitchStreamInterface: The stream, or none if they were offline or never recorded
+        """
+
+        timeline = self.timelines.get(username.lower())
+        if not timeline:
+            return None
+
+        index = bisect_right(self.timestamps[username.lower()], now)
+
+        return timeline[max(index - 1, 0)][1]
+
+    def get_stream(self, username: str) -> Optional[TwitchStreamInterface]:
+        """
+        Grabs an individual stream object if passed streamer is live
+
+        Args:
+            username (str): The username to check
+
+        Returns:
+            TwitchStreamInterface: If the stream is live, else none
+        """
+
+        self.__wait('get_stream')
+
+        return self.__state(username, self.now())
+
+    def get_streams(self, usernames: list) -> dict:
+        """
+        Grabs the stream objects of every passed streamer who is live
+
+        Args:
+            usernames (list): The usernames to check
+
+        Returns:
+            dict: The live streams keyed by lower case username
+        """
+
+        self.__wait('get_streams')
+        now = self.now()
+
+        streams = {}
+        for username in usernames:
+            stream = self.__state(username, now)
+            if stream is not None:
+                streams[username.lower()] = stream
+
+        return streams
+
+    def get_games(self, game_ids: list) -> dict:
+        """
+        Grabs the games with the passed ids
+
+        Args:
+            game_ids (list): The game ids to look up
+
+        Returns:
+            dict: The games found keyed by game id as a string
+        """
+
+        self.__wait('get_games')
+
+        return {
+            str(game_id): self.games[str(game_id)]
+            for game_id in game_ids if str(game_id) in self.games
+        }
+
+
+def create_twitch_handler(settings: Settings, part: Optional[int] = None) -> TwitchHandlerInterface:
+    """
+    Create the twitch handler, replaying or recording the traffic if configured to
+
+    Twitch itself is only called through a circuit breaker, and concurrent lookups of
+    the same logins or games share one call.
+
+    Args:
+        settings (Settings): The settings
+        part (int): The index of the worker process creating the handler, which records
+            to its own file
+
+    Returns:
+        TwitchHandlerInterface: The twitch handler
+    """
+
+    if settings.twitch_replay:
+        twitch_handler = ReplayTwitchHandler(settings.twitch_replay, settings.twitch_replay_speed)
+    else:
+        twitch_handler = TwitchHandler(settings)
+        if settings.twitch_record:
+            path = settings.twitch_record if part is None else f'{settings.twitch_record}.{part}'
+            twitch_handler = RecordingTwitchHandler(twitch_handler, path)
+
+        twitch_handler = CircuitBreakerTwitchHandler(twitch_handler, settings)
+
+    return SingleFlightTwitchHandler(twitch_handler)
@@ -0,0 +1,95 @@
+"""The roles file for the announce twitch bot module"""
+from typing import Optional
+
+
+class RoleIndex:
+    """
+    Maps each role id to the user ids of the streamers holding it
+
+    The index is built from the datasource contents, then kept up to date by applying
+    each change made to them, so finding the holders of a role never scans the streamers.
+    """
+
+    def __init__(self):
+        """Initialize the index, empty until loaded"""
+        self.members: Optional[dict] = None
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the index has been built
+
+        Returns:
+            bool: True if loaded, else false
+        """
+
+        return self.members is not None
+
+    def load(self, contents: dict) -> None:
+        """
+        Build the index from the datasource contents
+
+        Args:
+            contents (dict): The datasource contents
+
+        Returns:
+            None
+        """
+
+        self.members = {}
+        for streamer in contents['Streamers']:
+            for role in streamer['roles']:
+                self.members.setdefault(role['role_id'], set()).add(streamer['user_id'])
+
+    def clear(self) -> None:
+        """
+        Drop the index so it is built again from the next contents loaded
+
+        Returns:
+            None
+        """
+
+        self.members = None
+
+    def apply_change(self, change: dict) -> None:
+        """
+        Apply a change made to the datasource contents to the index
+
+        Args:
+            change (dict): The change, see JsonDatasourceHandler.apply_change for the ops
+
+        Returns:
+            None
+        """
+
+        operation = change['op']
+        if operation == 'batch':
+            for batched in change['changes']:
+                self.apply_change(batched)
+        elif operation == 'add_streamer':
+            for role in change['streamer']['roles']:
+                self.members.setdefault(role['role_id'], set()).add(change['streamer']['user_id'])
+        elif operation == 'delete_streamer':
+            for members in self.members.values():
+                members.discard(change['user_id'])
+        elif operation == 'add_role':
+            self.members.setdefault(change['role']['role_id'], set()).add(change['user_id'])
+        elif operation == 'delete_role':
+            self.members.get(change['role_id'], set()).discard(change['user_id'])
+        elif operation == 'add_role_all':
+            self.members.setdefault(change['role']['role_id'], set()).update(change['user_ids'])
+        elif operation == 'purge_role':
+            self.members.pop(change['role_id'], None)
+
+    def get(self, role_id: int) -> set:
+        """
+        Get the user ids of the streamers holding a role
+
+        Args:
+            role_id (int): The role id
+
+        Returns:
+            set: The user ids
+        """
+
+        return set(self.members.get(role_id, ()))
@@ -0,0 +1,246 @@
+"""The scheduler file for the announce twitch bot module"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+import time
+from twitch_api import TwitchHandlerInterface, TwitchStreamInterface
+
+WEEK = 7 * 24 * 60 * 60
+
+
+@dataclass
+class PollState:
+    """
+    Holds the polling state of a single streamer
+    """
+    go_live_times: deque
+    interval: float
+    next_poll: float = 0.0
+    last_polled: Optional[float] = None
+    stream: Optional[TwitchStreamInterface] = None
+
+
+class PollScheduler:
+    """
+    Decides which streamers are due to be polled, learning from their stream history
+
+    Streamers who are live, or who have gone live around this time of the week before,
+    are polled every min_interval. Everyone else is backed off exponentially, but never
+    polled less often than every max_staleness seconds.
+    """
+
+    # How many seconds either side of a past go live (in the week) counts as likely
+    window = 3600.0
+
+    # The number of go live times remembered per streamer
+    history_size = 50
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_staleness: float,
+        backoff: float = 2.0,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            min_interval (float): The seconds between polls of likely to be live streamers
+            max_staleness (float): The most seconds any streamer may go without a poll
+            backoff (float): The factor the interval of dormant streamers grows by per poll
+            clock (Callable): Returns the current time in seconds
+
+        Raises:
+            ValueError: If the minimum interval is not between 0 and the max staleness
+        """
+
+        if not 0 < min_interval <= max_staleness:
+            raise ValueError('The minimum interval must be between 0 and the max staleness')
+
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness
+        self.backoff = backoff
+        self.now = clock
+        self.states = {}
+
+    def __get_state(self, username: str) -> PollState:
+        """
+        Get the state of a streamer, creating it if they are new
+
+        Args:
+            username (str): The username
+
+        Returns:
+            PollState: The state
+        """
+
+        key = username.lower()
+        if key not in self.states:
+            self.states[key] = PollState(deque(maxlen=self.history_size), self.min_interval)
+
+        return self.states[key]
+
+    def due(self, usernames: list) -> list:
+        """
+        Filter the usernames down to the streamers who are due a poll
+
+        Args:
+            usernames (list): The usernames to consider
+
+        Returns:
+            list: The usernames which should be polled now
+        """
+
+        now = self.now()
+
+        return [username for username in usernames if self.__get_state(username).next_poll <= now]
+
+    def force(self, usernames: list) -> None:
+        """
+        Make the streamers due on the next call to due, e.g. when someone posts their link
+
+        Args:
+            usernames (list): The usernames
+
+        Returns:
+            None
+        """
+
+        for username in usernames:
+            self.__get_state(username).next_poll = 0.0
+
+    def likelihood(self, username: str, at: Optional[float] = None) -> float:
+        """
+        The share of the streamer's past go lives which were around this time of the week
+
+        Args:
+            username (str): The username
+            at (float): The time to check, defaults to now
+
+        Returns:
+            float: Between 0 and 1
+        """
+
+        state = self.__get_state(username)
+        if not state.go_live_times:
+            return 0.0
+
+        position = (self.now() if at is None else at) % WEEK
+        matches = 0
+        for go_live_time in state.go_live_times:
+            distance = abs(go_live_time % WEEK - position)
+            if min(distance, WEEK - distance) <= self.window:
+                matches += 1
+
+        return matches / len(state.go_live_times)
+
+    def record(self, username: str, stream: Optional[TwitchStreamInterface]) -> None:
+        """
+        Record the result of polling a streamer and schedule their next poll
+
+        Args:
+            username (str): The username
+            stream (TwitchStreamInterface): The live stream, or none if offline
+
+        Returns:
+            None
+        """
+
+        now = self.now()
+        state = self.__get_state(username)
+        was_live = state.stream is not None
+
+        if stream is not None and not was_live:
+            started_at = getattr(stream, 'started_at', None)
+            state.go_live_times.append(
+                started_at.timestamp() if isinstance(started_at, datetime) else now
+            )
+
+        if stream is not None or was_live or self.likelihood(username, now) > 0:
+            state.interval = self.min_interval
+        else:
+            state.interval = min(state.interval * self.backoff, self.max_staleness)
+
+        state.stream = stream
+        state.last_polled = now
+        state.next_poll = now + state.interval
+
+    def get_stream(self, username: str) -> Optional[TwitchStreamInterface]:
+        """
+        Get the stream seen the last time the streamer was polled
+
+        Args:
+            username (str): The username
+
+        Returns:
+            TwitchStreamInterface: The last known stream, or none if offline
+        """
+
+        return self.__get_state(username).stream
+
+
+@dataclass
+class ScheduledTwitchHandler(TwitchHandlerInterface):
+    """
+    A twitch handler which only looks up the streamers its scheduler says are due
+
+    Streamers who are not due are answered with their last known stream, which is at most
+    max_staleness seconds old.
+    """
+    twitch_handler: TwitchHandlerInterface
+    scheduler: PollScheduler
+    requested: int = field(default=0, init=False)
+
+    def get_stream(self, username: str) -> Optional[TwitchStreamInterface]:
+        """
+        Grabs an individual stream object if passed streamer is live
+
+        Args:
+            username (str): The username to check
+
+        Returns:
+            TwitchStreamInterface: If the stream is live, else none
+        """
+
+        return self.get_streams([username]).get(username.lower())
+
+    def get_streams(self, usernames: list) -> dict:
+        """
+        Grabs the stream objects of every passed streamer who is live
+
+        Args:
+            usernames (list): The usernames to check
+
+        Returns:
+            dict: The live streams keyed by lower case username
+        """
+
+        due = self.scheduler.due(usernames)
+        if due:
+            self.requested += len(due)
+            streams = self.twitch_handler.get_streams(due)
+            for username in due:
+                self.scheduler.record(username, streams.get(username.lower()))
+
+        streams = {}
+        for username in usernames:
+            stream = self.scheduler.get_stream(username)
+            if stream is not None:
+                streams[username.lower()] = stream
+
+        return streams
+
+    def get_games(self, game_ids: list) -> dict:
+        """
+        Grabs the games with the passed ids, games are not scheduled
+
+        Args:
+            game_ids (list): The game ids to look up
+
+        Returns:
+            dict: The games found keyed by game id as a string
+        """
+
+        return self.twitch_handler.get_games(game_ids)
@@ -0,0 +1,117 @@
+"""The serializers file for the announce twitch bot module"""
+from abc import ABC, abstractmethod
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class SerializerInterface(ABC):
+    """The datasource serializer interface"""
+
+    @abstractmethod
+    def dumps(self, contents: dict, pretty: bool = False) -> bytes:
+        """Serialize the contents to utf8 encoded json"""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> dict:
+        """Deserialize utf8 encoded json"""
+
+
+class JsonSerializer(SerializerInterface):
+    """
+    Serializes the datasource using the standard library json module
+    """
+
+    def dumps(self, contents: dict, pretty: bool = False) -> bytes:
+        """
+        Serialize the contents to utf8 encoded json
+
+        Args:
+            contents (dict): The contents to serialize
+            pretty (bool): Indent with tabs for humans rather than writing compactly
+
+        Returns:
+            bytes: The encoded json
+        """
+
+        if pretty:
+            return json.dumps(
+                contents,
+                ensure_ascii=False,
+                indent='\t',
+                separators=(',', ': ')
+            ).encode('utf8')
+
+        return json.dumps(contents, ensure_ascii=False, separators=(',', ':')).encode('utf8')
+
+    def loads(self, data: bytes) -> dict:
+        """
+        Deserialize utf8 encoded json
+
+        Args:
+            data (bytes): The encoded json
+
+        Returns:
+            dict: The decoded contents
+
+        Raises:
+            ValueError: If the data is not valid json
+        """
+
+        return json.loads(data)
+
+
+class OrjsonSerializer(SerializerInterface):
+    """
+    Serializes the datasource using orjson, which is several times faster than json
+
+    orjson can only indent with two spaces so pretty output differs from JsonSerializer,
+    both read each other's output.
+    """
+
+    def dumps(self, contents: dict, pretty: bool = False) -> bytes:
+        """
+        Serialize the contents to utf8 encoded json
+
+        Args:
+            contents (dict): The contents to serialize
+            pretty (bool): Indent for humans rather than writing compactly
+
+        Returns:
+            bytes: The encoded json
+        """
+
+        return orjson.dumps(contents, option=orjson.OPT_INDENT_2 if pretty else None)
+
+    def loads(self, data: bytes) -> dict:
+        """
+        Deserialize utf8 encoded json
+
+        Args:
+            data (bytes): The encoded json
+
+        Returns:
+            dict: The decoded contents
+
+        Raises:
+            ValueError: If the data is not valid json
+        """
+
+        return orjson.loads(data)
+
+
+def get_serializer() -> SerializerInterface:
+    """
+    Get the fastest serializer available
+
+    Returns:
+        SerializerInterface: OrjsonSerializer if orjson is installed, else JsonSerializer
+    """
+
+    if orjson is None:
+        return JsonSerializer()
+
+    return OrjsonSerializer()
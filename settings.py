@@ -0,0 +1,198 @@
+"""The settings file for the announce twitch bot module"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Mapping, Optional
+import os
+
+
+DATASOURCE_BACKENDS = ('json',)
+DATASOURCE_FORMATS = ('compact', 'pretty')
+POLL_MODES = ('inline', 'workers')
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Holds the configuration of the bot, read once from the environment
+
+    Besides the credentials and file locations this holds every performance knob so
+    they can be tuned without code changes.
+    """
+    discord_token: Optional[str] = None
+    discord_announce_channel: Optional[int] = None
+    discord_listen_channel: Optional[int] = None
+    discord_guild: Optional[int] = None
+    streamer_datasource: Optional[str] = None
+    game_cache: Optional[str] = None
+    template: Optional[str] = None
+    template_streamer: Optional[str] = None
+    template_role: Optional[str] = None
+    twitch_app_id: Optional[str] = None
+    twitch_app_secret: Optional[str] = None
+    twitch_record: Optional[str] = None
+    twitch_replay: Optional[str] = None
+    trace_file: Optional[str] = None
+    announcement_template: Optional[str] = None
+    datasource_backend: str = 'json'
+    datasource_format: str = 'pretty'
+    datasource_watch_interval: float = 5.0
+    datasource_workers: int = 2
+    reconcile_delay: float = 2.0
+    loop_lag_interval: float = 0.1
+    loop_lag_threshold: float = 0.25
+    journal_compact_threshold: int = 100
+    twitch_batch_size: int = 100
+    twitch_replay_speed: float = 1.0
+    twitch_timeout: float = 10.0
+    twitch_breaker_threshold: int = 3
+    twitch_breaker_reset: float = 30.0
+    discord_concurrency: int = 5
+    poll_interval: float = 60.0
+    poll_max_staleness: float = 600.0
+    poll_backoff: float = 2.0
+    poll_mode: str = 'inline'
+    poll_workers: int = 2
+    history_bucket_seconds: int = 900
+    history_capacity: int = 2688
+
+    def __post_init__(self):
+        """
+        Validate the settings
+
+        Raises:
+            ValueError: If a setting is out of range
+        """
+
+        checks = (
+            (
+                self.datasource_backend in DATASOURCE_BACKENDS,
+                f'DATASOURCE_BACKEND must be one of {", ".join(DATASOURCE_BACKENDS)}'
+            ),
+            (
+                self.datasource_format in DATASOURCE_FORMATS,
+                f'DATASOURCE_FORMAT must be one of {", ".join(DATASOURCE_FORMATS)}'
+            ),
+            (
+                self.datasource_watch_interval > 0,
+                'DATASOURCE_WATCH_INTERVAL must be greater than 0'
+            ),
+            (self.datasource_workers >= 1, 'DATASOURCE_WORKERS must be at least 1'),
+            (self.reconcile_delay >= 0, 'RECONCILE_DELAY must be at least 0'),
+            (self.loop_lag_interval > 0, 'LOOP_LAG_INTERVAL must be greater than 0'),
+            (self.loop_lag_threshold > 0, 'LOOP_LAG_THRESHOLD must be greater than 0'),
+            (self.journal_compact_threshold >= 1, 'JOURNAL_COMPACT_THRESHOLD must be at least 1'),
+            (1 <= self.twitch_batch_size <= 100, 'TWITCH_BATCH_SIZE must be between 1 and 100'),
+            (self.twitch_timeout > 0, 'TWITCH_TIMEOUT must be greater than 0'),
+            (self.twitch_breaker_threshold >= 1, 'TWITCH_BREAKER_THRESHOLD must be at least 1'),
+            (self.twitch_breaker_reset > 0, 'TWITCH_BREAKER_RESET must be greater than 0'),
+            (self.twitch_replay_speed >= 0, 'TWITCH_REPLAY_SPEED must be at least 0'),
+            (
+                self.twitch_record is None or self.twitch_replay is None,
+                'TWITCH_RECORD and TWITCH_REPLAY cannot both be set'
+            ),
+            (self.discord_concurrency >= 1, 'DISCORD_CONCURRENCY must be at least 1'),
+            (self.poll_interval > 0, 'POLL_INTERVAL must be greater than 0'),
+            (
+                self.poll_max_staleness >= self.poll_interval,
+                'POLL_MAX_STALENESS must be at least POLL_INTERVAL'
+            ),
+            (self.poll_backoff >= 1, 'POLL_BACKOFF must be at least 1'),
+            (self.poll_mode in POLL_MODES, f'POLL_MODE must be one of {", ".join(POLL_MODES)}'),
+            (self.poll_workers >= 1, 'POLL_WORKERS must be at least 1'),
+            (self.history_bucket_seconds >= 1, 'HISTORY_BUCKET_SECONDS must be at least 1'),
+            (self.history_capacity >= 1, 'HISTORY_CAPACITY must be at least 1')
+        )
+
+        for valid, message in checks:
+            if not valid:
+                raise ValueError(message)
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str]) -> 'Settings':
+        """
+        Build the settings from environment variables
+
+        Variables which are unset or empty keep their default.
+
+        Args:
+            environ (Mapping): The environment, usually os.environ
+
+        Returns:
+            Settings: The settings
+
+        Raises:
+            ValueError: If a variable cannot be cast to its type or is out of range
+        """
+
+        def get(name: str, cast=str, default=None):
+            value = environ.get(name)
+            if value is None or value == '':
+                return default
+
+            try:
+                return cast(value)
+            except ValueError as error:
+                raise ValueError(f'{name} must be of type {cast.__name__}') from error
+
+        return cls(
+            discord_token=get('DISCORD_TOKEN'),
+            discord_announce_channel=get('DISCORD_ANNOUNCE_CHANNEL', int),
+            discord_listen_channel=get('DISCORD_LISTEN_CHANNEL', int),
+            discord_guild=get('DISCORD_GUILD', int),
+            streamer_datasource=get('STREAMER_DATASOURCE'),
+            game_cache=get('GAME_CACHE'),
+            template=get('TEMPLATE'),
+            template_streamer=get('TEMPLATE_STREAMER'),
+            template_role=get('TEMPLATE_ROLE'),
+            twitch_app_id=get('TWITCH_APP_ID'),
+            twitch_app_secret=get('TWITCH_APP_SECRET'),
+            twitch_record=get('TWITCH_RECORD'),
+            twitch_replay=get('TWITCH_REPLAY'),
+            trace_file=get('TRACE_FILE'),
+            announcement_template=get('ANNOUNCEMENT_TEMPLATE'),
+            datasource_backend=get('DATASOURCE_BACKEND', default=cls.datasource_backend),
+            datasource_format=get('DATASOURCE_FORMAT', default=cls.datasource_format),
+            datasource_watch_interval=get(
+                'DATASOURCE_WATCH_INTERVAL', float, cls.datasource_watch_interval
+            ),
+            datasource_workers=get('DATASOURCE_WORKERS', int, cls.datasource_workers),
+            reconcile_delay=get('RECONCILE_DELAY', float, cls.reconcile_delay),
+            loop_lag_interval=get('LOOP_LAG_INTERVAL', float, cls.loop_lag_interval),
+            loop_lag_threshold=get('LOOP_LAG_THRESHOLD', float, cls.loop_lag_threshold),
+            journal_compact_threshold=get(
+                'JOURNAL_COMPACT_THRESHOLD', int, cls.journal_compact_threshold
+            ),
+            twitch_batch_size=get('TWITCH_BATCH_SIZE', int, cls.twitch_batch_size),
+            twitch_timeout=get('TWITCH_TIMEOUT', float, cls.twitch_timeout),
+            twitch_breaker_threshold=get(
+                'TWITCH_BREAKER_THRESHOLD', int, cls.twitch_breaker_threshold
+            ),
+            twitch_breaker_reset=get('TWITCH_BREAKER_RESET', float, cls.twitch_breaker_reset),
+            twitch_replay_speed=get('TWITCH_REPLAY_SPEED', float, cls.twitch_replay_speed),
+            discord_concurrency=get('DISCORD_CONCURRENCY', int, cls.discord_concurrency),
+            poll_interval=get('POLL_INTERVAL', float, cls.poll_interval),
+            poll_max_staleness=get('POLL_MAX_STALENESS', float, cls.poll_max_staleness),
+            poll_backoff=get('POLL_BACKOFF', float, cls.poll_backoff),
+            poll_mode=get('POLL_MODE', default=cls.poll_mode),
+            poll_workers=get('POLL_WORKERS', int, cls.poll_workers),
+            history_bucket_seconds=get(
+                'HISTORY_BUCKET_SECONDS', int, cls.history_bucket_seconds
+            ),
+            history_capacity=get('HISTORY_CAPACITY', int, cls.history_capacity)
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Get the settings shared by every module, loading the .env file on first use
+
+    Returns:
+        Settings: The settings
+    """
+
+    from dotenv import load_dotenv  # pylint: disable=import-outside-toplevel
+
+    load_dotenv()
+
+    return Settings.from_env(os.environ)
@@ -0,0 +1,44 @@
+"""The snapshot file for the announce twitch bot module"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class WhitelistSnapshot:
+    """
+    Holds a version of the whitelist which is never modified once taken
+
+    Writers do not change the contents of a snapshot, they derive the next version with
+    copy_for_change, so a reader holding a snapshot sees the same whitelist throughout
+    however many changes are made meanwhile.
+    """
+    revision: int
+    contents: dict
+
+    @property
+    def streamers(self) -> list:
+        """
+        Get the streamers in the snapshot
+
+        Returns:
+            list: The streamers as held in the datasource
+        """
+
+        return self.contents['Streamers']
+
+
+def copy_for_change(contents: dict) -> dict:
+    """
+    Copy the datasource contents so changes can be applied to the copy in place
+
+    Only the list of streamers is copied, every streamer is shared with the original
+    contents. Changes replace the streamers they modify rather than modify them, see
+    JsonDatasourceHandler.apply_change, so the original contents are left untouched.
+
+    Args:
+        contents (dict): The datasource contents
+
+    Returns:
+        dict: The copy to apply changes to
+    """
+
+    return dict(contents, Streamers=list(contents['Streamers']))
@@ -0,0 +1,194 @@
+"""The stats file for the announce twitch bot module"""
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy
+from history import StreamHistory
+
+
+@dataclass
+class StreamStats:
+    """
+    Holds the stream statistics of a streamer over a period
+    """
+    username: str
+    hours: float
+    average_viewers: float
+    peak_viewers: int
+    top_games: list = field(default_factory=list)
+
+
+@dataclass
+class HistoryColumns:
+    """
+    Holds the archived buckets of many streamers as flat numpy columns
+
+    The streamer column holds the index of the bucket's streamer in usernames.
+    """
+    usernames: list
+    streamer: numpy.ndarray
+    timestamp: numpy.ndarray
+    seconds: numpy.ndarray
+    average_viewers: numpy.ndarray
+    peak_viewers: numpy.ndarray
+    game_id: numpy.ndarray
+
+    @classmethod
+    def from_history(cls, history: StreamHistory, since: float = 0) -> 'HistoryColumns':
+        """
+        Gather the archived buckets from the history, keeping those from since onwards
+
+        The ring buffers are read in place, their order does not matter for aggregation.
+
+        Args:
+            history (StreamHistory): The history
+            since (float): The earliest bucket start to keep
+
+        Returns:
+            HistoryColumns: The columns
+        """
+
+        usernames = [username for username, archive in history.archives.items() if len(archive)]
+        columns = {name: [] for name in StreamHistory.ARCHIVE_COLUMNS}
+        lengths = []
+
+        for username in usernames:
+            data = history.archives[username].data
+            lengths.append(len(data['timestamp']))
+            for name in StreamHistory.ARCHIVE_COLUMNS:
+                columns[name].append(numpy.frombuffer(data[name], dtype=numpy.uint32))
+
+        streamer = numpy.repeat(numpy.arange(len(usernames)), lengths)
+        columns = {
+            name: numpy.concatenate(arrays) if arrays else numpy.empty(0, numpy.uint32)
+            for name, arrays in columns.items()
+        }
+
+        keep = columns['timestamp'] >= since
+        if not keep.all():
+            streamer = streamer[keep]
+            columns = {name: column[keep] for name, column in columns.items()}
+
+        return cls(usernames, streamer, *[columns[name] for name in StreamHistory.ARCHIVE_COLUMNS])
+
+    def aggregate(self) -> dict:
+        """
+        Aggregate the buckets per streamer
+
+        Returns:
+            dict: The hours streamed, time weighted average viewers and peak viewers per
+                streamer, each an array indexed like usernames
+        """
+
+        count = len(self.usernames)
+        seconds = numpy.bincount(self.streamer, weights=self.seconds, minlength=count)
+        viewer_seconds = numpy.bincount(
+            self.streamer,
+            weights=self.average_viewers.astype(numpy.float64) * self.seconds,
+            minlength=count
+        )
+        peak = numpy.zeros(count, dtype=numpy.uint32)
+        numpy.maximum.at(peak, self.streamer, self.peak_viewers)
+
+        return {
+            'hours': seconds / 3600,
+            'average_viewers': numpy.divide(
+                viewer_seconds,
+                seconds,
+                out=numpy.zeros(count),
+                where=seconds > 0
+            ),
+            'peak_viewers': peak
+        }
+
+    def top_games(self, index: int, game_names: dict, limit: int = 3) -> list:
+        """
+        Get the games a streamer streamed the most
+
+        Args:
+            index (int): The index of the streamer in usernames
+            game_names (dict): Game names keyed by game id
+            limit (int): The most games to return
+
+        Returns:
+            list: Tuples of game name and hours, most streamed first
+        """
+
+        mine = (self.streamer == index) & (self.game_id > 0)
+        game_ids, inverse = numpy.unique(self.game_id[mine], return_inverse=True)
+        seconds = numpy.bincount(inverse, weights=self.seconds[mine], minlength=len(game_ids))
+        order = numpy.argsort(-seconds, kind='stable')[:limit]
+
+        return [
+            (game_names.get(int(game_ids[position]), str(game_ids[position])),
+             float(seconds[position]) / 3600)
+            for position in order
+        ]
+
+
+def leaderboard(
+    history: StreamHistory,
+    since: float = 0,
+    limit: int = 10,
+    key: str = 'average_viewers'
+) -> list:
+    """
+    Rank the streamers in the history
+
+    Args:
+        history (StreamHistory): The history
+        since (float): Only count buckets from this time onwards
+        limit (int): The most streamers to return
+        key (str): The statistic to rank by, hours, average_viewers or peak_viewers
+
+    Returns:
+        list: The stream stats of the top streamers, best first
+    """
+
+    columns = HistoryColumns.from_history(history, since)
+    totals = columns.aggregate()
+    order = numpy.argsort(-totals[key].astype(numpy.float64), kind='stable')
+    order = order[totals['hours'][order] > 0][:limit]
+
+    return [
+        StreamStats(
+            columns.usernames[index],
+            float(totals['hours'][index]),
+            float(totals['average_viewers'][index]),
+            int(totals['peak_viewers'][index])
+        )
+        for index in order
+    ]
+
+
+def stream_stats(history: StreamHistory, username: str, since: float = 0) -> Optional[StreamStats]:
+    """
+    Get the stream stats of a single streamer including their top games
+
+    Args:
+        history (StreamHistory): The history
+        username (str): The username of the streamer
+        since (float): Only count buckets from this time onwards
+
+    Returns:
+        StreamStats: The stats, or none if they have not streamed since then
+    """
+
+    archive = history.archive(username)
+    if archive is None:
+        return None
+
+    single = StreamHistory()
+    single.archives[username.lower()] = archive
+    columns = HistoryColumns.from_history(single, since)
+    totals = columns.aggregate()
+
+    if not columns.usernames or totals['hours'][0] == 0:
+        return None
+
+    return StreamStats(
+        columns.usernames[0],
+        float(totals['hours'][0]),
+        float(totals['average_viewers'][0]),
+        int(totals['peak_viewers'][0]),
+        columns.top_games(0, history.game_names)
+    )
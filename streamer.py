@@ -2,10 +2,27 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional
+import threading
+from snapshot import WhitelistSnapshot
+from tracing import get_current_span, traced
 from twitch_api import TwitchStreamInterface, TwitchHandlerInterface
 from whitelist import DatasourceHandlerInterface
 
 
+def normalize_login(username: str) -> str:
+    """
+    Normalize a twitch username for matching, twitch logins are case insensitive
+
+    Args:
+        username (str): The username as entered or displayed
+
+    Returns:
+        str: The normalized login
+    """
+
+    return username.strip().lower()
+
+
 class StreamerInterface(ABC):
     """
     The streamer interface
@@ -57,6 +74,7 @@ class Streamer(StreamerInterface):
     username: str
     roles: list
     twitch_stream: Optional[TwitchStreamInterface] = None
+    announcement: Optional[str] = None
 
     def is_match(self, username) -> bool:
         """
@@ -69,7 +87,65 @@ class Streamer(StreamerInterface):
             bool: True if match, else false
         """
 
-        return self.username == username
+        return normalize_login(self.username) == normalize_login(username)
+
+
+@dataclass(frozen=True)
+class StreamerFilter:
+    """
+    Selects the streamers to list by live state, role and game
+
+    A streamer matches when they are live if live is set, hold any of the roles if there
+    are role ids, and are playing a game whose name contains the game if there is one.
+    Filtering by game implies live.
+    """
+    live: bool = False
+    role_ids: frozenset = frozenset()
+    game: str = ''
+
+    @classmethod
+    def from_arguments(cls, arguments: tuple, game: str = '') -> 'StreamerFilter':
+        """
+        Build the filter from command arguments
+
+        The word live selects live streamers and roles select their holders.
+
+        Args:
+            arguments (tuple): Roles and the word live, as converted by the command
+            game (str): The name, or part of the name, of the game to look for
+
+        Returns:
+            StreamerFilter: The filter
+        """
+
+        live, role_ids = False, set()
+        for argument in arguments:
+            if isinstance(argument, str):
+                live = live or argument.lower() == 'live'
+            else:
+                role_ids.add(argument.id)
+
+        return cls(live, frozenset(role_ids), game.strip().strip('"').lower())
+
+    def matches(self, streamer: Streamer) -> bool:
+        """
+        Checks if the streamer is selected by the filter
+
+        Args:
+            streamer (Streamer): The streamer, with their stream if live
+
+        Returns:
+            bool: True if selected, else false
+        """
+
+        stream = streamer.twitch_stream
+        if (self.live or self.game) and stream is None:
+            return False
+
+        if self.role_ids and not any(role.id in self.role_ids for role in streamer.roles):
+            return False
+
+        return not self.game or self.game in stream.game_name.lower()
 
 
 @dataclass
@@ -101,27 +177,322 @@ class StreamerMapper(MapperInterface):
     """
     datasource_handler: DatasourceHandlerInterface
     twitch_handler: TwitchHandlerInterface
+    snapshot: Optional[WhitelistSnapshot] = None
 
+    @traced('streamer.map')
     def map(self) -> list:
         """
         Map streamers from the datasource into objects
 
+        The live streams of every streamer are looked up in one batched call. The
+        streamers are those of the snapshot if one was given, else the current contents.
+
         Returns:
             list: A list of streamer objects
         """
 
-        data = self.datasource_handler.get_contents()
+        data = self.snapshot.contents if self.snapshot else self.datasource_handler.get_contents()
+        get_current_span().set_attribute('whitelist.size', len(data['Streamers']))
+        twitch_streams = self.twitch_handler.get_streams(
+            [streamer['username'] for streamer in data['Streamers']]
+        )
 
         streamers = []
         for streamer in data['Streamers']:
-            twitch_stream = self.twitch_handler.get_stream(streamer['username'])
-
             roles = RoleMapper(streamer['roles']).map()
             streamers.append(Streamer(
                 int(streamer['user_id']),
                 streamer['username'],
                 roles,
-                twitch_stream
+                twitch_streams.get(streamer['username'].lower()),
+                streamer.get('announcement')
             ))
 
         return streamers
+
+
+class StreamerRegistry:
+    """
+    Indexes the whitelisted streamers by login and twitch user id for O(1) matching
+
+    The registry listens to the datasource and applies each change as it is made, so the
+    indexes are never rebuilt for a single mutation. Only when the datasource is reloaded
+    because another process changed it are they rebuilt from the new contents. Twitch
+    user ids are not kept in the whitelist, they are learned from the streams observed.
+
+    Changes may be applied from other threads than the readers. A reload swaps in whole
+    new indexes, and the roles of an indexed streamer are replaced rather than modified,
+    so a streamer or index held by a reader is never seen half changed.
+    """
+
+    def __init__(self, datasource_handler: DatasourceHandlerInterface):
+        """
+        Initialize the registry and index the current whitelist
+
+        Args:
+            datasource_handler (DatasourceHandlerInterface): The whitelist to index
+        """
+
+        self.lock = threading.Lock()
+        self.by_user_id = {}
+        self.by_login = {}
+        self.by_twitch_id = {}
+        self.twitch_ids = {}
+        datasource_handler.add_change_listener(self.apply_change)
+        self.load(datasource_handler.get_contents())
+
+    def __len__(self) -> int:
+        """
+        Get the number of streamers indexed
+
+        Returns:
+            int: The number of streamers
+        """
+
+        return len(self.by_user_id)
+
+    def load(self, contents: dict) -> None:
+        """
+        Rebuild the indexes from the datasource contents
+
+        Twitch user ids already learned are kept for logins which are still whitelisted.
+
+        Args:
+            contents (dict): The datasource contents
+
+        Returns:
+            None
+        """
+
+        streamers = [self.create_streamer(data) for data in contents['Streamers']]
+
+        with self.lock:
+            by_user_id, by_login, by_twitch_id = {}, {}, {}
+            for streamer in streamers:
+                if streamer.id in by_user_id:
+                    continue
+
+                login = normalize_login(streamer.username)
+                by_user_id[streamer.id] = streamer
+                by_login[login] = streamer
+                if login in self.twitch_ids:
+                    by_twitch_id[self.twitch_ids[login]] = streamer
+
+            self.by_user_id, self.by_login, self.by_twitch_id = by_user_id, by_login, by_twitch_id
+
+    def apply_change(self, change: dict) -> None:
+        """
+        Apply a change made to the whitelist to the indexes
+
+        Args:
+            change (dict): The change, see DatasourceHandlerInterface.add_change_listener
+
+        Returns:
+            None
+        """
+
+        if change['op'] == 'reload':
+            self.load(change['contents'])
+            return None
+
+        if change['op'] == 'batch':
+            for batched in change['changes']:
+                self.apply_change(batched)
+            return None
+
+        with self.lock:
+            if change['op'] == 'add_streamer':
+                self.__add(change['streamer'])
+                return None
+
+            if change['op'] in ('add_role_all', 'purge_role', 'rename_role'):
+                self.__apply_bulk_change(change)
+                return None
+
+            streamer = self.by_user_id.get(int(change['user_id']))
+            if streamer is None:
+                return None
+
+            if change['op'] == 'delete_streamer':
+                self.__remove(streamer)
+            elif change['op'] == 'add_role':
+                role = Role(int(change['role']['role_id']), change['role']['name'])
+                if role.id not in [existing.id for existing in streamer.roles]:
+                    streamer.roles = streamer.roles + [role]
+            elif change['op'] == 'delete_role':
+                streamer.roles = [
+                    role for role in streamer.roles if role.id != int(change['role_id'])
+                ]
+            elif change['op'] == 'set_announcement':
+                streamer.announcement = change['template']
+
+        return None
+
+    def __apply_bulk_change(self, change: dict) -> None:
+        """
+        Apply a change spanning many streamers to the indexes, the lock must be held
+
+        Args:
+            change (dict): The add_role_all, purge_role or rename_role change
+
+        Returns:
+            None
+        """
+
+        if change['op'] == 'rename_role':
+            for streamer in self.by_user_id.values():
+                if int(change['role_id']) in [role.id for role in streamer.roles]:
+                    streamer.roles = [
+                        Role(role.id, change['name']) if role.id == int(change['role_id']) else role
+                        for role in streamer.roles
+                    ]
+            return None
+
+        if change['op'] == 'purge_role':
+            for streamer in self.by_user_id.values():
+                streamer.roles = [
+                    role for role in streamer.roles if role.id != int(change['role_id'])
+                ]
+            return None
+
+        role_id = int(change['role']['role_id'])
+        for user_id in change['user_ids']:
+            streamer = self.by_user_id.get(int(user_id))
+            if streamer is not None and role_id not in [role.id for role in streamer.roles]:
+                streamer.roles = streamer.roles + [Role(role_id, change['role']['name'])]
+
+        return None
+
+    @staticmethod
+    def create_streamer(data: dict) -> Streamer:
+        """
+        Create a streamer from the datasource, without a stream
+
+        Args:
+            data (dict): The streamer as held in the datasource
+
+        Returns:
+            Streamer: The streamer
+        """
+
+        return Streamer(
+            int(data['user_id']),
+            data['username'],
+            RoleMapper(data['roles']).map(),
+            announcement=data.get('announcement')
+        )
+
+    def __add(self, data: dict) -> None:
+        """
+        Index a streamer from the datasource, the lock must be held
+
+        Args:
+            data (dict): The streamer as held in the datasource
+
+        Returns:
+            None
+        """
+
+        streamer = self.create_streamer(data)
+        if streamer.id in self.by_user_id:
+            return None
+
+        login = normalize_login(streamer.username)
+        self.by_user_id[streamer.id] = streamer
+        self.by_login[login] = streamer
+        if login in self.twitch_ids:
+            self.by_twitch_id[self.twitch_ids[login]] = streamer
+
+        return None
+
+    def __remove(self, streamer: Streamer) -> None:
+        """
+        Remove a streamer from the indexes, the lock must be held
+
+        Args:
+            streamer (Streamer): The indexed streamer
+
+        Returns:
+            None
+        """
+
+        login = normalize_login(streamer.username)
+        del self.by_user_id[streamer.id]
+        if self.by_login.get(login) is streamer:
+            del self.by_login[login]
+
+        twitch_id = self.twitch_ids.pop(login, None)
+        if twitch_id is not None and self.by_twitch_id.get(twitch_id) is streamer:
+            del self.by_twitch_id[twitch_id]
+
+    def get_logins(self) -> list:
+        """
+        Get the normalized logins of every streamer indexed
+
+        Returns:
+            list: The logins
+        """
+
+        with self.lock:
+            return list(self.by_login)
+
+    def observe(self, stream: TwitchStreamInterface) -> Optional[Streamer]:
+        """
+        Learn the twitch user id of the streamer of a stream
+
+        Args:
+            stream (TwitchStreamInterface): A stream returned by twitch
+
+        Returns:
+            Streamer: The matching streamer, or none if they are not whitelisted
+        """
+
+        login = normalize_login(stream.user_login)
+        twitch_id = int(stream.user_id)
+
+        with self.lock:
+            self.twitch_ids[login] = twitch_id
+            streamer = self.by_login.get(login)
+            if streamer is not None:
+                self.by_twitch_id[twitch_id] = streamer
+
+        return streamer
+
+    def get(self, user_id: int) -> Optional[Streamer]:
+        """
+        Get a streamer by their discord user id
+
+        Args:
+            user_id (int): The discord user id
+
+        Returns:
+            Streamer: The streamer, or none if they are not whitelisted
+        """
+
+        return self.by_user_id.get(int(user_id))
+
+    def match(self, username: str) -> Optional[Streamer]:
+        """
+        Match a twitch username to a streamer, ignoring case
+
+        Args:
+            username (str): The twitch username, e.g. from a chat message or link
+
+        Returns:
+            Streamer: The streamer, or none if they are not whitelisted
+        """
+
+        return self.by_login.get(normalize_login(username))
+
+    def match_twitch_id(self, twitch_user_id: int) -> Optional[Streamer]:
+        """
+        Match a twitch user id, e.g. from an event notification, to a streamer
+
+        Args:
+            twitch_user_id (int): The twitch user id
+
+        Returns:
+            Streamer: The streamer, or none if unknown or not whitelisted
+        """
+
+        return self.by_twitch_id.get(int(twitch_user_id))
@@ -0,0 +1,40 @@
+"""The shared test case for the tests which need a whitelist on disk"""
+import os
+import tempfile
+import unittest
+from settings import Settings
+
+
+class DatasourceTestCase(unittest.TestCase):
+    """Base test case pointing the settings at a whitelist in a temporary directory"""
+
+    settings_fields = {}
+
+    def setUp(self):
+        """
+        Point the datasource at a temporary directory using the bundled templates
+
+        Returns:
+            None
+        """
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.datasource = os.path.join(self.directory.name, 'streamers.json')
+        templates = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')
+        self.settings = Settings(
+            streamer_datasource=self.datasource,
+            template=os.path.join(templates, 'template.json'),
+            template_streamer=os.path.join(templates, 'streamer.json'),
+            template_role=os.path.join(templates, 'role.json'),
+            **self.settings_fields
+        )
+
+    def tearDown(self):
+        """
+        Remove the temporary directory
+
+        Returns:
+            None
+        """
+
+        self.directory.cleanup()
@@ -0,0 +1,153 @@
+"""The test for the announcement file in the twitch announce bot module"""
+from datetime import datetime
+from unittest.mock import patch
+import unittest
+from announcement import (
+    FORMATTER,
+    MESSAGE_LIMIT,
+    AnnouncementRenderer,
+    InvalidTemplateException,
+    compile_template
+)
+from streamer import Streamer
+from twitch_api import TwitchGame, TwitchStream
+
+
+def create_streamer(user_id: int, announcement: str = None) -> Streamer:
+    """
+    Create a live streamer for the tests
+
+    Args:
+        user_id (int): The discord user id
+        announcement (str): The streamer's own template, if any
+
+    Returns:
+        Streamer: The streamer
+    """
+
+    username = f'Streamer{user_id}'
+    stream = TwitchStream(
+        id=1,
+        user_id=user_id,
+        user_login=username.lower(),
+        user_name=username,
+        game_id=7,
+        game_name='Test Game',
+        live='live',
+        title='This is a test stream',
+        viewer_count=1500,
+        started_at=datetime(2021, 5, 1, 18, 30),
+        language='English',
+        thumbnail='imagepath',
+        is_mature=False
+    )
+
+    return Streamer(user_id, username, [], stream, announcement)
+
+
+class TestAnnouncement(unittest.TestCase):
+    """Test compiling and rendering announcement templates"""
+
+    def test_compile_template(self):
+        """
+        Test templates are checked against the placeholders when compiled
+
+        Returns:
+            None
+        """
+
+        # Give
+        invalid = [
+            '{title', '{unknown}', '{title.upper}', '{}', '{title!x}', '{viewer_count:{width}}', '{title:d}',
+            '{user_id:d}'
+        ]
+
+        # When
+        render = compile_template('{user_name} has {viewer_count:,} viewers since {started_at:%H:%M} {url}')
+
+        # Then
+        self.assertEqual(
+            render(create_streamer(1).twitch_stream, {'url': 'https://twitch.tv/streamer1'}),
+            'Streamer1 has 1,500 viewers since 18:30 https://twitch.tv/streamer1'
+        )
+        for source in invalid:
+            with self.assertRaises(InvalidTemplateException, msg=source):
+                compile_template(source)
+
+    def test_render_batch(self):
+        """
+        Test a batch of go lives is rendered without parsing any template again
+
+        Returns:
+            None
+        """
+
+        # Give
+        renderer = AnnouncementRenderer()
+        streamers = [
+            create_streamer(user_id, '{mention} plays {game} {url}' if user_id % 2 else None)
+            for user_id in range(100)
+        ]
+        game = TwitchGame('7', 'Test Game', 'https://box/7-{width}x{height}.jpg')
+
+        # When
+        with patch.object(FORMATTER, 'parse', wraps=FORMATTER.parse) as parse:
+            first = [renderer.render(streamer, ['@Role'], game) for streamer in streamers]
+            second = [renderer.render(streamer, [], None) for streamer in streamers]
+
+        # Then
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(
+            first[0],
+            '@Role <@0> is now live on twitch playing Test Game: This is a test stream '
+            'https://twitch.tv/Streamer0'
+        )
+        self.assertEqual(first[1], '<@1> plays Test Game https://twitch.tv/Streamer1')
+        self.assertEqual(
+            second[0],
+            '<@0> is now live on twitch: This is a test stream https://twitch.tv/Streamer0'
+        )
+        self.assertEqual(renderer.get('{unknown}'), renderer.default)
+
+    def test_render_failure(self):
+        """
+        Test an announcement which fails to render with the values sent falls back to the built in template
+
+        Returns:
+            None
+        """
+
+        # Give
+        renderer = AnnouncementRenderer('{mention} has {viewer_count:,} viewers')
+        streamer = create_streamer(1, '{mention} is stream {id:>4s}')
+
+        # When
+        with self.assertLogs('announcement', level='WARNING') as logs:
+            own = renderer.render(streamer, [], None)
+            default = renderer.render(create_streamer(2), [], None)
+
+        # Then
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(own, '<@1> is now live on twitch: This is a test stream https://twitch.tv/Streamer1')
+        self.assertEqual(default, '<@2> has 1,500 viewers')
+
+    def test_render_limits(self):
+        """
+        Test a blank announcement falls back to the built in template and a long one is cut to discord's limit
+
+        Returns:
+            None
+        """
+
+        # Give
+        renderer = AnnouncementRenderer('{roles}')
+        streamer = create_streamer(1, '{mention} ' + 'x' * 2000)
+
+        # When
+        blank = renderer.render(create_streamer(2), [], None)
+        long = renderer.render(streamer, [], None)
+
+        # Then
+        self.assertEqual(blank, '<@2> is now live on twitch: This is a test stream https://twitch.tv/Streamer2')
+        self.assertEqual(len(long), MESSAGE_LIMIT)
+        self.assertTrue(long.startswith('<@1> xxx'))
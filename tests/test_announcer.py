@@ -0,0 +1,73 @@
+"""The test for the announcer file in the twitch announce bot module"""
+from unittest.mock import AsyncMock, Mock, patch
+import asyncio
+import unittest
+from announcer import AnnouncerCog
+from games import GameCache
+from settings import Settings
+from tests.test_announcement import create_streamer
+from twitch_api import TwitchHandlerInterface
+from whitelist import DatasourceHandlerInterface
+from workers import StreamEvent
+
+
+class TestAnnouncerCog(unittest.TestCase):
+    """Test the announcer cog"""
+
+    def test_consume_survives_failed_announcements(self):
+        """
+        Test a batch of events failing to be announced does not stop the next batches
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource = Mock(spec=DatasourceHandlerInterface)
+        datasource.get_contents.return_value = {'Streamers': [
+            {'user_id': 1, 'username': 'Hello', 'roles': []},
+            {'user_id': 2, 'username': 'World', 'roles': []}
+        ]}
+        batches = [
+            [StreamEvent('live', 'Hello', create_streamer(1).twitch_stream)],
+            [StreamEvent('live', 'World', create_streamer(2).twitch_stream)]
+        ]
+        channel = Mock()
+        channel.guild.roles = []
+        channel.send = AsyncMock(side_effect=[Exception('Discord is unavailable'), None])
+
+        def get_events(timeout: float) -> list:
+            return batches.pop(0) if batches else []
+
+        async def run():
+            bot = Mock()
+            bot.loop = asyncio.get_running_loop()
+            bot.wait_until_ready = AsyncMock()
+            bot.get_channel.return_value = channel
+
+            with patch('announcer.WorkerPool') as worker_pool:
+                worker_pool.return_value.get_events.side_effect = get_events
+                cog = AnnouncerCog(
+                    bot,
+                    Settings(poll_mode='workers'),
+                    datasource,
+                    Mock(spec=TwitchHandlerInterface)
+                )
+            cog.games = Mock(spec=GameCache)
+            cog.games.get.return_value = {}
+
+            for _ in range(100):
+                if channel.send.await_count == 2 or cog.consume_task.done():
+                    break
+                await asyncio.sleep(0.01)
+
+            cog.consume_task.cancel()
+            return cog.consume_task
+
+        # When
+        with self.assertLogs('announcer', level='ERROR'):
+            consume_task = asyncio.run(run())
+
+        # Then
+        self.assertTrue(consume_task.cancelled())
+        self.assertEqual(channel.send.await_count, 2)
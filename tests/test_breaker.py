@@ -0,0 +1,192 @@
+"""The test for the breaker file in the twitch announce bot module"""
+from datetime import datetime
+from unittest.mock import Mock
+import threading
+import unittest
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreakerTwitchHandler
+from settings import Settings
+from twitch_api import TwitchHandlerInterface, TwitchStream, TwitchUnavailableException
+
+
+def create_stream(username: str) -> TwitchStream:
+    """
+    Create a live stream for the tests
+
+    Args:
+        username (str): The twitch username
+
+    Returns:
+        TwitchStream: The stream
+    """
+
+    return TwitchStream(
+        id=1,
+        user_id=1,
+        user_login=username,
+        user_name=username,
+        game_id=1,
+        game_name='Test Game',
+        live='live',
+        title='This is a test stream',
+        viewer_count=15,
+        started_at=datetime(2021, 5, 1, 18, 30),
+        language='English',
+        thumbnail='imagepath',
+        is_mature=False
+    )
+
+
+class TestCircuitBreakerTwitchHandler(unittest.TestCase):
+    """Test the circuit breaker twitch handler"""
+
+    def setUp(self):
+        """
+        Create a breaker opening after two failures and probing after a minute
+
+        Returns:
+            None
+        """
+
+        self.now = [0.0]
+        self.twitch_handler = Mock(spec=TwitchHandlerInterface)
+        self.breaker = CircuitBreakerTwitchHandler(
+            self.twitch_handler,
+            Settings(twitch_breaker_threshold=2, twitch_breaker_reset=60),
+            clock=lambda: self.now[0]
+        )
+
+    def test_open_serves_stale(self):
+        """
+        Test failures are answered with the last known streams until the circuit opens
+
+        Returns:
+            None
+        """
+
+        # Give
+        self.twitch_handler.get_streams.side_effect = [
+            {'hello': create_stream('Hello')},
+            ConnectionError('Helix is down'),
+            ConnectionError('Helix is down')
+        ]
+
+        # When
+        fresh = self.breaker.get_streams(['Hello', 'World'])
+        failed = self.breaker.get_streams(['Hello', 'World'])
+        state = self.breaker.state
+        self.breaker.get_streams(['Hello', 'World'])
+        opened = self.breaker.get_streams(['Hello', 'World'])
+        stream = self.breaker.get_stream('HELLO')
+
+        # Then
+        self.assertFalse(fresh['hello'].stale)
+        self.assertEqual(state, CLOSED)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.twitch_handler.get_streams.call_count, 3)
+        self.assertEqual(list(failed), ['hello'])
+        self.assertEqual(list(opened), ['hello'])
+        self.assertTrue(opened['hello'].stale)
+        self.assertTrue(stream.stale)
+        with self.assertRaises(TwitchUnavailableException):
+            self.breaker.get_games(['1'])
+
+    def test_half_open_probe(self):
+        """
+        Test an open circuit is probed in the background once the reset timeout has passed
+
+        Returns:
+            None
+        """
+
+        # Give
+        self.twitch_handler.get_streams.side_effect = [
+            {},
+            ConnectionError('Helix is down'),
+            ConnectionError('Helix is down'),
+            ConnectionError('Helix is still down'),
+            {'world': create_stream('World')},
+            {}
+        ]
+        for _ in range(3):
+            self.breaker.get_streams(['world'])
+
+        # When
+        self.now[0] = 59
+        waiting = self.breaker.get_streams(['world'])
+        self.now[0] = 60
+        self.breaker.get_streams(['world'])
+        probing = self.breaker.state
+        self.breaker.probe.join()
+        reopened = self.breaker.state
+        self.now[0] = 120
+        self.breaker.get_streams(['world'])
+        self.breaker.probe.join()
+        closed = self.breaker.state
+        stale = self.breaker.get_streams(['world'])
+
+        # Then
+        self.assertEqual(waiting, {})
+        self.assertEqual(probing, HALF_OPEN)
+        self.assertEqual(reopened, OPEN)
+        self.assertEqual(closed, CLOSED)
+        self.assertEqual(list(stale), [])
+        self.assertEqual(self.twitch_handler.get_streams.call_count, 6)
+
+    def test_timeout(self):
+        """
+        Test calls to a hanging twitch are given up on and fail when nothing is known
+
+        Returns:
+            None
+        """
+
+        # Give
+        release = threading.Event()
+        self.twitch_handler.get_streams.side_effect = lambda usernames: release.wait(5)
+        self.breaker.timeout = 0.05
+
+        # When
+        try:
+            with self.assertRaises(TwitchUnavailableException):
+                self.breaker.get_streams(['hello'])
+        finally:
+            release.set()
+
+        # Then
+        self.assertEqual(self.breaker.failures, 1)
+
+    def test_probe_not_queued_behind_hanging_calls(self):
+        """
+        Test the probe reaches twitch while every thread of the pool hangs on a call
+
+        Returns:
+            None
+        """
+
+        # Give
+        release = threading.Event()
+        hanging = [True, True, True, True, False]
+        self.twitch_handler.get_streams.side_effect = (
+            lambda usernames: release.wait(5) if hanging.pop(0) else {}
+        )
+        self.breaker.timeout = 0.05
+        self.breaker.threshold = 4
+
+        # When
+        try:
+            for _ in range(4):
+                with self.assertRaises(TwitchUnavailableException):
+                    self.breaker.get_streams(['hello'])
+            opened = self.breaker.state
+            self.now[0] = 60
+            with self.assertRaises(TwitchUnavailableException):
+                self.breaker.get_streams(['hello'])
+            self.breaker.probe.join(1)
+            closed = self.breaker.state
+        finally:
+            release.set()
+
+        # Then
+        self.assertEqual(opened, OPEN)
+        self.assertEqual(closed, CLOSED)
+        self.assertEqual(self.twitch_handler.get_streams.call_count, 5)
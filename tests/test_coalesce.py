@@ -0,0 +1,112 @@
+"""The test for the coalesce file in the twitch announce bot module"""
+from unittest.mock import Mock
+import threading
+import unittest
+from coalesce import SingleFlightTwitchHandler
+from twitch_api import TwitchHandlerInterface, TwitchStreamInterface
+
+
+class TestSingleFlightTwitchHandler(unittest.TestCase):
+    """Test the single flight twitch handler"""
+
+    def setUp(self):
+        """
+        Create a twitch handler which holds any lookup of hello until released
+
+        Returns:
+            None
+        """
+
+        self.streams = {name: Mock(spec=TwitchStreamInterface) for name in ('hello', 'world')}
+        self.entered = threading.Event()
+        self.joined = threading.Event()
+        self.release = threading.Event()
+        self.error = None
+
+        def get_streams(usernames: list) -> dict:
+            if 'Hello' in usernames:
+                self.entered.set()
+                self.release.wait(5)
+                if self.error is not None:
+                    raise self.error
+            else:
+                self.joined.set()
+
+            return {
+                username.lower(): self.streams[username.lower()]
+                for username in usernames if username.lower() in self.streams
+            }
+
+        self.twitch_handler = Mock(spec=TwitchHandlerInterface)
+        self.twitch_handler.get_streams.side_effect = get_streams
+        self.single_flight = SingleFlightTwitchHandler(self.twitch_handler)
+
+    def overlap(self) -> list:
+        """
+        Look up two overlapping batches at the same time, the second joining the first
+
+        Returns:
+            list: The results or errors of the first and second lookup
+        """
+
+        results = [None, None]
+
+        def lookup(index: int, usernames: list) -> None:
+            try:
+                results[index] = self.single_flight.get_streams(usernames)
+            except ConnectionError as error:
+                results[index] = error
+
+        first = threading.Thread(target=lookup, args=(0, ['Hello', 'Other']))
+        first.start()
+        self.entered.wait(5)
+        second = threading.Thread(target=lookup, args=(1, ['hello', 'World', 'other']))
+        second.start()
+        self.joined.wait(5)
+        self.release.set()
+        first.join()
+        second.join()
+
+        return results
+
+    def test_concurrent_lookups_share_a_call(self):
+        """
+        Test logins already in flight are not requested again and their result is shared
+
+        Returns:
+            None
+        """
+
+        # When
+        first, second = self.overlap()
+
+        # Then
+        self.assertEqual(first, {'hello': self.streams['hello']})
+        self.assertEqual(second, {'hello': self.streams['hello'], 'world': self.streams['world']})
+        self.twitch_handler.get_streams.assert_called_with(['World'])
+        self.assertEqual(self.single_flight.counters['streams_calls'], 2)
+        self.assertEqual(self.single_flight.counters['streams_requested'], 3)
+        self.assertEqual(self.single_flight.counters['streams_deduplicated'], 2)
+        self.assertEqual(self.single_flight.flights, {})
+
+    def test_failure_is_shared(self):
+        """
+        Test a failed lookup fails every caller sharing it and is not reused afterwards
+
+        Returns:
+            None
+        """
+
+        # Give
+        self.error = ConnectionError('Helix is down')
+
+        # When
+        first, second = self.overlap()
+        self.error = None
+        after = self.single_flight.get_streams(['Hello'])
+
+        # Then
+        self.assertIsInstance(first, ConnectionError)
+        self.assertIsInstance(second, ConnectionError)
+        self.assertEqual(after, {'hello': self.streams['hello']})
+        self.assertEqual(self.twitch_handler.get_streams.call_count, 3)
@@ -0,0 +1,84 @@
+"""The test for the detector file in the twitch announce bot module"""
+from unittest.mock import Mock
+import unittest
+from detector import LinkDetector
+from streamer import StreamerRegistry
+from whitelist import DatasourceHandlerInterface
+
+
+class TestLinkDetector(unittest.TestCase):
+    """Test the link detector"""
+
+    def setUp(self):
+        """
+        Create a detector over a whitelist of two streamers
+
+        Returns:
+            None
+        """
+
+        datasource = Mock(spec=DatasourceHandlerInterface)
+        datasource.get_contents.return_value = {
+            "Streamers": [
+                {"user_id": 1, "username": "HelloWorld", "roles": []},
+                {"user_id": 2, "username": "Hello", "roles": []}
+            ]
+        }
+        self.registry = StreamerRegistry(datasource)
+        self.detector = LinkDetector(self.registry)
+
+    def test_find(self):
+        """
+        Test whitelisted streamers are found by link or username, ignoring case
+
+        Returns:
+            None
+        """
+
+        # When
+        by_link = self.detector.find('go watch https://www.twitch.tv/helloworld now')
+        by_name = self.detector.find('HELLO is live, so is helloworld and hello again')
+        not_whitelisted = self.detector.find('twitch.tv/someone_else and helloworlds')
+
+        # Then
+        self.assertEqual([streamer.id for streamer in by_link], [1])
+        self.assertEqual([streamer.id for streamer in by_name], [2, 1])
+        self.assertEqual(not_whitelisted, [])
+
+    def test_follows_changes(self):
+        """
+        Test streamers added to the whitelist are found straight away
+
+        Returns:
+            None
+        """
+
+        # Give
+        self.registry.apply_change({
+            'op': 'add_streamer',
+            'streamer': {'user_id': 3, 'username': 'Mock_Object', 'roles': []}
+        })
+
+        # When
+        found = self.detector.find('mock_object is live, mock_objects and mockobject are not')
+
+        # Then
+        self.assertEqual([streamer.id for streamer in found], [3])
+
+    def test_empty_whitelist(self):
+        """
+        Test only links are matched when nobody is whitelisted
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource = Mock(spec=DatasourceHandlerInterface)
+        datasource.get_contents.return_value = {"Streamers": []}
+
+        # When
+        found = LinkDetector(StreamerRegistry(datasource)).find('twitch.tv/helloworld')
+
+        # Then
+        self.assertEqual(found, [])
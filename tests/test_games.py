@@ -0,0 +1,133 @@
+"""The test for the games file in the twitch announce bot module"""
+from unittest.mock import Mock
+import os
+import tempfile
+import unittest
+from games import GameCache
+from twitch_api import TwitchGame, TwitchHandlerInterface, TwitchUnavailableException
+
+
+def create_game(game_id: str) -> TwitchGame:
+    """
+    Create a game for the tests
+
+    Args:
+        game_id (str): The game id
+
+    Returns:
+        TwitchGame: The game
+    """
+
+    return TwitchGame(game_id, f'Game {game_id}', f'https://box/{game_id}-{{width}}x{{height}}.jpg')
+
+
+class TestGameCache(unittest.TestCase):
+    """Test the game cache"""
+
+    def setUp(self):
+        """
+        Create a twitch handler which knows every game id below 1000
+
+        Returns:
+            None
+        """
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.json')
+        self.twitch_handler = Mock(spec=TwitchHandlerInterface)
+        self.twitch_handler.get_games.side_effect = lambda game_ids: {
+            game_id: create_game(game_id) for game_id in game_ids if int(game_id) < 1000
+        }
+
+    def tearDown(self):
+        """
+        Remove the temporary directory
+
+        Returns:
+            None
+        """
+
+        self.directory.cleanup()
+
+    def test_get_batches_missing_games(self):
+        """
+        Test a burst of go lives costs one lookup of the games not cached yet
+
+        Returns:
+            None
+        """
+
+        # Give
+        game_cache = GameCache(self.twitch_handler, self.path)
+        game_cache.get([1, 2])
+
+        # When
+        games = game_cache.get([1, 2, 3, '3', '', 4000] + list(range(10, 56)))
+        cached = game_cache.get([1, 2, 3, 4000])
+
+        # Then
+        self.assertEqual(self.twitch_handler.get_games.call_count, 2)
+        self.twitch_handler.get_games.assert_called_with(
+            sorted(['3', '4000'] + [str(game_id) for game_id in range(10, 56)])
+        )
+        self.assertEqual(len(games), 49)
+        self.assertEqual(games['3'], create_game('3'))
+        self.assertEqual(sorted(cached), ['1', '2', '3'])
+        self.assertIsNone(game_cache.get_game(4000))
+
+    def test_twitch_unavailable(self):
+        """
+        Test the cached games are served while twitch is unavailable and the rest retried
+
+        Returns:
+            None
+        """
+
+        # Give
+        game_cache = GameCache(self.twitch_handler, self.path)
+        game_cache.get([1])
+        lookup = self.twitch_handler.get_games.side_effect
+        self.twitch_handler.get_games.side_effect = TwitchUnavailableException('Down')
+
+        # When
+        unavailable = game_cache.get([1, 2])
+        self.twitch_handler.get_games.side_effect = lookup
+        available = game_cache.get([1, 2])
+
+        # Then
+        self.assertEqual(sorted(unavailable), ['1'])
+        self.assertEqual(sorted(available), ['1', '2'])
+
+    def test_persisted_between_restarts(self):
+        """
+        Test games are persisted to disk and loaded back without any lookup
+
+        Returns:
+            None
+        """
+
+        # Give
+        GameCache(self.twitch_handler, self.path).get([1, 2])
+        self.twitch_handler.get_games.reset_mock()
+
+        # When
+        game_cache = GameCache(self.twitch_handler, self.path)
+        loaded = game_cache.load()
+        game = game_cache.get_game('2')
+
+        # Then
+        self.assertEqual(loaded, 2)
+        self.assertEqual(game, create_game('2'))
+        self.twitch_handler.get_games.assert_not_called()
+        self.assertFalse(os.path.exists(f'{self.path}.tmp'))
+
+    def test_load_without_file(self):
+        """
+        Test loading without a persisted file or path loads nothing
+
+        Returns:
+            None
+        """
+
+        self.assertEqual(GameCache(self.twitch_handler, self.path).load(), 0)
+        self.assertEqual(GameCache(self.twitch_handler).load(), 0)
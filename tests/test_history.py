@@ -0,0 +1,105 @@
+"""The test for the history file in the twitch announce bot module"""
+from array import array
+from unittest.mock import Mock
+import unittest
+from history import RingBuffer, StreamHistory
+from twitch_api import TwitchStreamInterface
+
+
+def create_stream(viewer_count: int, game_id: str) -> Mock:
+    """
+    Create a live stream for the tests
+
+    Args:
+        viewer_count (int): The viewer count
+        game_id (str): The game id as returned by twitch
+
+    Returns:
+        Mock: The stream
+    """
+
+    stream = Mock(spec=TwitchStreamInterface)
+    stream.viewer_count = viewer_count
+    stream.game_id = game_id
+    stream.game_name = f'Game {game_id}'
+
+    return stream
+
+
+class TestRingBuffer(unittest.TestCase):
+    """Test the ring buffer"""
+
+    def test_append(self):
+        """
+        Test samples wrap around once full and are returned oldest first
+
+        Returns:
+            None
+        """
+
+        # Give
+        ring_buffer = RingBuffer(('a', 'b'), 3)
+
+        # When
+        for value in range(5):
+            ring_buffer.append(value, value * 10)
+
+        ring_buffer.append(-1, 2 ** 40)
+
+        # Then
+        self.assertEqual(len(ring_buffer), 3)
+        self.assertEqual(ring_buffer.column('a'), array('I', [3, 4, 0]))
+        self.assertEqual(ring_buffer.column('b'), array('I', [30, 40, 2 ** 32 - 1]))
+        self.assertEqual(ring_buffer.nbytes, 3 * 2 * 4)
+
+
+class TestStreamHistory(unittest.TestCase):
+    """Test the stream history"""
+
+    def test_record_and_end(self):
+        """
+        Test samples are kept while live and downsampled into buckets once ended
+
+        Returns:
+            None
+        """
+
+        # Give
+        history = StreamHistory(bucket_seconds=600)
+
+        # When
+        for minute in range(15):
+            game_id = '33214' if minute < 12 else ''
+            history.record('Streamer', create_stream(10 + minute, game_id), minute * 60)
+
+        samples = len(history.samples('streamer'))
+        history.end('streamer', 15 * 60)
+
+        # Then
+        archive = history.archive('STREAMER')
+        self.assertEqual(samples, 15)
+        self.assertIsNone(history.samples('streamer'))
+        self.assertEqual(archive.column('timestamp'), array('I', [0, 600]))
+        self.assertEqual(archive.column('seconds'), array('I', [600, 300]))
+        self.assertEqual(archive.column('average_viewers'), array('I', [14, 22]))
+        self.assertEqual(archive.column('peak_viewers'), array('I', [19, 24]))
+        self.assertEqual(archive.column('game_id'), array('I', [33214, 0]))
+        self.assertEqual(history.nbytes, 2 * 5 * 4)
+
+    def test_end_without_samples(self):
+        """
+        Test ending a stream which was never sampled archives nothing
+
+        Returns:
+            None
+        """
+
+        # Give
+        history = StreamHistory()
+
+        # When
+        history.end('streamer')
+
+        # Then
+        self.assertIsNone(history.archive('streamer'))
+        self.assertEqual(history.nbytes, 0)
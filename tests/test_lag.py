@@ -0,0 +1,75 @@
+"""The test for the lag file in the twitch announce bot module"""
+import asyncio
+import time
+import unittest
+from lag import LoopLagMonitor
+
+
+def block(seconds: float) -> None:
+    """
+    Block the calling thread, standing in for blocking disk or network work
+
+    Args:
+        seconds (float): The seconds to block for
+
+    Returns:
+        None
+    """
+
+    time.sleep(seconds)
+
+
+class TestLoopLagMonitor(unittest.TestCase):
+    """Test the event loop lag monitor"""
+
+    def test_stall_is_sampled(self):
+        """
+        Test a blocking call on the event loop is reported with the code that blocked it
+
+        Returns:
+            None
+        """
+
+        # Give
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+
+        async def run() -> None:
+            task = asyncio.get_running_loop().create_task(monitor.watch())
+            await asyncio.sleep(0.05)
+            block(0.3)
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        # When
+        with self.assertLogs('lag', 'WARNING') as logs:
+            asyncio.run(run())
+
+        # Then
+        self.assertEqual(len(monitor.stalls), 1)
+        self.assertGreaterEqual(monitor.stalls[0].lag, 0.25)
+        self.assertRegex(monitor.stalls[0].summary, r'test_lag\.py:\d+ run -> tests/test_lag\.py:\d+ block$')
+        self.assertIn('in run', monitor.stalls[0].stack)
+        self.assertIn(monitor.stalls[0].summary, logs.output[0])
+        self.assertTrue(monitor.stopped.is_set())
+
+    def test_percentiles(self):
+        """
+        Test the percentiles of the lag samples kept
+
+        Returns:
+            None
+        """
+
+        # Give
+        monitor = LoopLagMonitor(threshold=10, capacity=100)
+
+        # When
+        empty = monitor.percentiles()
+        for lag in range(200):
+            monitor.record(lag / 1000)
+        monitor.record(-0.001)
+
+        # Then
+        self.assertEqual(empty, {})
+        self.assertEqual(monitor.percentiles(), {50: 0.15, 90: 0.19, 99: 0.199, 100: 0.199})
+        self.assertEqual(len(monitor.stalls), 0)
@@ -0,0 +1,74 @@
+"""The test for the main file in the twitch announce bot module"""
+import os
+import subprocess
+import sys
+import unittest
+
+
+def import_times(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module (str): The module to import
+
+    Returns:
+        dict: The cumulative import time in microseconds keyed by module name
+    """
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        check=True,
+        text=True,
+        timeout=60
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+class TestStartup(unittest.TestCase):
+    """Benchmark the cold start imports of the bot"""
+
+    budget = 2000000
+
+    def test_main_import(self):
+        """
+        Test importing main neither starts the bot nor imports any third party package
+
+        Returns:
+            None
+        """
+
+        # When
+        times = import_times('main')
+
+        # Then
+        for package in ('discord', 'dotenv', 'twitch', 'requests'):
+            self.assertNotIn(package, times)
+
+    def test_commands_import(self):
+        """
+        Test importing the commands extension defers the twitch client and stays in budget
+
+        Returns:
+            None
+        """
+
+        # When
+        times = import_times('commands')
+
+        # Then
+        self.assertNotIn('twitch', times)
+        self.assertNotIn('requests', times)
+        self.assertNotIn('dotenv', times)
+        self.assertLess(times['commands'], self.budget)
@@ -0,0 +1,126 @@
+"""The test for the offload file in the twitch announce bot module"""
+from unittest.mock import AsyncMock, Mock
+import asyncio
+import time
+from commands import CommandsCog
+from offload import ExecutorDatasourceHandler
+from tests.datasource import DatasourceTestCase
+from whitelist import JsonDatasourceHandler
+
+
+async def measure_lag(work) -> float:
+    """
+    Measure the longest the event loop was stalled while awaiting some work
+
+    A heartbeat ticks every 10 milliseconds meanwhile and the lag is how much later than
+    that it ran at worst.
+
+    Args:
+        work: The awaitable to measure
+
+    Returns:
+        float: The longest stall in seconds
+    """
+
+    lag = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal lag
+        while not done:
+            started = time.monotonic()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.monotonic() - started - 0.01)
+
+    beating = asyncio.get_running_loop().create_task(heartbeat())
+    await asyncio.sleep(0)
+    try:
+        await work
+    finally:
+        done = True
+        await beating
+
+    return lag
+
+
+class TestExecutorDatasourceHandler(DatasourceTestCase):
+    """Test the datasource handler running its disk work off the event loop"""
+
+    def setUp(self):
+        """
+        Point the datasource at a temporary directory and slow down every write
+
+        Returns:
+            None
+        """
+
+        super().setUp()
+        self.datasource_handler = JsonDatasourceHandler(self.settings)
+        add_streamer = self.datasource_handler.add_streamer
+
+        def slow_add_streamer(user_id: int, username: str) -> None:
+            time.sleep(0.2)
+            add_streamer(user_id, username)
+
+        self.datasource_handler.add_streamer = slow_add_streamer
+
+    def test_command_does_not_block_heartbeats(self):
+        """
+        Test a command awaiting slow disk work leaves the event loop free to run
+
+        Returns:
+            None
+        """
+
+        # Give
+        ctx = Mock()
+        ctx.send = AsyncMock()
+        user = Mock(id=1, mention='@HelloWorld')
+
+        async def run() -> tuple:
+            bot = Mock(loop=asyncio.get_running_loop())
+            cog = CommandsCog(bot, self.settings)
+            cog.datasource = ExecutorDatasourceHandler(self.datasource_handler)
+
+            async def on_loop() -> None:
+                self.datasource_handler.add_streamer(2, 'Other')
+
+            try:
+                blocked = await measure_lag(on_loop())
+                offloaded = await measure_lag(cog.add_streamer.callback(cog, ctx, user, 'HelloWorld'))
+                exists = await cog.datasource.exists(1)
+            finally:
+                cog.cog_unload()
+
+            return blocked, offloaded, exists
+
+        # When
+        blocked, offloaded, exists = asyncio.run(run())
+
+        # Then
+        self.assertGreater(blocked, 0.15)
+        self.assertLess(offloaded, 0.1)
+        self.assertTrue(exists)
+        ctx.send.assert_awaited_once_with(
+            "@HelloWorld has been added to the whitelist for twitch.tv/HelloWorld"
+        )
+
+    def test_errors_are_raised(self):
+        """
+        Test an error raised by the wrapped handler is raised to the caller
+
+        Returns:
+            None
+        """
+
+        # Give
+        executor_handler = ExecutorDatasourceHandler(self.datasource_handler, workers=1)
+
+        async def run() -> None:
+            await executor_handler.add_streamer(1, 'HelloWorld')
+            await executor_handler.add_streamer(1, 'HelloWorld')
+
+        # When / Then
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+        executor_handler.close()
@@ -0,0 +1,136 @@
+"""The test for the reconcile file in the twitch announce bot module"""
+from unittest.mock import Mock
+import asyncio
+import unittest
+from reconcile import WhitelistReconciler
+from offload import AsyncDatasourceHandlerInterface
+
+
+class TestWhitelistReconciler(unittest.TestCase):
+    """Test the whitelist reconciler"""
+
+    def test_burst_is_written_once(self):
+        """
+        Test a burst of guild events is reconciled in a single write once the delay passes
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource_handler = Mock(spec=AsyncDatasourceHandlerInterface)
+        datasource_handler.reconcile.return_value = 3
+        reconciler = WhitelistReconciler(datasource_handler, 0.01)
+
+        async def burst():
+            reconciler.remove_member(2)
+            reconciler.rename_role(8, 'Old')
+            reconciler.rename_role(9, 'Doomed')
+            reconciler.remove_member(1)
+            reconciler.delete_role(9)
+            reconciler.rename_role(8, 'New')
+            await asyncio.sleep(0.05)
+            return await reconciler.flush()
+
+        # When
+        nothing = asyncio.run(burst())
+
+        # Then
+        datasource_handler.reconcile.assert_awaited_once_with([1, 2], [9], {8: 'New'})
+        self.assertEqual(nothing, 0)
+        self.assertIsNone(reconciler.flush_task)
+
+    def test_events_during_write_are_batched_next(self):
+        """
+        Test events collected while a write is in flight are written together in the next one
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource_handler = Mock(spec=AsyncDatasourceHandlerInterface)
+        reconciler = WhitelistReconciler(datasource_handler, 0.01)
+
+        async def slow_reconcile(user_ids: list, role_ids: list, role_names: dict) -> int:
+            await asyncio.sleep(0.02)
+            return len(user_ids) + len(role_ids) + len(role_names)
+
+        datasource_handler.reconcile.side_effect = slow_reconcile
+
+        async def bursts():
+            for user_id in range(1, 101):
+                reconciler.remove_member(user_id)
+            await asyncio.sleep(0.015)
+            reconciler.remove_member(101)
+            reconciler.delete_role(5)
+            await asyncio.sleep(0.05)
+
+        # When
+        asyncio.run(bursts())
+
+        # Then
+        self.assertEqual(
+            [call.args for call in datasource_handler.reconcile.await_args_list],
+            [(list(range(1, 101)), [], {}), ([101], [5], {})]
+        )
+
+    def test_rename(self):
+        """
+        Test only the last name of a renamed role is written and deleted roles are not renamed
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource_handler = Mock(spec=AsyncDatasourceHandlerInterface)
+        datasource_handler.reconcile.return_value = 1
+        reconciler = WhitelistReconciler(datasource_handler, 0)
+
+        async def rename():
+            reconciler.rename_role(8, 'First')
+            reconciler.rename_role(8, 'Second')
+            reconciler.rename_role(9, 'Doomed')
+            reconciler.delete_role(9)
+            return await reconciler.flush()
+
+        # When
+        changes = asyncio.run(rename())
+
+        # Then
+        datasource_handler.reconcile.assert_awaited_once_with([], [9], {8: 'Second'})
+        self.assertEqual(changes, 1)
+
+    def test_failed_flush(self):
+        """
+        Test the events of a failed write are logged, kept and written by the retry
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource_handler = Mock(spec=AsyncDatasourceHandlerInterface)
+        datasource_handler.reconcile.side_effect = [OSError('Disk full'), 3]
+        reconciler = WhitelistReconciler(datasource_handler, 0.01)
+
+        async def burst():
+            reconciler.remove_member(1)
+            reconciler.rename_role(8, 'Old')
+            await asyncio.sleep(0.015)
+            reconciler.rename_role(8, 'New')
+            reconciler.remove_member(2)
+            await asyncio.sleep(0.02)
+
+        # When
+        with self.assertLogs('reconcile', level='ERROR') as logs:
+            asyncio.run(burst())
+
+        # Then
+        self.assertIn('Failed to reconcile the whitelist', logs.output[0])
+        self.assertEqual(
+            [call.args for call in datasource_handler.reconcile.await_args_list],
+            [([1], [], {8: 'Old'}), ([1, 2], [], {8: 'New'})]
+        )
+        self.assertIsNone(reconciler.flush_task)
@@ -0,0 +1,166 @@
+"""The test for the replay file in the twitch announce bot module"""
+from datetime import datetime
+from unittest.mock import Mock, patch
+import os
+import tempfile
+import unittest
+from coalesce import SingleFlightTwitchHandler
+from replay import RecordingTwitchHandler, ReplayTwitchHandler, create_twitch_handler
+from settings import Settings
+from twitch_api import TwitchGame, TwitchHandlerInterface, TwitchStream
+
+
+def create_stream(username: str) -> TwitchStream:
+    """
+    Create a live stream for the tests
+
+    Args:
+        username (str): The twitch username
+
+    Returns:
+        TwitchStream: The stream
+    """
+
+    return TwitchStream(
+        id=1,
+        user_id=1,
+        user_login=username,
+        user_name=username,
+        game_id=7,
+        game_name='Test Game',
+        live='live',
+        title='This is a test stream',
+        viewer_count=15,
+        started_at=datetime(2021, 5, 1, 18, 30),
+        language='English',
+        thumbnail='imagepath',
+        is_mature=False
+    )
+
+
+class TestReplay(unittest.TestCase):
+    """Test recording twitch traffic and replaying it"""
+
+    def setUp(self):
+        """
+        Record a streamer going live, another taking over and a game lookup
+
+        Returns:
+            None
+        """
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'twitch.jsonl')
+        self.game = TwitchGame('7', 'Test Game', 'https://box/7-{width}x{height}.jpg')
+
+        twitch_handler = Mock(spec=TwitchHandlerInterface)
+        twitch_handler.get_streams.side_effect = [
+            {'hello': create_stream('Hello')},
+            {'world': create_stream('World')}
+        ]
+        twitch_handler.get_games.return_value = {'7': self.game}
+
+        times = iter([0.0, 1.0, 1.5, 10.0, 10.5, 11.0, 11.2])
+        recording_handler = RecordingTwitchHandler(
+            twitch_handler, self.path, clock=lambda: next(times)
+        )
+        self.recorded = [
+            recording_handler.get_streams(['Hello', 'World']),
+            recording_handler.get_streams(['Hello', 'World']),
+            recording_handler.get_games([7])
+        ]
+
+    def tearDown(self):
+        """
+        Remove the temporary directory
+
+        Returns:
+            None
+        """
+
+        self.directory.cleanup()
+
+    def test_recording_passes_through(self):
+        """
+        Test the recording handler answers with the responses of the handler it records
+
+        Returns:
+            None
+        """
+
+        # Then
+        self.assertEqual(list(self.recorded[0]), ['hello'])
+        self.assertEqual(list(self.recorded[1]), ['world'])
+        self.assertEqual(self.recorded[2], {'7': self.game})
+
+    def test_replay_follows_clock(self):
+        """
+        Test the replay answers with the state at the point of the replay, however batched
+
+        Returns:
+            None
+        """
+
+        # Give
+        now = [5.0]
+        replay_handler = ReplayTwitchHandler(self.path, speed=0, clock=lambda: now[0])
+
+        # When
+        early = replay_handler.get_streams(['HELLO', 'World', 'unknown'])
+        early_world = replay_handler.get_stream('world')
+        now[0] = 20.0
+        late = replay_handler.get_streams(['hello', 'world'])
+        late_hello = replay_handler.get_stream('hello')
+        games = replay_handler.get_games([7, '8'])
+
+        # Then
+        self.assertEqual(early, {'hello': create_stream('Hello')})
+        self.assertIsNone(early_world)
+        self.assertEqual(late, {'world': create_stream('World')})
+        self.assertIsNone(late_hello)
+        self.assertEqual(games, {'7': self.game})
+        self.assertEqual(replay_handler.duration, 11.2)
+
+    def test_replay_speed(self):
+        """
+        Test each call takes as long as the recorded call divided by the speed
+
+        Returns:
+            None
+        """
+
+        # Give
+        replay_handler = ReplayTwitchHandler(self.path, speed=10, clock=lambda: 0.0)
+
+        # When
+        with patch('replay.time.sleep') as sleep:
+            for _ in range(3):
+                replay_handler.get_streams(['hello'])
+
+        # Then
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list],
+            [0.05, 0.05, 0.05]
+        )
+
+    def test_create_twitch_handler(self):
+        """
+        Test the handler replays when configured to and rejects other files
+
+        Returns:
+            None
+        """
+
+        # Give
+        invalid = os.path.join(self.directory.name, 'streamers.json')
+        with open(invalid, 'wb') as file:
+            file.write(b'{"Streamers": []}\n')
+
+        # When
+        twitch_handler = create_twitch_handler(Settings(twitch_replay=self.path))
+
+        # Then
+        self.assertIsInstance(twitch_handler, SingleFlightTwitchHandler)
+        self.assertIsInstance(twitch_handler.twitch_handler, ReplayTwitchHandler)
+        with self.assertRaises(ValueError):
+            ReplayTwitchHandler(invalid)
@@ -0,0 +1,162 @@
+"""The test for the scheduler file in the twitch announce bot module"""
+from datetime import datetime, timezone
+from unittest.mock import Mock
+import unittest
+from scheduler import PollScheduler, ScheduledTwitchHandler, WEEK
+from twitch_api import TwitchHandlerInterface, TwitchStream
+
+
+def create_stream(username: str, started_at: float) -> TwitchStream:
+    """
+    Create a live stream for the tests
+
+    Args:
+        username (str): The twitch username
+        started_at (float): When the stream started
+
+    Returns:
+        TwitchStream: The stream
+    """
+
+    return TwitchStream(
+        id=1,
+        user_id=1,
+        user_login=username,
+        user_name=username,
+        game_id=1,
+        game_name='Test Game',
+        live='live',
+        title='This is a test stream',
+        viewer_count=15,
+        started_at=datetime.fromtimestamp(started_at, timezone.utc),
+        language='English',
+        thumbnail='imagepath',
+        is_mature=False
+    )
+
+
+class TestPollScheduler(unittest.TestCase):
+    """Test the poll scheduler"""
+
+    def setUp(self):
+        """
+        Create a scheduler with a controllable clock
+
+        Returns:
+            None
+        """
+
+        self.now = 0.0
+        self.scheduler = PollScheduler(60, 600, 2, clock=lambda: self.now)
+
+    def test_invalid_intervals(self):
+        """
+        Test the minimum interval must not exceed the max staleness
+
+        Returns:
+            None
+        """
+
+        with self.assertRaises(ValueError):
+            PollScheduler(600, 60)
+
+    def test_dormant_streamers_back_off(self):
+        """
+        Test offline streamers with no history are polled less often up to the max staleness
+
+        Returns:
+            None
+        """
+
+        # When
+        intervals = []
+        for _ in range(6):
+            self.assertEqual(self.scheduler.due(['dormant']), ['dormant'])
+            previous = self.now
+            self.scheduler.record('dormant', None)
+            self.now = self.scheduler.states['dormant'].next_poll
+            intervals.append(self.now - previous)
+
+        # Then
+        self.assertEqual(intervals, [120, 240, 480, 600, 600, 600])
+
+    def test_learned_go_live_time(self):
+        """
+        Test a streamer is polled quickly around the time of the week they went live before
+
+        Returns:
+            None
+        """
+
+        # Give
+        self.scheduler.record('regular', create_stream('regular', 0))
+        self.now = 3 * 3600
+        self.scheduler.record('regular', None)
+
+        # When
+        self.now = 12 * 3600
+        self.scheduler.record('regular', None)
+        away_interval = self.scheduler.states['regular'].interval
+
+        self.now = WEEK - 1800
+        self.scheduler.record('regular', None)
+        likely_interval = self.scheduler.states['regular'].interval
+
+        # Then
+        self.assertEqual(self.scheduler.likelihood('regular', WEEK), 1.0)
+        self.assertEqual(self.scheduler.likelihood('regular', WEEK / 2), 0.0)
+        self.assertGreater(away_interval, 60)
+        self.assertEqual(likely_interval, 60)
+
+    def test_force(self):
+        """
+        Test forcing a streamer makes them due straight away
+
+        Returns:
+            None
+        """
+
+        # Give
+        self.scheduler.record('dormant', None)
+
+        # When
+        not_due = self.scheduler.due(['dormant'])
+        self.scheduler.force(['Dormant'])
+
+        # Then
+        self.assertEqual(not_due, [])
+        self.assertEqual(self.scheduler.due(['dormant']), ['dormant'])
+
+
+class TestScheduledTwitchHandler(unittest.TestCase):
+    """Test the scheduled twitch handler concretion"""
+
+    def test_get_streams(self):
+        """
+        Test only due streamers are looked up and the rest answered from the last poll
+
+        Returns:
+            None
+        """
+
+        # Give
+        now = [0.0]
+        stream = create_stream('Live', 0)
+        twitch_handler = Mock(spec=TwitchHandlerInterface)
+        twitch_handler.get_streams.return_value = {'live': stream}
+        scheduled_handler = ScheduledTwitchHandler(
+            twitch_handler,
+            PollScheduler(60, 600, clock=lambda: now[0])
+        )
+
+        # When
+        first = scheduled_handler.get_streams(['Live', 'offline'])
+        now[0] = 60
+        second = scheduled_handler.get_streams(['Live', 'offline'])
+
+        # Then
+        self.assertTrue(isinstance(scheduled_handler, TwitchHandlerInterface))
+        self.assertEqual(first, {'live': stream})
+        self.assertEqual(second, {'live': stream})
+        twitch_handler.get_streams.assert_called_with(['Live'])
+        self.assertEqual(scheduled_handler.requested, 3)
@@ -0,0 +1,80 @@
+"""The test for the serializers file in the twitch announce bot module"""
+from unittest.mock import patch
+import unittest
+from serializers import JsonSerializer, OrjsonSerializer, SerializerInterface, get_serializer
+
+
+class TestSerializers(unittest.TestCase):
+    """Test the datasource serializer concretions"""
+
+    contents = {
+        "Streamers": [
+            {
+                "user_id": 1,
+                "username": "Hellö World",
+                "roles": [
+                    {
+                        "role_id": 1,
+                        "name": "UnitTest"
+                    }
+                ]
+            }
+        ]
+    }
+
+    def test_json_serializer(self):
+        """
+        Test the standard library serializer in both modes
+
+        Returns:
+            None
+        """
+
+        # Give
+        serializer = JsonSerializer()
+
+        # When
+        compact = serializer.dumps(self.contents)
+        pretty = serializer.dumps(self.contents, pretty=True)
+
+        # Then
+        self.assertTrue(isinstance(serializer, SerializerInterface))
+        self.assertNotIn(b'\n', compact)
+        self.assertIn(b'\n\t', pretty)
+        self.assertIn('Hellö'.encode('utf8'), compact)
+        self.assertEqual(serializer.loads(compact), self.contents)
+        self.assertEqual(serializer.loads(pretty), self.contents)
+
+    @unittest.skipIf(isinstance(get_serializer(), JsonSerializer), 'orjson is not installed')
+    def test_orjson_serializer(self):
+        """
+        Test the orjson serializer in both modes and against the standard library
+
+        Returns:
+            None
+        """
+
+        # Give
+        serializer = OrjsonSerializer()
+
+        # When
+        compact = serializer.dumps(self.contents)
+        pretty = serializer.dumps(self.contents, pretty=True)
+
+        # Then
+        self.assertNotIn(b'\n', compact)
+        self.assertIn(b'\n', pretty)
+        self.assertEqual(serializer.loads(compact), self.contents)
+        self.assertEqual(JsonSerializer().loads(pretty), self.contents)
+        self.assertEqual(serializer.loads(JsonSerializer().dumps(self.contents, True)), self.contents)
+
+    def test_get_serializer_fallback(self):
+        """
+        Test the standard library serializer is used when orjson is not installed
+
+        Returns:
+            None
+        """
+
+        with patch('serializers.orjson', None):
+            self.assertTrue(isinstance(get_serializer(), JsonSerializer))
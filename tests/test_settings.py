@@ -0,0 +1,80 @@
+"""The test for the settings file in the twitch announce bot module"""
+import unittest
+from settings import Settings
+
+
+class TestSettings(unittest.TestCase):
+    """Test the settings model"""
+
+    def test_defaults(self):
+        """
+        Test unset and empty variables keep their defaults
+
+        Returns:
+            None
+        """
+
+        # Give
+        settings = Settings.from_env({'DISCORD_ANNOUNCE_CHANNEL': ''})
+
+        # Then
+        self.assertEqual(settings, Settings())
+        self.assertIsNone(settings.discord_announce_channel)
+        self.assertEqual(settings.journal_compact_threshold, 100)
+
+    def test_from_env(self):
+        """
+        Test variables are read and cast to their types
+
+        Returns:
+            None
+        """
+
+        # Give
+        settings = Settings.from_env({
+            'DISCORD_ANNOUNCE_CHANNEL': '123',
+            'DISCORD_GUILD': '456',
+            'STREAMER_DATASOURCE': 'data/streamers.json',
+            'DATASOURCE_WATCH_INTERVAL': '0.5',
+            'JOURNAL_COMPACT_THRESHOLD': '10'
+        })
+
+        # Then
+        self.assertEqual(settings.discord_announce_channel, 123)
+        self.assertEqual(settings.discord_guild, 456)
+        self.assertEqual(settings.streamer_datasource, 'data/streamers.json')
+        self.assertEqual(settings.datasource_watch_interval, 0.5)
+        self.assertEqual(settings.journal_compact_threshold, 10)
+
+    def test_validation(self):
+        """
+        Test invalid variables are rejected with the name of the variable
+
+        Returns:
+            None
+        """
+
+        for environ in (
+            {'DATASOURCE_BACKEND': 'sqlite'},
+            {'DATASOURCE_FORMAT': 'yaml'},
+            {'DATASOURCE_WATCH_INTERVAL': '0'},
+            {'DATASOURCE_WORKERS': '0'},
+            {'RECONCILE_DELAY': '-1'},
+            {'LOOP_LAG_INTERVAL': '0'},
+            {'LOOP_LAG_THRESHOLD': '-0.5'},
+            {'JOURNAL_COMPACT_THRESHOLD': 'ten'},
+            {'TWITCH_BATCH_SIZE': '101'},
+            {'TWITCH_TIMEOUT': '0'},
+            {'TWITCH_BREAKER_THRESHOLD': '0'},
+            {'TWITCH_REPLAY_SPEED': '-1'},
+            {'TWITCH_RECORD': 'twitch.jsonl', 'TWITCH_REPLAY': 'twitch.jsonl'},
+            {'POLL_MODE': 'threads'},
+            {'POLL_WORKERS': '0'},
+            {'DISCORD_CONCURRENCY': '0'},
+            {'POLL_INTERVAL': '-1'},
+            {'POLL_MAX_STALENESS': '30'},
+            {'POLL_BACKOFF': '0.5'}
+        ):
+            with self.subTest(environ=environ):
+                with self.assertRaisesRegex(ValueError, list(environ)[0]):
+                    Settings.from_env(environ)
@@ -0,0 +1,120 @@
+"""The test for the snapshot file in the twitch announce bot module"""
+import copy
+import unittest
+from settings import Settings
+from snapshot import WhitelistSnapshot, copy_for_change
+from whitelist import JsonDatasourceHandler
+
+
+def create_contents() -> dict:
+    """
+    Create the datasource contents for the tests
+
+    Returns:
+        dict: The contents
+    """
+
+    return {'Streamers': [
+        {'user_id': 1, 'username': 'Hello', 'roles': [{'role_id': 7, 'name': 'Role'}]},
+        {'user_id': 2, 'username': 'World', 'roles': []},
+        {'user_id': 3, 'username': 'Other', 'roles': [{'role_id': 8, 'name': 'Gamers'}]}
+    ]}
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test deriving versions of the whitelist"""
+
+    def setUp(self):
+        """
+        Create the handler applying the changes, which needs no datasource on disk
+
+        Returns:
+            None
+        """
+
+        self.json_datasource_handler = JsonDatasourceHandler(Settings())
+
+    def test_copy_for_change(self):
+        """
+        Test only the list of streamers is copied and every streamer is shared
+
+        Returns:
+            None
+        """
+
+        # Give
+        contents = create_contents()
+
+        # When
+        copied = copy_for_change(contents)
+
+        # Then
+        self.assertEqual(copied, contents)
+        self.assertIsNot(copied['Streamers'], contents['Streamers'])
+        for streamer, original in zip(copied['Streamers'], contents['Streamers']):
+            self.assertIs(streamer, original)
+
+    def test_changes_leave_original_untouched(self):
+        """
+        Test every op applied to a copy leaves the original as it was and shares the rest
+
+        Returns:
+            None
+        """
+
+        # Give
+        changes = [
+            ({'op': 'add_streamer', 'streamer': {
+                'user_id': 4, 'username': 'New', 'roles': []
+            }}, (0, 1, 2)),
+            ({'op': 'delete_streamer', 'user_id': 2}, (0, 2)),
+            ({'op': 'add_role', 'user_id': 2, 'role': {'role_id': 9, 'name': 'Added'}}, (0, 2)),
+            ({'op': 'delete_role', 'user_id': 1, 'role_id': 7}, (1, 2)),
+            ({'op': 'set_announcement', 'user_id': 3, 'template': '{mention} is live'}, (0, 1)),
+            ({'op': 'add_role_all', 'user_ids': [1, 2], 'role': {
+                'role_id': 7, 'name': 'Role'
+            }}, (0, 2)),
+            ({'op': 'purge_role', 'role_id': 8}, (0, 1)),
+            ({'op': 'rename_role', 'role_id': 7, 'name': 'Renamed'}, (1, 2)),
+            ({'op': 'batch', 'changes': [
+                {'op': 'rename_role', 'role_id': 8, 'name': 'Renamed'},
+                {'op': 'delete_streamer', 'user_id': 1}
+            ]}, (1,))
+        ]
+
+        for change, shared in changes:
+            with self.subTest(op=change['op']):
+                contents = create_contents()
+                original = copy.deepcopy(contents)
+
+                # When
+                copied = copy_for_change(contents)
+                self.json_datasource_handler.apply_change(copied, change)
+
+                # Then
+                self.assertEqual(contents, original)
+                self.assertNotEqual(copied, original)
+                self.assertEqual(
+                    [
+                        index for index, streamer in enumerate(contents['Streamers'])
+                        if any(streamer is kept for kept in copied['Streamers'])
+                    ],
+                    list(shared)
+                )
+
+    def test_snapshot_streamers(self):
+        """
+        Test a snapshot exposes the streamers of its contents
+
+        Returns:
+            None
+        """
+
+        # Give
+        contents = create_contents()
+
+        # When
+        snapshot = WhitelistSnapshot(1, contents)
+
+        # Then
+        self.assertIs(snapshot.streamers, contents['Streamers'])
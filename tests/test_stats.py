@@ -0,0 +1,81 @@
+"""The test for the stats file in the twitch announce bot module"""
+import unittest
+from history import RingBuffer, StreamHistory
+from stats import StreamStats, leaderboard, stream_stats
+
+
+class TestStats(unittest.TestCase):
+    """Test the stream statistics"""
+
+    def setUp(self):
+        """
+        Archive a few buckets for two streamers
+
+        Returns:
+            None
+        """
+
+        self.history = StreamHistory()
+        self.history.game_names = {1: 'Game One', 2: 'Game Two'}
+        buckets = {
+            'popular': [(0, 3600, 100, 150, 1), (7200, 1800, 400, 500, 2), (9000, 1800, 200, 210, 2)],
+            'quiet': [(0, 7200, 10, 12, 1), (100000, 3600, 20, 25, 0)]
+        }
+
+        for username, rows in buckets.items():
+            archive = RingBuffer(StreamHistory.ARCHIVE_COLUMNS, 10)
+            for row in rows:
+                archive.append(*row)
+
+            self.history.archives[username] = archive
+
+    def test_leaderboard(self):
+        """
+        Test streamers are ranked by time weighted average viewers
+
+        Returns:
+            None
+        """
+
+        # When
+        by_viewers = leaderboard(self.history)
+        by_hours = leaderboard(self.history, key='hours', limit=1)
+        recent = leaderboard(self.history, since=50000)
+
+        # Then
+        self.assertEqual(by_viewers, [
+            StreamStats('popular', 2.0, 200.0, 500),
+            StreamStats('quiet', 3.0, 40 / 3, 25)
+        ])
+        self.assertEqual([stats.username for stats in by_hours], ['quiet'])
+        self.assertEqual(recent, [StreamStats('quiet', 1.0, 20.0, 25)])
+
+    def test_stream_stats(self):
+        """
+        Test the stats of one streamer include their top games
+
+        Returns:
+            None
+        """
+
+        # When
+        stats = stream_stats(self.history, 'Popular')
+        missing = stream_stats(self.history, 'unknown')
+        old = stream_stats(self.history, 'popular', since=50000)
+
+        # Then
+        self.assertEqual(stats.hours, 2.0)
+        self.assertEqual(stats.peak_viewers, 500)
+        self.assertEqual(stats.top_games, [('Game One', 1.0), ('Game Two', 1.0)])
+        self.assertIsNone(missing)
+        self.assertIsNone(old)
+
+    def test_empty_history(self):
+        """
+        Test an empty history has an empty leaderboard
+
+        Returns:
+            None
+        """
+
+        self.assertEqual(leaderboard(StreamHistory()), [])
@@ -1,8 +1,17 @@
 """The test for the streamer file in the twitch announce bot module"""
 from unittest.mock import Mock
 import unittest
-from streamer import Role, RoleMapper, MapperInterface, Streamer, StreamerInterface, StreamerMapper
-from twitch_api import TwitchHandlerInterface
+from streamer import (
+    MapperInterface,
+    Role,
+    RoleMapper,
+    Streamer,
+    StreamerFilter,
+    StreamerInterface,
+    StreamerMapper,
+    StreamerRegistry
+)
+from twitch_api import TwitchHandlerInterface, TwitchStreamInterface
 from whitelist import DatasourceHandlerInterface
 
 
@@ -66,13 +75,66 @@ class TestStreamer(unittest.TestCase):
 
         # When
         successful_match = streamer.is_match('Test Streamer')
+        case_insensitive_match = streamer.is_match('test streamer')
         failed_match = streamer.is_match('Failed Streamer')
 
         # Then
         self.assertTrue(successful_match)
+        self.assertTrue(case_insensitive_match)
         self.assertFalse(failed_match)
 
 
+class TestStreamerFilter(unittest.TestCase):
+    """Test filtering the streamers to list"""
+
+    def test_matches(self):
+        """
+        Test streamers are selected by live state, any of the roles and the game
+
+        Returns:
+            None
+        """
+
+        # Give
+        stream = Mock(spec=TwitchStreamInterface)
+        stream.game_name = 'Just Chatting'
+        offline = Streamer(1, 'Offline', [Role(10, 'Chatters')])
+        chatting = Streamer(2, 'Chatting', [Role(10, 'Chatters')], stream)
+        gaming = Streamer(3, 'Gaming', [Role(20, 'Gamers')], Mock(spec=TwitchStreamInterface))
+        gaming.twitch_stream.game_name = 'Minecraft'
+        streamers = [offline, chatting, gaming]
+
+        # When
+        filters = [
+            [
+                streamer.username for streamer in streamers
+                if StreamerFilter.from_arguments(arguments, game).matches(streamer)
+            ]
+            for arguments, game in [
+                ((), ''),
+                (('LIVE',), ''),
+                ((Role(10, 'Chatters'),), ''),
+                (('live', Role(20, 'Gamers')), ''),
+                ((), 'chat'),
+                ((Role(20, 'Gamers'),), 'MINE'),
+                ((), '"Just Chatting"'),
+                ((), 'Just Minecraft')
+            ]
+        ]
+
+        # Then
+        self.assertEqual(filters, [
+            ['Offline', 'Chatting', 'Gaming'],
+            ['Chatting', 'Gaming'],
+            ['Offline', 'Chatting'],
+            ['Gaming'],
+            ['Chatting'],
+            ['Gaming'],
+            ['Chatting'],
+            []
+        ])
+
+
 class TestStreamerMapper(unittest.TestCase):
     """Test the streamer mapper concretion"""
 
@@ -123,7 +185,7 @@ class TestStreamerMapper(unittest.TestCase):
         }
 
         twitch_handler = Mock(spec=TwitchHandlerInterface)
-        twitch_handler.get_stream.return_value = None
+        twitch_handler.get_streams.return_value = {}
 
         streamer_mapper = StreamerMapper(datasource, twitch_handler)
 
@@ -131,9 +193,11 @@ class TestStreamerMapper(unittest.TestCase):
         mapped_streamers = streamer_mapper.map()
 
         # Then
+        twitch_handler.get_streams.assert_called_once_with(['HelloWorld'])
         self.assertTrue(isinstance(mapped_streamers[0], StreamerInterface))
         self.assertEqual(mapped_streamers[0].id, 1)
         self.assertEqual(mapped_streamers[0].username, 'HelloWorld')
+        self.assertIsNone(mapped_streamers[0].twitch_stream)
 
         self.assertTrue(isinstance(mapped_streamers[0].roles, list))
 
@@ -199,3 +263,167 @@ class TestRoleMapper(unittest.TestCase):
         self.assertTrue(isinstance(mapped_roles[1], Role))
         self.assertEqual(mapped_roles[1].id, 2)
         self.assertEqual(mapped_roles[1].name, 'MockObject')
+
+
+class TestStreamerRegistry(unittest.TestCase):
+    """Test the streamer registry"""
+
+    def setUp(self):
+        """
+        Create a registry over a whitelist of one streamer
+
+        Returns:
+            None
+        """
+
+        self.datasource = Mock(spec=DatasourceHandlerInterface)
+        self.datasource.get_contents.return_value = {
+            "Streamers": [
+                {
+                    "user_id": 1,
+                    "username": "HelloWorld",
+                    "roles": [
+                        {
+                            "role_id": 1,
+                            "name": "UnitTest"
+                        }
+                    ]
+                }
+            ]
+        }
+        self.registry = StreamerRegistry(self.datasource)
+
+    def test_match(self):
+        """
+        Test streamers are matched by login ignoring case and by twitch user id once seen
+
+        Returns:
+            None
+        """
+
+        # Give
+        stream = Mock(spec=TwitchStreamInterface)
+        stream.user_login = 'helloworld'
+        stream.user_id = '123'
+
+        # When
+        unknown_twitch_id = self.registry.match_twitch_id(123)
+        observed = self.registry.observe(stream)
+
+        # Then
+        self.datasource.add_change_listener.assert_called_once_with(self.registry.apply_change)
+        self.assertEqual(len(self.registry), 1)
+        self.assertEqual(self.registry.match('HELLOWORLD ').id, 1)
+        self.assertEqual(self.registry.get(1).username, 'HelloWorld')
+        self.assertIsNone(self.registry.match('unknown'))
+        self.assertIsNone(unknown_twitch_id)
+        self.assertIs(observed, self.registry.match('helloworld'))
+        self.assertIs(self.registry.match_twitch_id(123), observed)
+
+    def test_apply_change(self):
+        """
+        Test whitelist changes are applied incrementally
+
+        Returns:
+            None
+        """
+
+        # Give
+        streamer = self.registry.get(1)
+
+        # When
+        self.registry.apply_change({
+            'op': 'add_streamer',
+            'streamer': {'user_id': 2, 'username': 'MockObject', 'roles': []}
+        })
+        self.registry.apply_change({
+            'op': 'add_role',
+            'user_id': 1,
+            'role': {'role_id': 2, 'name': 'MockObject'}
+        })
+        self.registry.apply_change({'op': 'delete_role', 'user_id': 1, 'role_id': 1})
+        self.registry.apply_change({'op': 'delete_streamer', 'user_id': 2})
+
+        # Then
+        self.assertIs(self.registry.get(1), streamer)
+        self.assertEqual(streamer.roles, [Role(2, 'MockObject')])
+        self.assertIsNone(self.registry.match('mockobject'))
+        self.assertIsNone(self.registry.get(2))
+
+    def test_apply_bulk_change(self):
+        """
+        Test bulk role changes are applied to every streamer they name
+
+        Returns:
+            None
+        """
+
+        # Give
+        self.registry.apply_change({
+            'op': 'add_streamer',
+            'streamer': {'user_id': 2, 'username': 'MockObject', 'roles': []}
+        })
+
+        # When
+        self.registry.apply_change({
+            'op': 'add_role_all',
+            'user_ids': [1, 2, 3],
+            'role': {'role_id': 2, 'name': 'Everyone'}
+        })
+        added = [self.registry.get(user_id).roles[:] for user_id in (1, 2)]
+        self.registry.apply_change({'op': 'purge_role', 'role_id': 1})
+
+        # Then
+        self.assertEqual(added, [
+            [Role(1, 'UnitTest'), Role(2, 'Everyone')],
+            [Role(2, 'Everyone')]
+        ])
+        self.assertEqual(self.registry.get(1).roles, [Role(2, 'Everyone')])
+        self.assertEqual(self.registry.get(2).roles, [Role(2, 'Everyone')])
+
+    def test_reload(self):
+        """
+        Test the indexes are rebuilt when the whitelist was reloaded
+
+        Returns:
+            None
+        """
+
+        # When
+        self.registry.apply_change({
+            'op': 'reload',
+            'contents': {'Streamers': [{'user_id': 2, 'username': 'MockObject', 'roles': []}]}
+        })
+
+        # Then
+        self.assertIsNone(self.registry.get(1))
+        self.assertEqual(self.registry.match('mockobject').id, 2)
+
+    def test_readers_are_not_changed_under_them(self):
+        """
+        Test roles and indexes held by a reader stay as they were while changes are applied
+
+        Returns:
+            None
+        """
+
+        # Give
+        roles = self.registry.get(1).roles
+        by_login = self.registry.by_login
+
+        # When
+        self.registry.apply_change({
+            'op': 'add_role',
+            'user_id': 1,
+            'role': {'role_id': 2, 'name': 'MockObject'}
+        })
+        self.registry.apply_change({'op': 'rename_role', 'role_id': 1, 'name': 'Renamed'})
+        self.registry.apply_change({
+            'op': 'reload',
+            'contents': {'Streamers': [{'user_id': 2, 'username': 'MockObject', 'roles': []}]}
+        })
+
+        # Then
+        self.assertEqual(roles, [Role(1, 'UnitTest')])
+        self.assertEqual(list(by_login), ['helloworld'])
+        self.assertEqual(self.registry.get_logins(), ['mockobject'])
@@ -0,0 +1,109 @@
+"""The test for the tracing file in the twitch announce bot module"""
+from unittest.mock import Mock, patch
+import asyncio
+import json
+import os
+from offload import ExecutorDatasourceHandler
+from tests.datasource import DatasourceTestCase
+from tracing import NOOP_SPAN, FileSpanExporter, SpanExporterInterface, Tracer, traced
+from whitelist import JsonDatasourceHandler
+
+
+class TestTracer(DatasourceTestCase):
+    """Test tracing commands through the datasource"""
+
+    def setUp(self):
+        """
+        Point the datasource and the trace file at a temporary directory
+
+        Returns:
+            None
+        """
+
+        super().setUp()
+        self.trace_file = os.path.join(self.directory.name, 'traces.jsonl')
+        self.tracer = Tracer(FileSpanExporter(self.trace_file))
+
+    def test_trace_is_exported(self):
+        """
+        Test the spans of a command and the datasource work it awaits form one OTLP trace
+
+        Returns:
+            None
+        """
+
+        # Give
+        executor_handler = ExecutorDatasourceHandler(JsonDatasourceHandler(self.settings))
+
+        async def command() -> None:
+            with self.tracer.span('command.add_streamer', **{'discord.guild': 1}):
+                await executor_handler.add_streamer(1, 'HelloWorld')
+
+        # When
+        with patch('tracing.get_tracer', return_value=self.tracer):
+            asyncio.run(command())
+        executor_handler.close()
+
+        # Then
+        with open(self.trace_file, encoding='utf8') as file:
+            requests = [json.loads(line) for line in file]
+
+        self.assertEqual(len(requests), 1)
+        resource_spans = requests[0]['resourceSpans'][0]
+        self.assertEqual(
+            resource_spans['resource']['attributes'][0],
+            {'key': 'service.name', 'value': {'stringValue': 'announce-twitch-bot'}}
+        )
+        spans = {span['name']: span for span in resource_spans['scopeSpans'][0]['spans']}
+        self.assertTrue({
+            'command.add_streamer', 'whitelist.exists', 'whitelist.load_contents',
+            'whitelist.create', 'whitelist.append_change'
+        } <= set(spans))
+        self.assertEqual({span['traceId'] for span in spans.values()}, {spans['command.add_streamer']['traceId']})
+        self.assertEqual(spans['command.add_streamer']['parentSpanId'], '')
+        span_ids = {span['spanId'] for span in spans.values()}
+        for name, span in spans.items():
+            if name != 'command.add_streamer':
+                self.assertIn(span['parentSpanId'], span_ids)
+        self.assertIn(
+            {'key': 'whitelist.op', 'value': {'stringValue': 'add_streamer'}},
+            spans['whitelist.append_change']['attributes']
+        )
+        self.assertIn(
+            {'key': 'discord.guild', 'value': {'intValue': '1'}},
+            spans['command.add_streamer']['attributes']
+        )
+
+    def test_errors_and_disabled(self):
+        """
+        Test an exception is recorded as the error of its span and nothing is traced when disabled
+
+        Returns:
+            None
+        """
+
+        # Give
+        exporter = Mock(spec=SpanExporterInterface)
+        tracer = Tracer(exporter)
+        disabled = Tracer()
+
+        @traced('failing')
+        def failing() -> None:
+            raise ValueError('Broken')
+
+        # When
+        with patch('tracing.get_tracer', return_value=tracer), self.assertRaises(ValueError):
+            failing()
+        with patch('tracing.get_tracer', return_value=disabled), disabled.span('ignored') as span:
+            span.set_attribute('key', 'value')
+        with patch('tracing.get_tracer', return_value=disabled), self.assertRaises(ValueError):
+            failing()
+
+        # Then
+        exported = exporter.export.call_args.args[0]
+        self.assertEqual(len(exported), 1)
+        self.assertEqual(exported[0].to_otlp()['status'], {'code': 2, 'message': 'ValueError: Broken'})
+        self.assertIs(span, NOOP_SPAN)
+        self.assertEqual(NOOP_SPAN.attributes, {})
+        self.assertIsNone(NOOP_SPAN.error)
+        self.assertFalse(os.path.exists(self.trace_file))
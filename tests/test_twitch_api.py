@@ -2,7 +2,15 @@
 import datetime
 import unittest
 from unittest.mock import patch
-from twitch_api import TwitchHandler, TwitchHandlerInterface, TwitchStream, TwitchStreamInterface
+import requests
+from settings import Settings
+from twitch_api import (
+    TwitchGame,
+    TwitchHandler,
+    TwitchHandlerInterface,
+    TwitchStream,
+    TwitchStreamInterface
+)
 
 
 class TestTwitchStream(unittest.TestCase):
@@ -160,3 +168,166 @@ class TestTwitchHandler(unittest.TestCase):
 
             # Then
             self.assertTrue(isinstance(stream, TwitchStreamInterface))
+
+    def test_get_streams(self):
+        """
+        Test the twitch handler get streams method looks up usernames in batches
+
+        Returns:
+            None
+        """
+
+        with patch('twitch.TwitchHelix', autospec=True) as mock_twitch_client:
+            # Give
+            twitch_client = mock_twitch_client.return_value
+            twitch_client.get_oauth.return_value = True
+
+            class ResponseObject:
+                """A mock object for the response of get_streams"""
+
+            response_object = ResponseObject()
+            response_object.id = 1
+            response_object.user_id = 1
+            response_object.user_login = 'Test_Stream'
+            response_object.user_name = 'Test_Stream'
+            response_object.game_id = 1
+            response_object.game_name = 'Test Game'
+            response_object.type = 'Live'
+            response_object.title = 'This is a test stream'
+            response_object.viewer_count = 15
+            response_object.started_at = datetime.datetime.now()
+            response_object.language = 'English'
+            response_object.thumbnail_url = 'imagepath'
+            response_object.is_mature = False
+            twitch_client.get_streams.side_effect = [[response_object], []]
+
+            twitch_handler = TwitchHandler(Settings(twitch_batch_size=2))
+
+            # When
+            streams = twitch_handler.get_streams(['test_stream', 'offline', 'also_offline'])
+
+            # Then
+            self.assertEqual(twitch_client.get_streams.call_count, 2)
+            twitch_client.get_streams.assert_called_with(user_logins=['also_offline'], page_size=1)
+            self.assertEqual(list(streams), ['test_stream'])
+            self.assertTrue(isinstance(streams['test_stream'], TwitchStreamInterface))
+
+    def test_get_games(self):
+        """
+        Test the twitch handler get games method looks up game ids in batches
+
+        Returns:
+            None
+        """
+
+        with patch('twitch.TwitchHelix', autospec=True) as mock_twitch_client:
+            # Give
+            twitch_client = mock_twitch_client.return_value
+            twitch_client.get_oauth.return_value = True
+
+            class ResponseObject:
+                """A mock object for the response of get_games"""
+
+            response_object = ResponseObject()
+            response_object.id = '33214'
+            response_object.name = 'Fortnite'
+            response_object.box_art_url = 'https://box/art-{width}x{height}.jpg'
+            twitch_client.get_games.side_effect = [[response_object], []]
+
+            twitch_handler = TwitchHandler(Settings(twitch_batch_size=2))
+
+            # When
+            games = twitch_handler.get_games([33214, '1', '2'])
+
+            # Then
+            self.assertEqual(twitch_client.get_games.call_count, 2)
+            twitch_client.get_games.assert_called_with(game_ids=['2'])
+            self.assertEqual(games, {
+                '33214': TwitchGame('33214', 'Fortnite', 'https://box/art-{width}x{height}.jpg')
+            })
+            self.assertEqual(games['33214'].box_art(52, 72), 'https://box/art-52x72.jpg')
+
+    def test_expired_token(self):
+        """
+        Test the twitch handler authenticates again once a request is rejected as unauthorized
+
+        Returns:
+            None
+        """
+
+        with patch('twitch.TwitchHelix', autospec=True) as mock_twitch_client:
+            # Give
+            twitch_client = mock_twitch_client.return_value
+            unauthorized = requests.Response()
+            unauthorized.status_code = 401
+            unavailable = requests.Response()
+            unavailable.status_code = 503
+            twitch_client.get_streams.side_effect = [
+                requests.HTTPError(response=unauthorized),
+                [],
+                requests.HTTPError(response=unavailable)
+            ]
+
+            twitch_handler = TwitchHandler()
+
+            # When
+            streams = twitch_handler.get_streams(['test_stream'])
+            with self.assertRaises(requests.HTTPError):
+                twitch_handler.get_streams(['test_stream'])
+
+            # Then
+            self.assertEqual(streams, {})
+            self.assertEqual(twitch_client.get_oauth.call_count, 2)
+            self.assertEqual(twitch_client.get_streams.call_count, 3)
+
+    def test_lazy_authentication(self):
+        """
+        Test the twitch handler only authenticates once it is first used
+
+        Returns:
+            None
+        """
+
+        with patch('twitch.TwitchHelix', autospec=True) as mock_twitch_client:
+            # Give
+            twitch_client = mock_twitch_client.return_value
+            twitch_client.get_streams.return_value = []
+
+            # When
+            twitch_handler = TwitchHandler()
+            created = twitch_client.get_oauth.call_count
+            twitch_handler.get_streams(['test_stream'])
+            twitch_handler.get_streams(['test_stream'])
+
+            # Then
+            self.assertEqual(created, 0)
+            self.assertEqual(twitch_client.get_oauth.call_count, 1)
+
+    def test_request_timeout(self):
+        """
+        Test every request of the twitch client is sent with a connect and read timeout
+
+        Returns:
+            None
+        """
+
+        with patch('requests.sessions.Session.request') as request:
+            # Give
+            response = request.return_value
+            response.status_code = 200
+            response.headers = {}
+            response.json.return_value = {'access_token': 'token', 'data': [], 'pagination': {}}
+            twitch_handler = TwitchHandler(
+                Settings(twitch_app_id='id', twitch_app_secret='secret', twitch_timeout=3)
+            )
+
+            # When
+            streams = twitch_handler.get_streams(['test_stream'])
+
+            # Then
+            self.assertEqual(streams, {})
+            self.assertEqual(
+                [call.kwargs['method'] for call in request.call_args_list], ['post', 'get']
+            )
+            for call in request.call_args_list:
+                self.assertEqual(call.kwargs['timeout'], (3, 3))
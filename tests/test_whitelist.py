@@ -1,12 +1,40 @@
 """The test for the whitelist file in the twitch announce bot module"""
-from unittest.mock import Mock, patch, mock_open
+from unittest.mock import MagicMock, Mock, patch, mock_open
+import asyncio
+import json
+import multiprocessing
+import fcntl
+import os
+import threading
+import time
 import unittest
-from whitelist import DatasourceHandlerInterface, NotFoundException, JsonDatasourceHandler
+from offload import AsyncDatasourceHandlerInterface, ExecutorDatasourceHandler
+from settings import Settings
+from streamer import StreamerRegistry
+from tests.datasource import DatasourceTestCase
+from watcher import DatasourceWatcher
+from whitelist import (
+    DatasourceHandlerInterface,
+    NotFoundException,
+    JsonDatasourceHandler
+)
 
 
 class TestJsonDatasourceHandler(unittest.TestCase):
     """Test the json datasource handler concretion"""
 
+    def setUp(self):
+        """
+        Stub out the datasource file lock as these tests have no datasource on disk
+
+        Returns:
+            None
+        """
+
+        locked = patch.object(JsonDatasourceHandler, '_JsonDatasourceHandler__locked', MagicMock())
+        locked.start()
+        self.addCleanup(locked.stop)
+
     def test_instance(self):
         """
         Test the json datasource handler instance
@@ -71,13 +99,7 @@ class TestJsonDatasourceHandler(unittest.TestCase):
         role_data = '{"role_id": "<role_id:placeholder>", "name": "<name:placeholder>"}'
 
         with patch("builtins.open", mock_open(read_data=role_data)):
-            json_datasource_handler._JsonDatasourceHandler__load_contents = Mock()
-            json_datasource_handler._JsonDatasourceHandler__load_contents.return_value = new_streamer
-
-            json_datasource_handler.get_streamer_index = Mock()
-            json_datasource_handler.get_streamer_index.return_value = 0
-
-            json_datasource_handler._JsonDatasourceHandler__save_file = Mock()
+            json_datasource_handler._JsonDatasourceHandler__append_change = Mock()
 
             # When
             json_datasource_handler.add_role_to_streamer(1, 2, 'MockObject')
@@ -85,8 +107,11 @@ class TestJsonDatasourceHandler(unittest.TestCase):
             # Then
             json_datasource_handler.find.assert_called_with(1)
             json_datasource_handler.role_exists.assert_called_with(old_streamer['roles'], 2)
-            json_datasource_handler.get_streamer_index.assert_called_with(1)
-            json_datasource_handler._JsonDatasourceHandler__save_file.assert_called_with(new_streamer)
+            json_datasource_handler._JsonDatasourceHandler__append_change.assert_called_with({
+                'op': 'add_role',
+                'user_id': 1,
+                'role': new_streamer['Streamers'][0]['roles'][1]
+            })
 
     def test_add_role_to_streamer_failure(self):
         """
@@ -167,16 +192,7 @@ class TestJsonDatasourceHandler(unittest.TestCase):
         json_datasource_handler.role_exists = Mock()
         json_datasource_handler.role_exists.return_value = True
 
-        json_datasource_handler.get_role_index = Mock()
-        json_datasource_handler.get_role_index.return_value = 1
-
-        json_datasource_handler._JsonDatasourceHandler__load_contents = Mock()
-        json_datasource_handler._JsonDatasourceHandler__load_contents.return_value = new_streamer
-
-        json_datasource_handler.get_streamer_index = Mock()
-        json_datasource_handler.get_streamer_index.return_value = 0
-
-        json_datasource_handler._JsonDatasourceHandler__save_file = Mock()
+        json_datasource_handler._JsonDatasourceHandler__append_change = Mock()
 
         # When
         json_datasource_handler.delete_role_from_streamer(1, 2)
@@ -184,9 +200,13 @@ class TestJsonDatasourceHandler(unittest.TestCase):
         # Then
         json_datasource_handler.find.assert_called_with(1)
         json_datasource_handler.role_exists.assert_called_with(old_streamer['roles'], 2)
-        json_datasource_handler.get_role_index.assert_called_with(old_streamer['roles'], 2)
-        json_datasource_handler.get_streamer_index.assert_called_with(1)
-        json_datasource_handler._JsonDatasourceHandler__save_file.assert_called_with(new_streamer)
+        json_datasource_handler._JsonDatasourceHandler__append_change.assert_called_with(
+            {'op': 'delete_role', 'user_id': 1, 'role_id': 2}
+        )
+
+        contents = {"Streamers": [old_streamer]}
+        json_datasource_handler.apply_change(contents, {'op': 'delete_role', 'user_id': 1, 'role_id': 2})
+        self.assertEqual(contents, new_streamer)
 
     def test_delete_role_from_streamer_failure(self):
         """
@@ -252,19 +272,17 @@ class TestJsonDatasourceHandler(unittest.TestCase):
         json_datasource_handler.exists = Mock()
         json_datasource_handler.exists.return_value = True
 
-        json_datasource_handler._JsonDatasourceHandler__load_contents = Mock()
-        json_datasource_handler._JsonDatasourceHandler__load_contents.return_value = old_streamer
-
-        json_datasource_handler.get_streamer_index = Mock()
-        json_datasource_handler.get_streamer_index.return_value = 0
-
-        json_datasource_handler._JsonDatasourceHandler__save_file = Mock()
+        json_datasource_handler._JsonDatasourceHandler__append_change = Mock()
 
         # When
         json_datasource_handler.delete_streamer(1)
+        json_datasource_handler.apply_change(old_streamer, {'op': 'delete_streamer', 'user_id': 1})
 
         # Then
-        json_datasource_handler._JsonDatasourceHandler__save_file.assert_called_with(new_streamer)
+        json_datasource_handler._JsonDatasourceHandler__append_change.assert_called_with(
+            {'op': 'delete_streamer', 'user_id': 1}
+        )
+        self.assertEqual(old_streamer, new_streamer)
 
     def test_delete_streamer_failure(self):
         """
@@ -466,3 +484,559 @@ class TestJsonDatasourceHandler(unittest.TestCase):
         # Then
         self.assertTrue(successful_response)
         self.assertFalse(failed_response)
+
+
+class JsonDatasourceTestCase(DatasourceTestCase):
+    """Base test case for json datasource handler tests against real files"""
+
+    settings_fields = {'journal_compact_threshold': 3}
+
+
+class TestJsonDatasourceHandlerJournal(JsonDatasourceTestCase):
+    """Test the json datasource handler change journal against real files"""
+
+    def test_mutations_are_journaled_and_replayed(self):
+        """
+        Test mutations append to the journal without rewriting the snapshot
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        json_datasource_handler.get_contents()
+        with open(self.datasource, encoding='utf8') as datasource:
+            snapshot = datasource.read()
+
+        # When
+        json_datasource_handler.add_streamer(1, 'HelloWorld')
+        json_datasource_handler.add_role_to_streamer(1, 2, 'MockObject')
+
+        # Then
+        with open(self.datasource, encoding='utf8') as datasource:
+            self.assertEqual(datasource.read(), snapshot)
+
+        with open(f'{self.datasource}.journal', encoding='utf8') as journal:
+            changes = [json.loads(line) for line in journal]
+
+        self.assertEqual([change['op'] for change in changes], ['add_streamer', 'add_role'])
+        self.assertTrue(all('at' in change for change in changes))
+        self.assertEqual(JsonDatasourceHandler(self.settings).get_contents(), {
+            "Streamers": [
+                {
+                    "user_id": 1,
+                    "username": "HelloWorld",
+                    "roles": [
+                        {
+                            "role_id": 2,
+                            "name": "MockObject"
+                        }
+                    ]
+                }
+            ]
+        })
+
+    def test_append_after_torn_tail(self):
+        """
+        Test a change appended after a crash mid append is kept along with those before it
+
+        Returns:
+            None
+        """
+
+        # Give
+        JsonDatasourceHandler(self.settings).add_streamer(1, 'HelloWorld')
+        with open(f'{self.datasource}.journal', 'ab') as journal:
+            journal.write(b'{"op": "add_streamer", "streamer": {"user_')
+
+        # When
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        json_datasource_handler.add_streamer(3, 'MockObject')
+        reloaded = JsonDatasourceHandler(self.settings).get_contents()
+
+        # Then
+        self.assertEqual(
+            [streamer['user_id'] for streamer in json_datasource_handler.get_contents()['Streamers']],
+            [1, 3]
+        )
+        self.assertEqual([streamer['user_id'] for streamer in reloaded['Streamers']], [1, 3])
+
+    def test_compaction(self):
+        """
+        Test the journal is folded into the snapshot once the threshold is reached
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+
+        # When
+        json_datasource_handler.add_streamer(1, 'HelloWorld')
+        json_datasource_handler.add_streamer(2, 'MockObject')
+        json_datasource_handler.delete_streamer(1)
+
+        # Then
+        self.assertEqual(os.path.getsize(f'{self.datasource}.journal'), 0)
+        with open(self.datasource, encoding='utf8') as datasource:
+            contents = json.load(datasource)
+
+        self.assertEqual(contents, {
+            "Streamers": [
+                {
+                    "user_id": 2,
+                    "username": "MockObject",
+                    "roles": []
+                }
+            ]
+        })
+
+    def test_failed_compaction_keeps_snapshot(self):
+        """
+        Test a compaction failing part way leaves the snapshot and journal intact
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        json_datasource_handler.add_streamer(1, 'HelloWorld')
+        json_datasource_handler.add_streamer(2, 'MockObject')
+        with open(self.datasource, encoding='utf8') as datasource:
+            snapshot = datasource.read()
+
+        # When
+        with patch('whitelist.os.replace', side_effect=OSError('Disk full')):
+            with self.assertRaises(OSError):
+                json_datasource_handler.delete_streamer(1)
+
+        # Then
+        with open(self.datasource, encoding='utf8') as datasource:
+            self.assertEqual(datasource.read(), snapshot)
+
+        contents = JsonDatasourceHandler(self.settings).get_contents()
+        self.assertEqual([streamer['user_id'] for streamer in contents['Streamers']], [2])
+
+    def test_replay_is_idempotent(self):
+        """
+        Test replaying changes already in the snapshot does not duplicate them
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        contents = {"Streamers": []}
+        streamer = {"user_id": 1, "username": "HelloWorld", "roles": []}
+        role = {"role_id": 2, "name": "MockObject"}
+
+        # When
+        for _ in range(2):
+            json_datasource_handler.apply_change(contents, {'op': 'add_streamer', 'streamer': streamer})
+            json_datasource_handler.apply_change(contents, {'op': 'add_role', 'user_id': 1, 'role': role})
+
+        # Then
+        self.assertEqual(contents, {"Streamers": [{"user_id": 1, "username": "HelloWorld", "roles": [role]}]})
+        with self.assertRaises(ValueError):
+            json_datasource_handler.apply_change(contents, {'op': 'rename_streamer'})
+
+    def test_revision(self):
+        """
+        Test the revision is bumped by every mutation, including those of other handlers
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        initial = json_datasource_handler.get_snapshot().revision
+
+        # When
+        json_datasource_handler.add_streamer(1, 'HelloWorld')
+        added = json_datasource_handler.get_snapshot().revision
+        unchanged = json_datasource_handler.get_snapshot().revision
+        JsonDatasourceHandler(self.settings).add_role_to_streamer(1, 2, 'MockObject')
+        external = json_datasource_handler.get_snapshot().revision
+
+        # Then
+        self.assertGreater(added, initial)
+        self.assertEqual(unchanged, added)
+        self.assertGreater(external, added)
+
+    def test_snapshots(self):
+        """
+        Test a snapshot held by a reader is unchanged by later writes which share the rest
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        for user_id in (1, 2):
+            json_datasource_handler.add_streamer(user_id, f'Streamer{user_id}')
+        snapshot = json_datasource_handler.get_snapshot()
+
+        # When
+        unchanged = json_datasource_handler.get_snapshot()
+        json_datasource_handler.add_role_to_streamer(2, 9, 'Role')
+        json_datasource_handler.add_streamer(3, 'Streamer3')
+        changed = json_datasource_handler.get_snapshot()
+
+        # Then
+        self.assertIs(unchanged, snapshot)
+        self.assertEqual([streamer['roles'] for streamer in snapshot.streamers], [[], []])
+        self.assertEqual(len(changed.streamers), 3)
+        self.assertIs(changed.streamers[0], snapshot.streamers[0])
+        self.assertEqual(changed.streamers[1]['roles'], [{'role_id': 9, 'name': 'Role'}])
+        self.assertGreater(changed.revision, snapshot.revision)
+
+    def test_change_listeners(self):
+        """
+        Test listeners are passed each change made and a reload for changes made elsewhere
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        json_datasource_handler.get_contents()
+        changes = []
+        json_datasource_handler.add_change_listener(changes.append)
+
+        # When
+        json_datasource_handler.add_streamer(1, 'HelloWorld')
+        JsonDatasourceHandler(self.settings).add_role_to_streamer(1, 2, 'MockObject')
+        json_datasource_handler.get_contents()
+
+        # Then
+        self.assertEqual([change['op'] for change in changes], ['add_streamer', 'reload'])
+        self.assertEqual(changes[1]['contents']['Streamers'][0]['roles'][0]['role_id'], 2)
+
+
+    def test_set_announcement(self):
+        """
+        Test a streamer's announcement template is journaled, shown to readers and cleared
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        json_datasource_handler.add_streamer(1, 'HelloWorld')
+        before = json_datasource_handler.get_snapshot()
+        registry = StreamerRegistry(json_datasource_handler)
+
+        # When
+        json_datasource_handler.set_announcement(1, '{mention} is live {url}')
+        reloaded = JsonDatasourceHandler(self.settings).find(1)
+        announcement = registry.get(1).announcement
+        json_datasource_handler.set_announcement(1, None)
+
+        # Then
+        self.assertEqual(reloaded['announcement'], '{mention} is live {url}')
+        self.assertEqual(announcement, '{mention} is live {url}')
+        self.assertIsNone(registry.get(1).announcement)
+        self.assertNotIn('announcement', before.streamers[0])
+        self.assertNotIn('announcement', JsonDatasourceHandler(self.settings).find(1))
+        with self.assertRaises(NotFoundException):
+            json_datasource_handler.set_announcement(2, None)
+
+class TestJsonDatasourceHandlerRoles(JsonDatasourceTestCase):
+    """Test the json datasource handler role index and bulk role operations"""
+
+    def test_bulk_role_operations(self):
+        """
+        Test a role is added to and purged from many streamers with one change each
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        for user_id in (1, 2, 3, 4):
+            json_datasource_handler.add_streamer(user_id, f'Streamer{user_id}')
+        json_datasource_handler.add_role_to_streamer(1, 9, 'Role')
+        changes = []
+        json_datasource_handler.add_change_listener(changes.append)
+
+        # When
+        added = json_datasource_handler.add_role_to_streamers(9, 'Role', [1, 2, 3, 5])
+        members = json_datasource_handler.get_role_members(9)
+        reloaded = JsonDatasourceHandler(self.settings).get_role_members(9)
+        purged = json_datasource_handler.delete_role_from_streamers(9)
+        again = json_datasource_handler.delete_role_from_streamers(9)
+
+        # Then
+        self.assertEqual(added, [2, 3])
+        self.assertEqual(members, {1, 2, 3})
+        self.assertEqual(reloaded, {1, 2, 3})
+        self.assertEqual(purged, [1, 2, 3])
+        self.assertEqual(again, [])
+        self.assertEqual([change['op'] for change in changes], ['add_role_all', 'purge_role'])
+        self.assertEqual(json_datasource_handler.get_role_members(9), set())
+        self.assertEqual(
+            [streamer['roles'] for streamer in JsonDatasourceHandler(self.settings).get_contents()['Streamers']],
+            [[], [], [], []]
+        )
+
+    def test_reconcile(self):
+        """
+        Test departed streamers, deleted roles and renamed roles are written as one batch
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        for user_id in (1, 2, 3):
+            json_datasource_handler.add_streamer(user_id, f'Streamer{user_id}')
+        json_datasource_handler.add_role_to_streamers(8, 'Old', [2, 3])
+        json_datasource_handler.add_role_to_streamers(9, 'Doomed', [1, 3])
+        changes = []
+        json_datasource_handler.add_change_listener(changes.append)
+
+        # When
+        made = json_datasource_handler.reconcile([1, 4], [9, 10], {8: 'New', 9: 'Gone', 11: 'Nobody'})
+        clean = json_datasource_handler.reconcile([1], [9], {})
+
+        # Then
+        self.assertEqual(made, 3)
+        self.assertEqual(clean, 0)
+        self.assertEqual([change['op'] for change in changes], ['batch'])
+        self.assertEqual(
+            [change['op'] for change in changes[0]['changes']],
+            ['delete_streamer', 'purge_role', 'rename_role']
+        )
+        self.assertEqual(
+            JsonDatasourceHandler(self.settings).get_contents()['Streamers'],
+            [
+                {'user_id': 2, 'username': 'Streamer2', 'roles': [{'role_id': 8, 'name': 'New'}]},
+                {'user_id': 3, 'username': 'Streamer3', 'roles': [{'role_id': 8, 'name': 'New'}]}
+            ]
+        )
+
+
+def add_streamers(settings: Settings, user_ids: range) -> None:
+    """
+    Adds a streamer for each user id, used as the target of a separate process
+
+    Args:
+        settings (Settings): The settings pointing at the datasource
+        user_ids (range): The user ids to add
+
+    Returns:
+        None
+    """
+
+    json_datasource_handler = JsonDatasourceHandler(settings)
+    for user_id in user_ids:
+        json_datasource_handler.add_streamer(user_id, f'Streamer{user_id}')
+
+
+class TestJsonDatasourceHandlerConcurrency(JsonDatasourceTestCase):
+    """Test the json datasource handler shared between processes"""
+
+    def test_concurrent_writers_do_not_lose_updates(self):
+        """
+        Test streamers added from several processes at once are all kept
+
+        Returns:
+            None
+        """
+
+        # Give
+        processes = [
+            multiprocessing.get_context('fork').Process(
+                target=add_streamers,
+                args=(self.settings, range(index * 10, index * 10 + 10))
+            )
+            for index in range(4)
+        ]
+
+        # When
+        for process in processes:
+            process.start()
+
+        for process in processes:
+            process.join()
+
+        # Then
+        contents = JsonDatasourceHandler(self.settings).get_contents()
+        user_ids = sorted(streamer['user_id'] for streamer in contents['Streamers'])
+        self.assertEqual(user_ids, list(range(40)))
+
+    def test_reload_does_not_overtake_changes(self):
+        """
+        Test a reload made by one thread reaches listeners before a change made after it by another
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+
+        def slow_listener(change: dict) -> None:
+            if change['op'] == 'reload':
+                time.sleep(0.05)
+
+        json_datasource_handler.add_change_listener(slow_listener)
+        registry = StreamerRegistry(json_datasource_handler)
+        JsonDatasourceHandler(self.settings).add_streamer(1, 'External')
+        reader = threading.Thread(target=json_datasource_handler.exists, args=(1,))
+
+        # When
+        reader.start()
+        time.sleep(0.01)
+        json_datasource_handler.add_streamer(2, 'Local')
+        reader.join()
+
+        # Then
+        self.assertEqual(sorted(registry.get_logins()), ['external', 'local'])
+
+    def test_threads_sharing_a_handler(self):
+        """
+        Test threads reading a handler while another process writes all see whole reloads
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        json_datasource_handler.get_contents()
+        writer = multiprocessing.get_context('fork').Process(
+            target=add_streamers,
+            args=(self.settings, range(40))
+        )
+        errors = []
+
+        def read() -> None:
+            try:
+                while writer.is_alive():
+                    snapshot = json_datasource_handler.get_snapshot()
+                    user_ids = [streamer['user_id'] for streamer in snapshot.streamers]
+                    if user_ids != list(range(len(user_ids))):
+                        errors.append(user_ids)
+                    json_datasource_handler.get_role_members(1)
+            except Exception as error:
+                errors.append(error)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+
+        # When
+        writer.start()
+        for reader in readers:
+            reader.start()
+
+        writer.join()
+        for reader in readers:
+            reader.join()
+
+        # Then
+        self.assertEqual(errors, [])
+        self.assertEqual(len(json_datasource_handler.get_contents()['Streamers']), 40)
+
+    def test_datasource_is_created_under_the_exclusive_lock(self):
+        """
+        Test a shared lock is upgraded when the datasource has to be created inside it
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+
+        # When
+        with patch('whitelist.fcntl.flock', wraps=fcntl.flock) as flock:
+            members = json_datasource_handler.get_role_members(1)
+
+        # Then
+        self.assertEqual(members, set())
+        self.assertTrue(os.path.isfile(self.datasource))
+        self.assertEqual(
+            [call.args[1] for call in flock.call_args_list],
+            [fcntl.LOCK_SH, fcntl.LOCK_EX, fcntl.LOCK_SH, fcntl.LOCK_UN]
+        )
+
+    def test_watcher(self):
+        """
+        Test the watcher notices and reloads changes made by another handler
+
+        Returns:
+            None
+        """
+
+        # Give
+        json_datasource_handler = JsonDatasourceHandler(self.settings)
+        json_datasource_handler.get_contents()
+        listener = Mock()
+        executor_handler = ExecutorDatasourceHandler(json_datasource_handler)
+        self.addCleanup(executor_handler.close)
+        watcher = DatasourceWatcher(executor_handler, 0)
+        watcher.add_listener(listener)
+
+        async def check() -> tuple:
+            unchanged = await watcher.check()
+            JsonDatasourceHandler(self.settings).add_streamer(1, 'HelloWorld')
+            changed = await watcher.check()
+            json_datasource_handler.add_streamer(2, 'MockObject')
+            return unchanged, changed, await watcher.check()
+
+        # When
+        unchanged, changed, own_change = asyncio.run(check())
+
+        # Then
+        self.assertFalse(unchanged)
+        self.assertTrue(changed)
+        self.assertFalse(own_change)
+        listener.assert_called_once_with()
+        self.assertEqual(len(json_datasource_handler.get_contents()['Streamers']), 2)
+
+    def test_watcher_survives_failed_checks(self):
+        """
+        Test the watcher logs a check which fails and keeps checking every interval
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource_handler = Mock(spec=AsyncDatasourceHandlerInterface)
+        results = iter([OSError('Truncated'), True])
+
+        async def refresh() -> bool:
+            result = next(results, False)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        datasource_handler.refresh.side_effect = refresh
+        listener = Mock()
+        watcher = DatasourceWatcher(datasource_handler, 0.01)
+        watcher.add_listener(listener)
+
+        async def watch():
+            watching = asyncio.get_running_loop().create_task(watcher.watch())
+            await asyncio.sleep(0.1)
+            watching.cancel()
+
+        # When
+        with self.assertLogs('watcher', level='ERROR') as logs:
+            asyncio.run(watch())
+
+        # Then
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Failed to check the datasource', logs.output[0])
+        listener.assert_called_once_with()
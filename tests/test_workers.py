@@ -0,0 +1,230 @@
+"""The test for the workers file in the twitch announce bot module"""
+from unittest.mock import Mock
+import queue
+import unittest
+from settings import Settings
+from twitch_api import TwitchHandlerInterface, TwitchStreamInterface
+from whitelist import DatasourceHandlerInterface
+from workers import PollWorker, StreamEvent, WorkerPool, partition
+
+
+def echo_worker(index: int, settings: Settings, events, control) -> None:
+    """
+    Stands in for a poll worker process, sending an event per username forced
+
+    Args:
+        index (int): The partition owned by the worker
+        settings (Settings): The settings
+        events (multiprocessing.Queue): Receives the events
+        control (multiprocessing.Queue): Sends the usernames to force, or none to stop
+
+    Returns:
+        None
+    """
+
+    events.put([StreamEvent('offline', f'started-{index}-of-{settings.poll_workers}')])
+    while True:
+        usernames = control.get()
+        if usernames is None:
+            return None
+
+        events.put([StreamEvent('live', username, None, index == 0) for username in usernames])
+
+
+def crashing_worker(index: int, settings: Settings, events, control) -> None:
+    """
+    Stands in for a poll worker process which dies straight after starting
+
+    Args:
+        index (int): The partition owned by the worker
+        settings (Settings): The settings
+        events (multiprocessing.Queue): Receives the events
+        control (multiprocessing.Queue): Sends the usernames to force, or none to stop
+
+    Returns:
+        None
+    """
+
+    events.put([StreamEvent('offline', f'started-{index}-of-{settings.poll_workers}')])
+    raise SystemExit(1)
+
+
+class TestPartition(unittest.TestCase):
+    """Test the partitioning of streamers between workers"""
+
+    def test_partition(self):
+        """
+        Test streamers are spread over every worker, ignoring the case of their username
+
+        Returns:
+            None
+        """
+
+        # When
+        partitions = [partition(f'streamer{index}', 4) for index in range(100)]
+
+        # Then
+        self.assertEqual(set(partitions), {0, 1, 2, 3})
+        self.assertEqual(partition('HelloWorld', 4), partition('helloworld', 4))
+
+
+class TestPollWorker(unittest.TestCase):
+    """Test the poll worker"""
+
+    def test_poll(self):
+        """
+        Test only the worker's partition is polled and streams are diffed into events
+
+        Returns:
+            None
+        """
+
+        # Give
+        usernames = [f'streamer{index}' for index in range(20)]
+        datasource = Mock(spec=DatasourceHandlerInterface)
+        datasource.get_contents.return_value = {
+            'Streamers': [{'user_id': index, 'username': username, 'roles': []}
+                          for index, username in enumerate(usernames)]
+        }
+        mine = [username for username in usernames if partition(username, 2) == 1]
+        stream = Mock(spec=TwitchStreamInterface)
+        changed = Mock(spec=TwitchStreamInterface)
+        twitch_handler = Mock(spec=TwitchHandlerInterface)
+        twitch_handler.get_streams.side_effect = [
+            {mine[0]: stream},
+            {mine[0]: stream, mine[1]: stream},
+            {mine[1]: changed}
+        ]
+        worker = PollWorker(1, Settings(poll_workers=2), twitch_handler, datasource)
+
+        # When
+        first = worker.poll()
+        worker.scheduler.force(mine)
+        second = worker.poll()
+        worker.scheduler.force(mine)
+        third = worker.poll()
+
+        # Then
+        twitch_handler.get_streams.assert_called_with(mine)
+        self.assertEqual(first, [StreamEvent('live', mine[0], stream, False)])
+        self.assertEqual(second, [StreamEvent('live', mine[1], stream)])
+        self.assertEqual(third, [
+            StreamEvent('update', mine[1], changed),
+            StreamEvent('offline', mine[0])
+        ])
+
+    def test_failed_poll(self):
+        """
+        Test a poll which fails is logged and the worker carries on polling
+
+        Returns:
+            None
+        """
+
+        # Give
+        datasource = Mock(spec=DatasourceHandlerInterface)
+        datasource.get_contents.side_effect = [
+            OSError('Datasource unreadable'),
+            {'Streamers': [{'user_id': 1, 'username': 'HelloWorld', 'roles': []}]}
+        ]
+        stream = Mock(spec=TwitchStreamInterface)
+        twitch_handler = Mock(spec=TwitchHandlerInterface)
+        twitch_handler.get_streams.return_value = {'helloworld': stream}
+        worker = PollWorker(0, Settings(poll_workers=1, poll_interval=0.01), twitch_handler, datasource)
+        events, control = queue.Queue(), queue.Queue()
+        control.put(['HelloWorld'])
+        control.put(None)
+
+        # When
+        with self.assertLogs('workers', 'ERROR') as logs:
+            worker.run(events, control)
+
+        # Then
+        self.assertIn('Poll worker 0 failed to poll', logs.output[0])
+        self.assertEqual(events.get_nowait(), [StreamEvent('live', 'helloworld', stream, False)])
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Test the worker pool against real processes"""
+
+    def test_pool(self):
+        """
+        Test forced usernames reach the worker owning them and events come back
+
+        Returns:
+            None
+        """
+
+        # Give
+        pool = WorkerPool(Settings(poll_workers=2), target=echo_worker)
+        usernames = [f'streamer{index}' for index in range(10)]
+
+        # When
+        pool.start()
+        try:
+            started = []
+            while len(started) < 2:
+                started += pool.get_events(10)
+
+            pool.force(usernames)
+            events = []
+            while len(events) < len(usernames):
+                events += pool.get_events(10)
+        finally:
+            pool.stop()
+
+        # Then
+        self.assertEqual(
+            sorted(event.username for event in started),
+            ['started-0-of-2', 'started-1-of-2']
+        )
+        self.assertEqual(sorted(event.username for event in events), sorted(usernames))
+        for event in events:
+            self.assertEqual(event.announce, partition(event.username, 2) == 0)
+
+        self.assertTrue(all(not process.is_alive() for process in pool.processes))
+        self.assertEqual(pool.get_events(0.01), [])
+
+    def test_dead_workers_are_restarted(self):
+        """
+        Test the pool starts workers which died again, but not more often than the delay
+
+        Returns:
+            None
+        """
+
+        # Give
+        pool = WorkerPool(Settings(poll_workers=2), target=crashing_worker, restart_delay=0)
+
+        # When
+        pool.start()
+        try:
+            started = []
+            while len(started) < 2:
+                started += pool.get_events(10)
+
+            for process in pool.processes:
+                process.join(10)
+
+            with self.assertLogs('workers', 'WARNING'):
+                restarted = pool.supervise()
+
+            while len(started) < 4:
+                started += pool.get_events(10)
+
+            pool.restart_delay = 60
+            for process in pool.processes:
+                process.join(10)
+
+            delayed = pool.supervise()
+        finally:
+            pool.stop()
+
+        # Then
+        self.assertEqual(restarted, [0, 1])
+        self.assertEqual(delayed, [])
+        self.assertEqual(
+            sorted(event.username for event in started),
+            ['started-0-of-2', 'started-0-of-2', 'started-1-of-2', 'started-1-of-2']
+        )
+        self.assertEqual(pool.supervise(), [])
@@ -0,0 +1,337 @@
+"""The tracing file for the announce twitch bot module"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
+from typing import Callable, Optional
+import asyncio
+import json
+import os
+import threading
+import time
+from settings import get_settings
+
+SERVICE_NAME = 'announce-twitch-bot'
+
+STATUS_ERROR = 2
+
+SPAN_KIND_INTERNAL = 1
+
+
+@dataclass
+class Span:
+    """
+    Holds a timed stage of a trace, following the OpenTelemetry span model
+    """
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str = ''
+    start: int = 0
+    end: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value) -> None:
+        """
+        Set an attribute of the span, ignored when tracing is disabled
+
+        Args:
+            key (str): The attribute name, e.g. whitelist.size
+            value: The value, a str, bool, int or float
+
+        Returns:
+            None
+        """
+
+        if self.span_id:
+            self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        """
+        Mark the span as failed, ignored when tracing is disabled
+
+        Args:
+            message (str): The error message
+
+        Returns:
+            None
+        """
+
+        if self.span_id:
+            self.error = message
+
+    def to_otlp(self) -> dict:
+        """
+        Convert the span to its OTLP json representation
+
+        Returns:
+            dict: The span as found in the spans of an OTLP ExportTraceServiceRequest
+        """
+
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id,
+            'name': self.name,
+            'kind': SPAN_KIND_INTERNAL,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [
+                {'key': key, 'value': to_otlp_value(value)}
+                for key, value in self.attributes.items()
+            ]
+        }
+        if self.error is not None:
+            span['status'] = {'code': STATUS_ERROR, 'message': self.error}
+
+        return span
+
+
+NOOP_SPAN = Span('noop', '', '')
+
+current_span: ContextVar = ContextVar('current_span', default=None)
+
+
+def to_otlp_value(value) -> dict:
+    """
+    Convert an attribute value to its OTLP json representation
+
+    Args:
+        value: The value
+
+    Returns:
+        dict: The typed value, 64 bit integers are encoded as strings
+    """
+
+    if isinstance(value, bool):
+        return {'boolValue': value}
+
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+
+    if isinstance(value, float):
+        return {'doubleValue': value}
+
+    return {'stringValue': str(value)}
+
+
+class SpanExporterInterface(ABC):
+    """The span exporter interface"""
+
+    @abstractmethod
+    def export(self, spans: list) -> None:
+        """Export finished spans"""
+
+
+class FileSpanExporter(SpanExporterInterface):
+    """
+    Appends spans to a file as OTLP json, one ExportTraceServiceRequest per line
+
+    This is the format read by the OpenTelemetry collector's otlpjsonfile receiver, so
+    the file can be shipped to any tracing backend or read directly.
+    """
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        """
+        Initialize the exporter
+
+        Args:
+            path (str): The file to append to
+            service_name (str): The service.name resource attribute
+        """
+
+        self.path = path
+        self.service_name = service_name
+        self.lock = threading.Lock()
+
+    def export(self, spans: list) -> None:
+        """
+        Append the spans to the file as a single line
+
+        Args:
+            spans (list): The finished spans
+
+        Returns:
+            None
+        """
+
+        request = {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': to_otlp_value(self.service_name)}
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': SERVICE_NAME},
+                'spans': [span.to_otlp() for span in spans]
+            }]
+        }]}
+        line = json.dumps(request, separators=(',', ':')) + '\n'
+
+        with self.lock, open(self.path, 'a', encoding='utf8') as file:
+            file.write(line)
+
+
+class Tracer:
+    """
+    Creates spans and exports each trace once its root span has ended
+
+    The current span is held in a context variable, so spans nest across awaits. Work
+    handed to another thread must be run in a copy of the context to stay in the trace.
+    Without an exporter tracing is disabled and costs next to nothing.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporterInterface] = None):
+        """
+        Initialize the tracer
+
+        Args:
+            exporter (SpanExporterInterface): Where to send finished traces, none to disable
+        """
+
+        self.exporter = exporter
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def start_span(self, name: str, **attributes) -> tuple:
+        """
+        Start a span as a child of the current span and make it the current span
+
+        Args:
+            name (str): The name of the span, e.g. whitelist.load_contents
+            **attributes: The initial attributes
+
+        Returns:
+            tuple: The span and the token to pass to end_span
+        """
+
+        if self.exporter is None:
+            return NOOP_SPAN, None
+
+        parent = current_span.get()
+        span = Span(
+            name,
+            parent.trace_id if parent else os.urandom(16).hex(),
+            os.urandom(8).hex(),
+            parent.span_id if parent else '',
+            time.time_ns(),
+            attributes=dict(attributes)
+        )
+        if parent is None:
+            with self.lock:
+                self.pending[span.trace_id] = []
+
+        return span, current_span.set(span)
+
+    def end_span(self, span: Span, token: Optional[Token]) -> None:
+        """
+        End a span, restoring the span current before it and exporting a finished trace
+
+        Spans ending after the root span of their trace, e.g. in a call given up on,
+        are exported on their own.
+
+        Args:
+            span (Span): The span
+            token (Token): The token returned by start_span
+
+        Returns:
+            None
+        """
+
+        if token is None:
+            return None
+
+        span.end = time.time_ns()
+        current_span.reset(token)
+
+        with self.lock:
+            if span.parent_span_id and span.trace_id in self.pending:
+                self.pending[span.trace_id].append(span)
+                return None
+
+            spans = self.pending.pop(span.trace_id, []) + [span]
+
+        self.exporter.export(spans)
+
+        return None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time the enclosed code as a span, recording any exception raised as its error
+
+        Args:
+            name (str): The name of the span
+            **attributes: The initial attributes
+
+        Yields:
+            Span: The span, to set further attributes on
+        """
+
+        span, token = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as error:
+            span.set_error(f'{type(error).__name__}: {error}')
+            raise
+        finally:
+            self.end_span(span, token)
+
+
+@lru_cache(maxsize=None)
+def get_tracer() -> Tracer:
+    """
+    Get the tracer shared by every module, exporting to TRACE_FILE if it is set
+
+    Returns:
+        Tracer: The tracer
+    """
+
+    trace_file = get_settings().trace_file
+
+    return Tracer(FileSpanExporter(trace_file) if trace_file else None)
+
+
+def get_current_span() -> Span:
+    """
+    Get the current span, to set attributes on
+
+    Returns:
+        Span: The span, or a span which ignores attributes if there is none
+    """
+
+    return current_span.get() or NOOP_SPAN
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorate a function or coroutine function to run in a span of its own
+
+    Args:
+        name (str): The name of the span
+
+    Returns:
+        Callable: The decorator
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(function):
+            @wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().span(name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if tracer.exporter is None:
+                return function(*args, **kwargs)
+
+            with tracer.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
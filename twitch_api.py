@@ -2,12 +2,16 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
-import os
-from dotenv import load_dotenv
-import twitch
+from functools import partial
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+import threading
+from settings import Settings, get_settings
+from tracing import get_current_span, get_tracer, traced
 
-load_dotenv()
+
+class TwitchUnavailableException(Exception):
+    """Raised when twitch cannot be reached and there is no last known state to serve"""
 
 
 class TwitchStreamInterface(ABC):
@@ -32,6 +36,8 @@ class TwitchStreamInterface(ABC):
 class TwitchStream(TwitchStreamInterface):
     """
     The twitch stream implementation
+
+    Streams served from the last known state while twitch is unavailable are stale.
     """
     id: int
     user_id: int
@@ -46,6 +52,7 @@ class TwitchStream(TwitchStreamInterface):
     language: str
     thumbnail: str
     is_mature: bool
+    stale: bool = False
 
     def is_live(self):
         """
@@ -57,7 +64,31 @@ class TwitchStream(TwitchStreamInterface):
         Returns
             bool: True if live, else false
         """
-        return self.live == 'Live'
+        return self.live.lower() == 'live'
+
+
+@dataclass
+class TwitchGame:
+    """
+    The twitch game, also known as category
+    """
+    id: str
+    name: str
+    box_art_url: str
+
+    def box_art(self, width: int = 285, height: int = 380) -> str:
+        """
+        Get the url of the box art at the given size
+
+        Args:
+            width (int): The width in pixels
+            height (int): The height in pixels
+
+        Returns:
+            str: The url of the box art
+        """
+
+        return self.box_art_url.replace('{width}', str(width)).replace('{height}', str(height))
 
 
 class TwitchHandlerInterface(ABC):
@@ -77,26 +108,127 @@ class TwitchHandlerInterface(ABC):
             TwitchStreamInterface: If the stream is live, else none
         """
 
+    @abstractmethod
+    def get_streams(self, usernames: list) -> dict:
+        """
+        Grabs the stream objects of every passed streamer who is live
+
+        Args:
+            usernames (list): The usernames to check
+
+        Returns:
+            dict: The live streams keyed by lower case username
+        """
+
+    @abstractmethod
+    def get_games(self, game_ids: list) -> dict:
+        """
+        Grabs the games with the passed ids
+
+        Args:
+            game_ids (list): The game ids to look up
+
+        Returns:
+            dict: The games found keyed by game id as a string
+        """
+
+
+def install_timeout(timeout: float) -> None:
+    """
+    Make the twitch client give up on requests which twitch does not answer in time
+
+    The twitch client sends its requests with requests.get and requests.post without a
+    timeout and has no option for one, so a request twitch never answers would hang the
+    thread sending it for good. Its references to them are swapped for ones passing the
+    timeout to connect and to every read. The timeout is shared by every client.
+
+    Args:
+        timeout (float): The timeout in seconds
+
+    Returns:
+        None
+    """
+    # pylint: disable=import-outside-toplevel
+    import requests
+    from twitch.helix import api, base
+
+    api.post = partial(requests.post, timeout=(timeout, timeout))
+    base.requests = SimpleNamespace(get=partial(requests.get, timeout=(timeout, timeout)))
+
 
 class TwitchHandler(TwitchHandlerInterface):
     """
     The Twitch handler
     """
 
-    def __init__(self):
+    def __init__(self, settings: Optional[Settings] = None):
         """
         Initialize the class, set up twitch oauth client
+
+        The twitch client library (and requests with it) is only imported here so it does
+        not slow down starting the bot. No request is sent until the handler is first used,
+        the app access token is got then.
+
+        Args:
+            settings (Settings): The settings to use, defaults to the shared settings
         """
-        client_id = os.getenv('TWITCH_APP_ID')
-        client_secret = os.getenv('TWITCH_APP_SECRET')
+        import twitch  # pylint: disable=import-outside-toplevel
+
+        settings = settings or get_settings()
+        self.batch_size = settings.twitch_batch_size
 
         self.client = twitch.TwitchHelix(
-            client_id=client_id,
-            client_secret=client_secret,
+            client_id=settings.twitch_app_id,
+            client_secret=settings.twitch_app_secret,
             scopes=[twitch.constants.OAUTH_SCOPE_ANALYTICS_READ_EXTENSIONS]
         )
+        install_timeout(settings.twitch_timeout)
+
+        self.authenticated = False
+        self.lock = threading.Lock()
 
-        self.client.get_oauth()
+    def authenticate(self) -> None:
+        """
+        Get a new app access token from twitch
+
+        Returns:
+            None
+        """
+
+        with get_tracer().span('twitch.get_oauth'):
+            self.client.get_oauth()
+
+        self.authenticated = True
+
+    def request(self, send: Callable[[], Any]) -> Any:
+        """
+        Send a request to twitch, authenticating again once if the token was rejected
+
+        The first request gets the app access token beforehand. App access tokens expire
+        after a while and the twitch client never renews them, so a 401 response is
+        answered by getting a new token and sending the request again.
+
+        Args:
+            send (Callable): Sends the request with the client and returns the response
+
+        Returns:
+            Any: The response
+        """
+        from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+        with self.lock:
+            if not self.authenticated:
+                self.authenticate()
+
+        try:
+            return send()
+        except HTTPError as error:
+            if error.response is None or error.response.status_code != 401:
+                raise
+
+        self.authenticate()
+
+        return send()
 
     def get_stream(self, username: str) -> Optional[TwitchStreamInterface]:
         """
@@ -109,22 +241,95 @@ class TwitchHandler(TwitchHandlerInterface):
             TwitchStreamInterface: If the stream is live, else none
         """
 
-        response = self.client.get_streams(user_logins=username)
+        response = self.request(lambda: self.client.get_streams(user_logins=username))
         if not response:
             return None
 
+        return self.map_stream(response[0])
+
+    @traced('twitch.get_streams')
+    def get_streams(self, usernames: list) -> dict:
+        """
+        Grabs the stream objects of every passed streamer who is live
+
+        Usernames are looked up in batches of up to 100 so each batch costs one request.
+
+        Args:
+            usernames (list): The usernames to check
+
+        Returns:
+            dict: The live streams keyed by lower case username
+        """
+
+        streams = {}
+        for index in range(0, len(usernames), self.batch_size):
+            batch = usernames[index:index + self.batch_size]
+            response = self.request(
+                lambda batch=batch: self.client.get_streams(user_logins=batch, page_size=len(batch))
+            )
+
+            # Slice rather than iterate, iterating the cursor requests the next page
+            for stream in response[:]:
+                streams[stream.user_login.lower()] = self.map_stream(stream)
+
+        span = get_current_span()
+        span.set_attribute('twitch.logins', len(usernames))
+        span.set_attribute('twitch.batches', -(-len(usernames) // self.batch_size))
+        span.set_attribute('twitch.live', len(streams))
+
+        return streams
+
+    @traced('twitch.get_games')
+    def get_games(self, game_ids: list) -> dict:
+        """
+        Grabs the games with the passed ids
+
+        Game ids are looked up in batches of up to 100 so each batch costs one request.
+
+        Args:
+            game_ids (list): The game ids to look up
+
+        Returns:
+            dict: The games found keyed by game id as a string
+        """
+
+        game_ids = [str(game_id) for game_id in game_ids]
+        games = {}
+        for index in range(0, len(game_ids), self.batch_size):
+            batch = game_ids[index:index + self.batch_size]
+            for game in self.request(lambda batch=batch: self.client.get_games(game_ids=batch)):
+                games[str(game.id)] = TwitchGame(str(game.id), game.name, game.box_art_url)
+
+        span = get_current_span()
+        span.set_attribute('twitch.games', len(game_ids))
+        span.set_attribute('twitch.batches', -(-len(game_ids) // self.batch_size))
+
+        return games
+
+    @staticmethod
+    def map_stream(stream) -> TwitchStream:
+        """
+        Maps a stream returned by the twitch client into a stream object
+
+        Args:
+            stream (twitch.helix.Stream): The stream returned by the twitch client
+
+        Returns:
+            TwitchStream: The stream object
+        """
+
         return TwitchStream(
-            id=response[0].id,
-            user_id=response[0].user_id,
-            user_login=response[0].user_login,
-            user_name=response[0].user_name,
-            game_id=response[0].game_id,
-            game_name=response[0].game_name,
-            live=response[0].type,
-            title=response[0].title,
-            viewer_count=response[0].viewer_count,
-            started_at=response[0].started_at,
-            language=response[0].language,
-            thumbnail=response[0].thumbnail_url,
-            is_mature=response[0].is_mature
+            id=stream.id,
+            user_id=stream.user_id,
+            user_login=stream.user_login,
+            user_name=stream.user_name,
+            game_id=stream.game_id,
+            game_name=stream.game_name,
+            live=stream.type,
+            title=stream.title,
+            viewer_count=stream.viewer_count,
+            started_at=stream.started_at,
+            language=stream.language,
+            thumbnail=stream.thumbnail_url,
+            is_mature=stream.is_mature
         )
@@ -0,0 +1,78 @@
+"""The watcher file for the announce twitch bot module"""
+from typing import Callable
+import asyncio
+import logging
+from offload import AsyncDatasourceHandlerInterface
+
+
+logger = logging.getLogger(__name__)
+
+
+class DatasourceWatcher:
+    """
+    Polls a datasource for changes made by other processes and notifies listeners
+
+    Polling costs a couple of stat calls per interval and works on every platform,
+    the datasource is only read again once it has actually changed. The datasource is
+    checked off the event loop, as reading it again once changed is disk work.
+    """
+
+    def __init__(self, datasource_handler: AsyncDatasourceHandlerInterface, interval: float):
+        """
+        Initialize the watcher
+
+        Args:
+            datasource_handler (AsyncDatasourceHandlerInterface): The datasource to watch
+            interval (float): The number of seconds between polls
+        """
+
+        self.datasource_handler = datasource_handler
+        self.interval = interval
+        self.listeners = []
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Register a callable to be notified whenever the datasource changes
+
+        Args:
+            listener (Callable): Called without arguments after the datasource reloaded
+
+        Returns:
+            None
+        """
+
+        self.listeners.append(listener)
+
+    async def check(self) -> bool:
+        """
+        Check the datasource once, notifying listeners if it changed
+
+        Returns:
+            bool: True if the datasource changed, else false
+        """
+
+        if not await self.datasource_handler.refresh():
+            return False
+
+        for listener in self.listeners:
+            listener()
+
+        return True
+
+    async def watch(self) -> None:
+        """
+        Check the datasource every interval until cancelled
+
+        A check which fails, e.g. on a datasource being written part way, is logged and the
+        datasource is checked again the next interval.
+
+        Returns:
+            None
+        """
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Failed to check the datasource for changes')
@@ -1,11 +1,19 @@
 """The whitelist file for the announce twitch bot module"""
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Optional
+import fcntl
 import io
 import json
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import threading
+from journal import append_change, load_changes
+from roles import RoleIndex
+from serializers import get_serializer
+from snapshot import WhitelistSnapshot, copy_for_change
+from settings import Settings, get_settings
+from tracing import get_current_span, traced
 
 
 class NotFoundException(Exception):
@@ -19,14 +27,31 @@ class DatasourceHandlerInterface(ABC):
     def add_role_to_streamer(self, user_id: int, role_id: int, name: str) -> None:
         """Adds a role to a streamer in the whitelist"""
 
+    @abstractmethod
+    def add_role_to_streamers(
+        self,
+        role_id: int,
+        name: str,
+        user_ids: Optional[list] = None
+    ) -> list:
+        """Add a role to every streamer, or every one of the passed, in a single write"""
+
     @abstractmethod
     def add_streamer(self, user_id: int, username: str) -> None:
         """Add a streamer to the whitelist"""
 
+    @abstractmethod
+    def add_change_listener(self, listener: Callable[[dict], None]) -> None:
+        """Register a callable to be called with every change applied to the whitelist"""
+
     @abstractmethod
     def delete_role_from_streamer(self, user_id: int, role_id: int) -> None:
         """Delete a role from a streamer in the whitelist"""
 
+    @abstractmethod
+    def delete_role_from_streamers(self, role_id: int) -> list:
+        """Delete a role from every streamer holding it in a single write"""
+
     @abstractmethod
     def delete_streamer(self, user_id: int) -> None:
         """Delete a streamer from the whitelist"""
@@ -43,12 +68,32 @@ class DatasourceHandlerInterface(ABC):
     def get_contents(self) -> dict:
         """Get the contents of the datasource"""
 
+    @abstractmethod
+    def get_role_members(self, role_id: int) -> set:
+        """Get the user ids of the streamers holding a role"""
+
+    @abstractmethod
+    def get_snapshot(self) -> WhitelistSnapshot:
+        """Get the current version of the whitelist, which is never modified"""
+
+    @abstractmethod
+    def reconcile(self, user_ids: list, role_ids: list, role_names: dict) -> int:
+        """Remove departed streamers and deleted roles and rename roles in a single write"""
+
+    @abstractmethod
+    def refresh(self) -> bool:
+        """Reload the datasource if it has been changed by another process"""
+
     @abstractmethod
     def role_exists(self, roles: dict, role_id: int) -> bool:
         """Check if a role exists against a streamer by id and role list"""
 
+    @abstractmethod
+    def set_announcement(self, user_id: int, template: Optional[str]) -> None:
+        """Set or clear the announcement template overriding the default for a streamer"""
+
 
-class JsonDatasourceHandler(DatasourceHandlerInterface):
+class JsonDatasourceHandler(DatasourceHandlerInterface):  # pylint: disable=too-many-public-methods
     """
     A class used to handle our whitelist json datasource
 
@@ -56,16 +101,37 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
     We can also add and remove roles assigned to a streamer in the whitelist
     """
 
-    def __init__(self):
+    def __init__(self, settings: Optional[Settings] = None):
         """
         Initialize the class
-        """
 
-        self.__datasource = os.getenv('STREAMER_DATASOURCE')
-        self.__template = os.getenv('TEMPLATE')
-        self.__template_streamer = os.getenv('TEMPLATE_STREAMER')
-        self.__template_role = os.getenv('TEMPLATE_ROLE')
+        Args:
+            settings (Settings): The settings to use, defaults to the shared settings
+        """
 
+        settings = settings or get_settings()
+
+        self.__datasource = settings.streamer_datasource
+        self.__journal = f'{self.__datasource}.journal'
+        self.__compact_threshold = settings.journal_compact_threshold
+        self.__pretty = settings.datasource_format == 'pretty'
+        self.__serializer = get_serializer()
+        self.__journal_length = None
+        self.__lock = f'{self.__datasource}.lock'
+        self.__mutex = threading.RLock()
+        self.__held = None
+        self.__contents = None
+        self.__shared = False
+        self.__signature = None
+        self.__revision = 0
+        self.__snapshot = None
+        self.__role_index = RoleIndex()
+        self.__change_listeners = []
+        self.__template = settings.template
+        self.__template_streamer = settings.template_streamer
+        self.__template_role = settings.template_role
+
+    @traced('whitelist.create')
     def __create(self) -> bool:
         """
         Attempts to create the file for the datasource
@@ -98,10 +164,86 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
 
         return os.path.isfile(self.__datasource) and os.access(self.__datasource, os.R_OK)
 
+    @contextmanager
+    def __locked(self, exclusive: bool = False):
+        """
+        Holds an advisory lock on the datasource shared with any other process using it
+
+        Read-modify-write cycles must hold the exclusive lock, reads hold the shared lock.
+        The lock is re-entrant so locked methods can call each other, and a shared lock is
+        upgraded for as long as an exclusive one is taken inside it. Threads sharing the
+        handler are serialized by a mutex held with the lock, as reads may reload the in
+        memory view.
+
+        Args:
+            exclusive (bool): Whether to take the exclusive (write) lock
+
+        Yields:
+            None
+        """
+
+        with self.__mutex:
+            held = self.__held
+            if held is not None:
+                descriptor, held_exclusive = held
+                if held_exclusive or not exclusive:
+                    yield
+                    return
+
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+                self.__held = (descriptor, True)
+                try:
+                    yield
+                finally:
+                    self.__held = held
+                    fcntl.flock(descriptor, fcntl.LOCK_SH)
+                return
+
+            descriptor = os.open(self.__lock, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self.__held = (descriptor, exclusive)
+                try:
+                    yield
+                finally:
+                    self.__held = None
+                    fcntl.flock(descriptor, fcntl.LOCK_UN)
+            finally:
+                os.close(descriptor)
+
+    def __get_signature(self) -> tuple:
+        """
+        Gets a cheap signature of the snapshot and journal files which changes on every write
+
+        Returns:
+            tuple: The inode, size and modification time of both files
+        """
+
+        signature = ()
+        for path in (self.__datasource, self.__journal):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature += (None,)
+                continue
+
+            signature += ((stat.st_ino, stat.st_size, stat.st_mtime_ns),)
+
+        return signature
+
+    @traced('whitelist.load_contents')
     def __load_contents(self) -> dict:
         """
         Loads the contents of the json datasource
 
+        The snapshot file is read first and any changes recorded in the journal since the
+        last compaction are replayed on top of it. The result is kept in memory and only
+        read again once the files have changed on disk. Once the contents have been handed
+        out by get_contents or get_snapshot, changes made through this handler replace them
+        with a copy rather than modify them, so what readers hold stays the same. Until
+        then changes are made in place, so callers within the handler must not hold the
+        returned dictionary across a change, and no caller may modify it.
+
         Returns:
             dict: The json contents as a dictionary
 
@@ -109,33 +251,121 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
             RuntimeError: If we could not create the datasource if it did not exist already
         """
 
-        if not self.__exists():
-            datasource = self.__create()
-            if not datasource:
-                raise RuntimeError('Unable to load or create the datasource template')
+        with self.__locked():
+            signature = self.__get_signature()
+            if self.__contents is not None and signature == self.__signature:
+                get_current_span().set_attribute('whitelist.cached', True)
+                return self.__contents
+
+            if not self.__exists():
+                with self.__locked(exclusive=True):
+                    if not self.__exists() and not self.__create():
+                        raise RuntimeError('Unable to load or create the datasource template')
+
+            with open(self.__datasource, 'rb') as datasource:
+                contents = self.__serializer.loads(datasource.read())
+
+            changes = load_changes(self.__journal, self.__serializer)
+            for change in changes:
+                self.apply_change(contents, change)
+
+            self.__journal_length = len(changes)
+            self.__contents = contents
+            self.__shared = True
+            span = get_current_span()
+            span.set_attribute('whitelist.size', len(contents['Streamers']))
+            span.set_attribute('whitelist.journal_changes', len(changes))
+            self.__role_index.clear()
+            self.__signature = self.__get_signature()
+            self.__revision += 1
+            self.__notify({'op': 'reload', 'contents': contents})
+
+        return contents
+
+    @traced('whitelist.append_change')
+    def __append_change(self, change: dict) -> None:
+        """
+        Appends a change to the journal
+
+        Once the journal has grown past the compaction threshold it is folded into the
+        snapshot file. The list of streamers is copied first only if the contents have been
+        handed out since the last copy, so a run of changes nobody reads in between shares
+        one copy.
+
+        Args:
+            change (dict): The change to record, see apply_change for the supported ops
+
+        Returns:
+            None
+        """
+
+        get_current_span().set_attribute('whitelist.op', change['op'])
+        with self.__locked(exclusive=True):
+            fresh = self.__contents is not None and self.__get_signature() == self.__signature
+
+            entry = dict(change, at=datetime.now(timezone.utc).isoformat())
+            append_change(self.__journal, self.__serializer.dumps(entry) + b'\n')
 
-        with open(self.__datasource, encoding='utf8') as datasource:
-            return json.load(datasource)
+            self.__revision += 1
 
+            if fresh:
+                if self.__shared:
+                    self.__contents = copy_for_change(self.__contents)
+                    self.__shared = False
+                self.apply_change(self.__contents, change)
+                if self.__role_index.loaded:
+                    self.__role_index.apply_change(change)
+                self.__journal_length += 1
+                self.__signature = self.__get_signature()
+            else:
+                self.__contents = None
+                self.__journal_length = len(load_changes(self.__journal, self.__serializer))
+
+            if self.__journal_length >= self.__compact_threshold:
+                self.compact()
+
+            # Otherwise listeners are sent a reload once the changed datasource is next read
+            if fresh:
+                self.__notify(change)
+
+    def __notify(self, change: dict) -> None:
+        """
+        Calls the change listeners with a change
+
+        It is called with the lock held, so listeners receive changes in the order they
+        were journaled however many threads are changing the whitelist.
+
+        Args:
+            change (dict): The change applied, or a reload op holding the reloaded contents
+
+        Returns:
+            None
+        """
+
+        for listener in self.__change_listeners:
+            listener(change)
+
+    @traced('whitelist.save_file')
     def __save_file(self, contents: dict) -> None:
         """
         Saves the contents passed to the datasource file
 
-        This method will overwrite the entire file and not append.
+        This method will overwrite the entire file and not append. The contents are
+        written to a temporary file beside it which then replaces it, so a crash part way
+        leaves the previous snapshot intact. The file is written compactly unless
+        DATASOURCE_FORMAT is pretty.
 
         Args:
             contents (dict): The new file contents
         """
 
-        with open(self.__datasource, "w", encoding='utf8') as datasource_file:
-            json.dump(
-                contents,
-                datasource_file,
-                ensure_ascii=False,
-                indent='\t',
-                separators=(',', ': ')
-            )
-            datasource_file.close()
+        temporary = f'{self.__datasource}.tmp'
+        with open(temporary, 'wb') as datasource_file:
+            datasource_file.write(self.__serializer.dumps(contents, pretty=self.__pretty))
+            datasource_file.flush()
+            os.fsync(datasource_file.fileno())
+
+        os.replace(temporary, self.__datasource)
 
     def add_role_to_streamer(self, user_id: int, role_id: int, name: str) -> None:
         """
@@ -153,21 +383,79 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
             ValueError: If the streamer already has the role which we are trying to add
         """
 
-        streamer = self.find(user_id)
-        if self.role_exists(streamer['roles'], role_id):
-            raise ValueError(f'Cannot add role id {role_id} to user {user_id} as it already exists')
+        with self.__locked(exclusive=True):
+            streamer = self.find(user_id)
+            if self.role_exists(streamer['roles'], role_id):
+                raise ValueError(
+                    f'Cannot add role id {role_id} to user {user_id} as it already exists'
+                )
+
+            with open(self.__template_role, encoding='utf8') as role_template:
+                role = json.load(role_template)
+
+            role['role_id'] = role_id
+            role['name'] = name
+            self.__append_change({'op': 'add_role', 'user_id': user_id, 'role': role})
+
+    def add_role_to_streamers(
+        self,
+        role_id: int,
+        name: str,
+        user_ids: Optional[list] = None
+    ) -> list:
+        """
+        Adds a role to every streamer, or every one of the passed, in a single write
 
-        with open(self.__template_role, encoding='utf8') as role_template:
-            role = json.load(role_template)
+        Streamers who already have the role and user ids which are not whitelisted are
+        skipped. Nothing is written if no streamer is left.
 
-        role['role_id'] = role_id
-        role['name'] = name
-        streamer['roles'].append(role)
+        Args:
+            role_id (int): The id of the role
+            name (str): The name of the role
+            user_ids (list): The user ids of the streamers, defaults to every streamer
 
-        contents = self.__load_contents()
-        streamer_index = self.get_streamer_index(user_id)
-        contents['Streamers'][streamer_index] = streamer
-        self.__save_file(contents)
+        Returns:
+            list: The user ids of the streamers the role was added to
+        """
+
+        with self.__locked(exclusive=True):
+            members = self.get_role_members(role_id)
+            wanted = None if user_ids is None else set(user_ids)
+            added = [
+                streamer['user_id'] for streamer in self.__load_contents()['Streamers']
+                if streamer['user_id'] not in members
+                and (wanted is None or streamer['user_id'] in wanted)
+            ]
+            if not added:
+                return []
+
+            with open(self.__template_role, encoding='utf8') as role_template:
+                role = json.load(role_template)
+
+            role['role_id'] = role_id
+            role['name'] = name
+            self.__append_change({'op': 'add_role_all', 'user_ids': added, 'role': role})
+
+            return added
+
+    def add_change_listener(self, listener: Callable[[dict], None]) -> None:
+        """
+        Register a callable to be called with every change applied to the whitelist
+
+        Changes made through this handler are passed as they are applied, using the ops
+        of apply_change. When the datasource is reloaded because it was changed elsewhere
+        a reload op holding the new contents is passed instead. Listeners are called with
+        the datasource locked, in the order the changes were made, so they must be quick
+        and must not wait on another thread using the handler.
+
+        Args:
+            listener (Callable): Called with the change
+
+        Returns:
+            None
+        """
+
+        self.__change_listeners.append(listener)
 
     def add_streamer(self, user_id: int, username: str) -> None:
         """
@@ -184,17 +472,16 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
             ValueError: If the streamer with user id already exists in datasource
         """
 
-        if self.exists(user_id):
-            raise ValueError(f'Cannot add user "{user_id}" as they already exist')
+        with self.__locked(exclusive=True):
+            if self.exists(user_id):
+                raise ValueError(f'Cannot add user "{user_id}" as they already exist')
 
-        contents = self.__load_contents()
-        with open(self.__template_streamer, encoding='utf8') as streamer_template:
-            streamer = json.load(streamer_template)
+            with open(self.__template_streamer, encoding='utf8') as streamer_template:
+                streamer = json.load(streamer_template)
 
-        streamer['user_id'] = user_id
-        streamer['username'] = username
-        contents['Streamers'].append(streamer)
-        self.__save_file(contents)
+            streamer['user_id'] = user_id
+            streamer['username'] = username
+            self.__append_change({'op': 'add_streamer', 'streamer': streamer})
 
     def delete_role_from_streamer(self, user_id: int, role_id: int) -> None:
         """
@@ -211,20 +498,34 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
             NotFoundException: If the role does not exist on the user
         """
 
-        streamer = self.find(user_id)
-        if not self.role_exists(streamer['roles'], role_id):
-            raise NotFoundException(
-                f'Cannot remove role {role_id} from user {user_id} as it does not exist'
-            )
+        with self.__locked(exclusive=True):
+            streamer = self.find(user_id)
+            if not self.role_exists(streamer['roles'], role_id):
+                raise NotFoundException(
+                    f'Cannot remove role {role_id} from user {user_id} as it does not exist'
+                )
 
-        role_index = self.get_role_index(streamer['roles'], role_id)
-        streamer['roles'].pop(role_index)
+            self.__append_change({'op': 'delete_role', 'user_id': user_id, 'role_id': role_id})
 
-        contents = self.__load_contents()
-        streamer_index = self.get_streamer_index(user_id)
-        contents['Streamers'][streamer_index] = streamer
+    def delete_role_from_streamers(self, role_id: int) -> list:
+        """
+        Deletes a role from every streamer holding it in a single write
+
+        The holders are found with the role index, nothing is written if there are none.
+
+        Args:
+            role_id (int): The role id
+
+        Returns:
+            list: The user ids of the streamers the role was deleted from
+        """
+
+        with self.__locked(exclusive=True):
+            members = sorted(self.get_role_members(role_id))
+            if members:
+                self.__append_change({'op': 'purge_role', 'role_id': role_id})
 
-        self.__save_file(contents)
+            return members
 
     def delete_streamer(self, user_id: int) -> None:
         """
@@ -240,14 +541,211 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
             NotFoundException: If the user cannot be found
         """
 
-        if not self.exists(user_id):
-            raise NotFoundException(f'Cannot find user with id {user_id} for deletion')
+        with self.__locked(exclusive=True):
+            if not self.exists(user_id):
+                raise NotFoundException(f'Cannot find user with id {user_id} for deletion')
 
-        contents = self.__load_contents()
-        streamer_index = self.get_streamer_index(user_id)
-        contents['Streamers'].pop(streamer_index)
-        self.__save_file(contents)
+            self.__append_change({'op': 'delete_streamer', 'user_id': user_id})
+
+    def set_announcement(self, user_id: int, template: Optional[str]) -> None:
+        """
+        Sets the announcement template of a streamer, used instead of the default
+
+        The template is stored as given, it should be validated by compiling it first.
+
+        Args:
+            user_id (int): The user id
+            template (str): The template, or none to use the default again
+
+        Returns:
+            None
+
+        Raises:
+            NotFoundException: If the user cannot be found
+        """
+
+        with self.__locked(exclusive=True):
+            if not self.exists(user_id):
+                raise NotFoundException(f'Cannot find user with id {user_id} to set announcement')
+
+            self.__append_change(
+                {'op': 'set_announcement', 'user_id': user_id, 'template': template}
+            )
+
+    def apply_change(self, contents: dict, change: dict) -> None:
+        """
+        Applies a single journal change to the contents in place
+
+        Supported ops are add_streamer, delete_streamer, add_role, delete_role,
+        set_announcement, setting or with none clearing a streamer's template, and the bulk
+        ops add_role_all, adding a role to a list of streamers, purge_role, deleting a role
+        from every streamer, and rename_role, renaming a role on every streamer. A batch op
+        holds a list of changes applied in order. Changes which no longer apply or have
+        already been applied (e.g. a role on a streamer who has since been removed, or a
+        journal replayed over a snapshot it was compacted into) are skipped so replaying
+        the journal is always safe.
+
+        Only the list of streamers is modified. A streamer who changes is replaced by a
+        changed copy, so every other version of the contents sharing the streamer still
+        sees it as it was.
+
+        Args:
+            contents (dict): The datasource contents to modify
+            change (dict): The change to apply
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the op of the change is not recognised
+        """
+
+        streamers = contents['Streamers']
+        operation = change['op']
+
+        if operation == 'add_streamer':
+            user_id = change['streamer']['user_id']
+            if not any(streamer['user_id'] == user_id for streamer in streamers):
+                streamers.append(change['streamer'])
+            return None
+
+        if operation in ('add_role_all', 'purge_role', 'rename_role', 'batch'):
+            self.__apply_bulk_change(contents, change)
+            return None
+
+        if operation not in ('delete_streamer', 'add_role', 'delete_role', 'set_announcement'):
+            raise ValueError(f'Unknown whitelist journal op "{operation}"')
+
+        for index, streamer in enumerate(streamers):
+            if streamer['user_id'] != change['user_id']:
+                continue
+
+            if operation == 'delete_streamer':
+                streamers.pop(index)
+            elif operation == 'add_role':
+                if not self.role_exists(streamer['roles'], change['role']['role_id']):
+                    streamers[index] = dict(streamer, roles=streamer['roles'] + [change['role']])
+            elif operation == 'set_announcement':
+                streamer = dict(streamer)
+                streamer.pop('announcement', None)
+                if change['template'] is not None:
+                    streamer['announcement'] = change['template']
+                streamers[index] = streamer
+            elif self.role_exists(streamer['roles'], change['role_id']):
+                streamers[index] = dict(streamer, roles=[
+                    role for role in streamer['roles'] if role['role_id'] != change['role_id']
+                ])
+
+            return None
+
+        return None
+
+    def __apply_bulk_change(self, contents: dict, change: dict) -> None:
+        """
+        Applies a change spanning many streamers to the contents in place
+
+        Args:
+            contents (dict): The datasource contents to modify
+            change (dict): The add_role_all, purge_role, rename_role or batch change
+
+        Returns:
+            None
+        """
+
+        streamers = contents['Streamers']
+        if change['op'] == 'batch':
+            for batched in change['changes']:
+                self.apply_change(contents, batched)
+            return None
+
+        if change['op'] == 'rename_role':
+            for index, streamer in enumerate(streamers):
+                if self.role_exists(streamer['roles'], change['role_id']):
+                    streamers[index] = dict(streamer, roles=[
+                        dict(role, name=change['name']) if role['role_id'] == change['role_id']
+                        else role
+                        for role in streamer['roles']
+                    ])
+            return None
+
+        if change['op'] == 'purge_role':
+            for index, streamer in enumerate(streamers):
+                if self.role_exists(streamer['roles'], change['role_id']):
+                    streamers[index] = dict(streamer, roles=[
+                        role for role in streamer['roles'] if role['role_id'] != change['role_id']
+                    ])
+            return None
+
+        user_ids = set(change['user_ids'])
+        for index, streamer in enumerate(streamers):
+            if streamer['user_id'] not in user_ids:
+                continue
+
+            if not self.role_exists(streamer['roles'], change['role']['role_id']):
+                streamers[index] = dict(streamer, roles=streamer['roles'] + [dict(change['role'])])
+
+        return None
+
+    @traced('whitelist.compact')
+    def compact(self) -> None:
+        """
+        Folds the journal into the snapshot file and truncates the journal
+
+        Returns:
+            None
+        """
+
+        with self.__locked(exclusive=True):
+            contents = self.__load_contents()
+            self.__save_file(contents)
+
+            with open(self.__journal, 'w', encoding='utf8'):
+                pass
 
+            self.__journal_length = 0
+            self.__signature = self.__get_signature()
+
+    def reconcile(self, user_ids: list, role_ids: list, role_names: dict) -> int:
+        """
+        Removes departed streamers and deleted roles and renames roles in a single write
+
+        Only the changes which apply are made, as one batch if there are several. Streamers
+        who are not whitelisted and roles which nobody holds are skipped, so nothing is
+        written when the whitelist is already clean.
+
+        Args:
+            user_ids (list): The user ids of the streamers to remove
+            role_ids (list): The ids of the roles to remove from every streamer
+            role_names (dict): The new names of roles keyed by role id
+
+        Returns:
+            int: The number of changes made
+        """
+
+        with self.__locked(exclusive=True):
+            whitelisted = {streamer['user_id'] for streamer in self.__load_contents()['Streamers']}
+            changes = [
+                {'op': 'delete_streamer', 'user_id': user_id}
+                for user_id in user_ids if user_id in whitelisted
+            ]
+            changes += [
+                {'op': 'purge_role', 'role_id': role_id}
+                for role_id in role_ids if self.get_role_members(role_id)
+            ]
+            changes += [
+                {'op': 'rename_role', 'role_id': role_id, 'name': name}
+                for role_id, name in role_names.items()
+                if role_id not in role_ids and self.get_role_members(role_id)
+            ]
+
+            if len(changes) == 1:
+                self.__append_change(changes[0])
+            elif changes:
+                self.__append_change({'op': 'batch', 'changes': changes})
+
+            return len(changes)
+
+    @traced('whitelist.exists')
     def exists(self, user_id: int) -> bool:
         """
         Check if the users exists by user id
@@ -309,6 +807,27 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
 
         raise NotFoundException(f'Could not find role "{role_id}" to be able to get index')
 
+    def get_role_members(self, role_id: int) -> set:
+        """
+        Get the user ids of the streamers holding a role
+
+        The role index is built from the contents when they are loaded and then kept up to
+        date with each change made, so no streamer is scanned.
+
+        Args:
+            role_id (int): The role id
+
+        Returns:
+            set: The user ids
+        """
+
+        with self.__locked():
+            contents = self.__load_contents()
+            if not self.__role_index.loaded:
+                self.__role_index.load(contents)
+
+            return self.__role_index.get(role_id)
+
     def get_streamer_index(self, user_id: int) -> int:
         """
         Find the index key of the passed streamer
@@ -338,7 +857,48 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
             dict: The contents
         """
 
-        return self.__load_contents()
+        with self.__locked():
+            self.__shared = True
+            return self.__load_contents()
+
+    def get_snapshot(self) -> WhitelistSnapshot:
+        """
+        Get the current version of the whitelist
+
+        The contents are read together with the revision, a counter bumped on every
+        change to the whitelist including those made by another process. Snapshots are
+        shared between readers until the next change and are never modified.
+
+        Returns:
+            WhitelistSnapshot: The snapshot
+        """
+
+        with self.__locked():
+            contents = self.__load_contents()
+            self.__shared = True
+            if self.__snapshot is None or self.__snapshot.contents is not contents:
+                self.__snapshot = WhitelistSnapshot(self.__revision, contents)
+
+            return self.__snapshot
+
+    def refresh(self) -> bool:
+        """
+        Reload the datasource if it has been changed on disk by another process
+
+        Changes made through this handler are applied to the in memory view as they are
+        made and are not reported here.
+
+        Returns:
+            bool: True if the datasource had changed and was reloaded, else false
+        """
+
+        with self.__locked():
+            if self.__contents is not None and self.__get_signature() == self.__signature:
+                return False
+
+            self.__load_contents()
+
+        return True
 
     def role_exists(self, roles: list, role_id: int) -> bool:
         """
@@ -357,3 +917,23 @@ class JsonDatasourceHandler(DatasourceHandlerInterface):
                 return True
 
         return False
+
+
+def create_datasource_handler(settings: Settings) -> DatasourceHandlerInterface:
+    """
+    Create the datasource handler for the configured backend
+
+    Args:
+        settings (Settings): The settings
+
+    Returns:
+        DatasourceHandlerInterface: The datasource handler
+
+    Raises:
+        ValueError: If the backend is not supported
+    """
+
+    if settings.datasource_backend == 'json':
+        return JsonDatasourceHandler(settings)
+
+    raise ValueError(f'Unsupported datasource backend "{settings.datasource_backend}"')
@@ -0,0 +1,346 @@
+"""The workers file for the announce twitch bot module"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+import logging
+import multiprocessing
+import queue
+import time
+import zlib
+from replay import create_twitch_handler
+from scheduler import PollScheduler, ScheduledTwitchHandler
+from settings import Settings
+from twitch_api import TwitchHandlerInterface, TwitchStreamInterface, TwitchUnavailableException
+from whitelist import DatasourceHandlerInterface, create_datasource_handler
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """
+    A change to a streamer's stream, sent from a poll worker to the gateway
+
+    The kind is live when the streamer went live, update when the stream of a streamer
+    who is still live has changed (e.g. their viewer count) and offline once they have
+    ended, which carries no stream. Streamers found live on the first poll of a worker are
+    sent with announce false.
+    """
+    kind: str
+    username: str
+    stream: Optional[TwitchStreamInterface] = None
+    announce: bool = True
+
+
+def partition(username: str, workers: int) -> int:
+    """
+    Get the worker which owns a streamer, stable across processes and restarts
+
+    Args:
+        username (str): The username of the streamer
+        workers (int): The number of workers
+
+    Returns:
+        int: The index of the worker
+    """
+
+    return zlib.crc32(username.lower().encode('utf8')) % workers
+
+
+class PollWorker:
+    """
+    Polls twitch for one partition of the whitelist and diffs the streams into events
+    """
+
+    def __init__(
+        self,
+        index: int,
+        settings: Settings,
+        twitch_handler: TwitchHandlerInterface,
+        datasource_handler: DatasourceHandlerInterface
+    ):
+        """
+        Initialize the worker
+
+        Args:
+            index (int): The partition owned by this worker
+            settings (Settings): The settings
+            twitch_handler (TwitchHandlerInterface): The twitch handler to poll with
+            datasource_handler (DatasourceHandlerInterface): The whitelist
+        """
+
+        self.index = index
+        self.workers = settings.poll_workers
+        self.interval = settings.poll_interval
+        self.datasource_handler = datasource_handler
+        self.scheduler = PollScheduler(
+            settings.poll_interval,
+            settings.poll_max_staleness,
+            settings.poll_backoff
+        )
+        self.twitch_handler = ScheduledTwitchHandler(twitch_handler, self.scheduler)
+        self.live = None
+
+    def usernames(self) -> list:
+        """
+        Get the usernames of the streamers in this worker's partition
+
+        Returns:
+            list: The usernames
+        """
+
+        return [
+            streamer['username']
+            for streamer in self.datasource_handler.get_contents()['Streamers']
+            if partition(streamer['username'], self.workers) == self.index
+        ]
+
+    def poll(self) -> list:
+        """
+        Poll the streamers who are due and diff their streams against the last poll
+
+        Streamers still live are only sent when their stream has changed, streamers who
+        were not due are served from the last poll and so are not sent again. Nothing is
+        sent while twitch is unavailable without a last known state.
+
+        Returns:
+            list: The stream events
+        """
+
+        try:
+            streams = self.twitch_handler.get_streams(self.usernames())
+        except TwitchUnavailableException:
+            return []
+
+        announce = self.live is not None
+        previous = self.live or {}
+
+        events = [
+            StreamEvent('update' if username in previous else 'live', username, stream, announce)
+            for username, stream in streams.items()
+            if previous.get(username) != stream
+        ]
+        events += [
+            StreamEvent('offline', username) for username in previous if username not in streams
+        ]
+        self.live = streams
+
+        return events
+
+    def run(self, events, control) -> None:
+        """
+        Poll every interval, sending events, until told to stop
+
+        Usernames received on the control queue are forced due and polled straight away.
+        A poll which fails is logged and the worker carries on with the next one.
+
+        Args:
+            events (multiprocessing.Queue): Receives a list of events per poll
+            control (multiprocessing.Queue): Sends lists of usernames, or none to stop
+
+        Returns:
+            None
+        """
+
+        while True:
+            try:
+                polled = self.poll()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Poll worker %d failed to poll', self.index)
+                polled = []
+
+            if polled:
+                events.put(polled)
+
+            deadline = time.monotonic() + self.interval
+            while True:
+                try:
+                    message = control.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+
+                if message is None:
+                    return None
+
+                self.scheduler.force(message)
+                break
+
+
+def run_worker(index: int, settings: Settings, events, control) -> None:
+    """
+    The entry point of a poll worker process
+
+    Args:
+        index (int): The partition owned by the worker
+        settings (Settings): The settings
+        events (multiprocessing.Queue): Receives the events
+        control (multiprocessing.Queue): Sends the usernames to force, or none to stop
+
+    Returns:
+        None
+    """
+
+    worker = PollWorker(
+        index,
+        settings,
+        create_twitch_handler(settings, index),
+        create_datasource_handler(settings)
+    )
+    worker.run(events, control)
+
+
+class WorkerPool:
+    """
+    Runs a poll worker process per partition of the whitelist
+
+    Each worker does its own twitch I/O and diffing and sends compact stream events back
+    over a shared queue, so polling scales across cores without touching the gateway.
+    Workers which die are started again by supervise, at most once per restart delay.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        target: Callable = run_worker,
+        restart_delay: Optional[float] = None
+    ):
+        """
+        Initialize the pool, the processes are started by start
+
+        Args:
+            settings (Settings): The settings
+            target (Callable): The entry point of each worker process
+            restart_delay (float): The least seconds between restarts of a worker, defaults
+                to the poll interval
+        """
+
+        self.context = multiprocessing.get_context('spawn')
+        self.settings = settings
+        self.target = target
+        self.restart_delay = settings.poll_interval if restart_delay is None else restart_delay
+        self.workers = settings.poll_workers
+        self.events = self.context.Queue()
+        self.controls = [self.context.Queue() for _ in range(self.workers)]
+        self.processes = [self.__create_process(index) for index in range(self.workers)]
+        self.started_at = [None] * self.workers
+        self.stopping = False
+
+    def __create_process(self, index: int) -> multiprocessing.Process:
+        """
+        Create the process of a worker
+
+        Args:
+            index (int): The partition owned by the worker
+
+        Returns:
+            multiprocessing.Process: The process, not yet started
+        """
+
+        return self.context.Process(
+            target=self.target,
+            args=(index, self.settings, self.events, self.controls[index]),
+            name=f'poll-worker-{index}',
+            daemon=True
+        )
+
+    def start(self) -> None:
+        """
+        Start the worker processes
+
+        Returns:
+            None
+        """
+
+        for index, process in enumerate(self.processes):
+            process.start()
+            self.started_at[index] = time.monotonic()
+
+    def supervise(self) -> list:
+        """
+        Start any worker which has died again, unless it was started too recently
+
+        A restarted worker finds the streamers already live on its first poll and sends
+        them without announcing them again.
+
+        Returns:
+            list: The indexes of the workers restarted
+        """
+
+        restarted = []
+        for index, process in enumerate(self.processes):
+            if self.stopping or process.pid is None or process.is_alive():
+                continue
+
+            if time.monotonic() - self.started_at[index] < self.restart_delay:
+                continue
+
+            logger.warning(
+                'Poll worker %d exited with code %s, restarting it', index, process.exitcode
+            )
+            self.processes[index] = self.__create_process(index)
+            self.processes[index].start()
+            self.started_at[index] = time.monotonic()
+            restarted.append(index)
+
+        return restarted
+
+    def force(self, usernames: list) -> None:
+        """
+        Ask the workers owning the streamers to poll them straight away
+
+        Args:
+            usernames (list): The usernames
+
+        Returns:
+            None
+        """
+
+        partitions = {}
+        for username in usernames:
+            partitions.setdefault(partition(username, self.workers), []).append(username)
+
+        for index, owned in partitions.items():
+            self.controls[index].put(owned)
+
+    def get_events(self, timeout: float) -> list:
+        """
+        Wait for events, then take every other event already waiting too
+
+        Args:
+            timeout (float): The most seconds to wait
+
+        Returns:
+            list: The events, empty if none arrived in time
+        """
+
+        try:
+            events = list(self.events.get(timeout=timeout))
+        except queue.Empty:
+            return []
+
+        while True:
+            try:
+                events += self.events.get_nowait()
+            except queue.Empty:
+                return events
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker processes, terminating any which do not stop in time
+
+        Args:
+            timeout (float): The seconds to wait for each worker
+
+        Returns:
+            None
+        """
+
+        self.stopping = True
+        for control in self.controls:
+            control.put(None)
+
+        for process in self.processes:
+            if process.pid is None:
+                continue
+
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()